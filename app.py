@@ -1,9 +1,163 @@
+import csv
+import json
+import os
+from urllib.parse import urlencode
+
 import gitdata.local as db
-from minidjango.http import HttpResponse
-db.load(['messages'])
+from gitdata.index import SortedIndex
+from gitdata.search import InvertedIndex
+from gitdata.storage import Storage
+from gitdata.writer import GroupCommitWriter
+from minidjango.http import (
+    HttpResponse, HttpResponseBadRequest, HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from minidjango.template import get_template
+
+# messages are appended to the messages.jsonl log (imported from
+# messages.json on first run) through a group commit queue, and read
+# back from snapshots of the log: committed messages are added to the
+# snapshot directly, messages of other workers on the next reload
+storage = Storage()
+writer = GroupCommitWriter(
+    storage['messages'],
+    fsync=os.environ.get('MESSAGES_FSYNC', 'batch'),
+    on_commit=lambda ids, records: db.extend('messages', ids, records))
+db.load(['messages'], indexes={
+    'name': lambda: SortedIndex(
+        lambda m: (m.get('name', '').lower(), m.get('name', ''))),
+    'search': lambda: InvertedIndex(['name', 'message']),
+})
 
 from minidjango.core.wsgi import get_wsgi_application
 from minidjango.conf import settings
 
-settings.ROUTER['/'] = lambda r: HttpResponse('helllo!')
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# ?order= values -> (index, newest first)
+ORDERS = {
+    'time': ('id', True),
+    'name': ('name', False),
+}
+
+
+def get_page(request):
+    """
+    Return ``(items, next_after)`` for the ?order=, ?after= and ?limit=
+    parameters, ``items`` is a list of ``(id, message)``. Raise
+    ValueError for invalid parameters.
+    """
+    order = request.GET.get('order', 'time')
+    if order not in ORDERS:
+        raise ValueError('unknown order %r' % order)
+    index, reverse = ORDERS[order]
+    after = request.GET.get('after')
+    after = int(after) if after else None
+    limit = min(int(request.GET.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE)
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    try:
+        items = db.messages.page(index, after, limit + 1, reverse)
+    except KeyError:
+        raise ValueError('unknown message id %r' % after)
+    if len(items) > limit:
+        return items[:limit], items[limit - 1][0]
+    return items, None
+
+
+def bad_request(message):
+    """Return a 400 response with a fixed plain text ``message``."""
+    return HttpResponseBadRequest(
+        message, content_type='text/plain; charset=utf-8')
+
+
+def post_message(request):
+    name = request.POST.get('name', '').strip()
+    message = request.POST.get('message', '').strip()
+    if not message:
+        return bad_request('message is required')
+    # returns once the batch holding the message is committed
+    writer.append({'name': name, 'message': message})
+    return HttpResponseRedirect('/?' + urlencode({'name': name}))
+
+
+def index(request):
+    if request.method == 'POST':
+        return post_message(request)
+    try:
+        items, next_after = get_page(request)
+    except ValueError:
+        return bad_request('invalid page parameters')
+    order = request.GET.get('order', 'time')
+    template = get_template('index.html')
+    return StreamingHttpResponse(template.render_iter({
+        'messages': [message for _, message in items],
+        'name': request.GET.get('name', ''),
+        'next': '?order=%s&after=%d' % (order, next_after)
+        if next_after is not None else '',
+    }))
+
+
+def api_messages(request):
+    try:
+        items, next_after = get_page(request)
+    except ValueError:
+        return bad_request('invalid page parameters')
+    return HttpResponse(
+        json.dumps({
+            'messages': [dict(message, id=id) for id, message in items],
+            'next': next_after,
+        }, ensure_ascii=False),
+        content_type='application/json; charset=utf-8')
+
+
+class Echo(object):
+    """A file-like object for csv.writer which returns what is written."""
+    def write(self, value):
+        return value
+
+
+def search(request):
+    try:
+        limit = min(int(request.GET.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        return bad_request('invalid limit')
+    results = db.messages.search(request.GET.get('q', ''), limit)
+    return HttpResponse(
+        json.dumps({
+            'messages': [dict(message, id=id) for id, message in results],
+        }, ensure_ascii=False),
+        content_type='application/json; charset=utf-8')
+
+
+def export_csv(request):
+    csv_writer = csv.writer(Echo())
+    rows = ([m.get('name', ''), m.get('message', '')] for m in db.messages)
+    response = StreamingHttpResponse(
+        (csv_writer.writerow(row) for row in rows),
+        content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="messages.csv"'
+    return response
+
+
+def export_json(request):
+    def chunks():
+        yield '['
+        for i, message in enumerate(db.messages):
+            yield (',' if i else '') + json.dumps(message, ensure_ascii=False)
+        yield ']'
+
+    return StreamingHttpResponse(
+        chunks(), content_type='application/json; charset=utf-8')
+
+
+settings['TEMPLATE_DIRS'] = [BASE_DIR]
+settings.ROUTER['/'] = index
+settings.ROUTER['/export/messages.csv'] = export_csv
+settings.ROUTER['/export/messages.json'] = export_json
+settings.ROUTER['/api/messages/'] = api_messages
+settings.ROUTER['/api/search/'] = search
 application = get_wsgi_application()
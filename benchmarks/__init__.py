@@ -0,0 +1,11 @@
+"""
+Micro-benchmarks for the request path, stdlib only.
+
+    python -m benchmarks run -o baseline.json
+    ... change something ...
+    python -m benchmarks run -o new.json
+    python -m benchmarks compare baseline.json new.json
+
+``compare`` exits with status 1 if a benchmark got significantly slower.
+"""
+__author__ = 'pahaz'
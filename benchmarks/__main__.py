@@ -0,0 +1,51 @@
+import argparse
+import sys
+
+from benchmarks import cases  # noqa, registers the benchmarks
+from benchmarks.runner import (
+    BENCHMARKS, compare, format_comparison, load, run, save,
+)
+
+__author__ = 'pahaz'
+
+parser = argparse.ArgumentParser(prog='python -m benchmarks')
+commands = parser.add_subparsers(dest='command')
+commands.required = True
+
+run_parser = commands.add_parser('run', help='run the benchmarks')
+run_parser.add_argument('names', nargs='*', metavar='name',
+                        help='benchmarks to run (default: all)')
+run_parser.add_argument('-o', '--output', help='save the results as JSON')
+run_parser.add_argument('-r', '--repeat', type=int, default=20,
+                        help='samples per benchmark')
+run_parser.add_argument('--min-time', type=float, default=0.01,
+                        help='seconds per sample')
+
+compare_parser = commands.add_parser(
+    'compare', help='compare two results, exit 1 on regressions')
+compare_parser.add_argument('base')
+compare_parser.add_argument('new')
+compare_parser.add_argument('--alpha', type=float, default=0.01,
+                            help='significance level')
+compare_parser.add_argument('--threshold', type=float, default=0.05,
+                            help='ignore relative changes below this')
+
+list_parser = commands.add_parser('list', help='list the benchmarks')
+
+args = parser.parse_args()
+
+if args.command == 'list':
+    print('\n'.join(sorted(BENCHMARKS)))
+elif args.command == 'run':
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: %s' % ', '.join(sorted(unknown)))
+    results = run(args.names, args.repeat, args.min_time, out=sys.stdout)
+    if args.output:
+        save(results, args.output)
+else:
+    rows = compare(load(args.base), load(args.new), args.alpha,
+                   args.threshold)
+    print(format_comparison(rows))
+    if any(row[-1] == 'slower' for row in rows):
+        sys.exit(1)
@@ -0,0 +1,187 @@
+"""
+The request path hot spots. Each function sets up its input once and
+returns the callable that is timed.
+"""
+from io import BytesIO
+from unittest import mock
+
+from benchmarks.runner import benchmark
+from gitdata.search import InvertedIndex
+from minidjango.conf import settings
+from minidjango.core.handlers.wsgi import WSGIHandler
+from minidjango.http import HttpResponse
+from minidjango.http.cookie import _parse_cookie, parse_cookie
+from minidjango.http.request import HttpRequest
+from minidjango.template import Template
+from minidjango.utils.types import LimitedStream, MultiValueDict
+
+__author__ = 'pahaz'
+
+COOKIE = 'sessionid=abcdef0123456789; csrftoken=0123456789abcdef; ' \
+         'theme=dark; lang=en-US; _ga=GA1.2.1234567890.1234567890'
+TEMPLATE = ('<h1>{{ title }}</h1>{% for message in messages %}'
+            '<p>{{ message.name }}: {{ message.message }}</p>{% endfor %}'
+            '{% if footer %}<footer>{{ footer }}</footer>{% endif %}')
+TRACKING_QUERY = '&'.join(
+    ['utm_source=newsletter', 'utm_medium=email', 'utm_campaign=spring']
+    + ['p%d=%%D0%%B7%%D0%%BD%%D0%%B0%%D1%%87%%D0%%B5%%D0%%BD%%D0%%B8%%D0%%B5'
+       % i for i in range(40)])
+MESSAGES = [{'name': 'user%d' % i, 'message': 'hello %d' % i}
+            for i in range(20)]
+
+
+def make_environ(**extra):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': '/',
+        'QUERY_STRING': 'name=pahaz&page=2&tag=a&tag=b',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '8002',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost:8002',
+        'HTTP_ACCEPT': 'text/html,application/xhtml+xml',
+        'HTTP_ACCEPT_ENCODING': 'gzip, deflate',
+        'HTTP_USER_AGENT': 'Mozilla/5.0 (X11; Linux x86_64)',
+        'HTTP_COOKIE': COOKIE,
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+    }
+    environ.update(extra)
+    return environ
+
+
+@benchmark
+def request_init():
+    environ = make_environ()
+    return lambda: HttpRequest(environ)
+
+
+@benchmark
+def request_get():
+    environ = make_environ()
+    return lambda: HttpRequest(environ).GET['name']
+
+
+@benchmark
+def request_get_tracking_url():
+    environ = make_environ(QUERY_STRING=TRACKING_QUERY)
+    return lambda: HttpRequest(environ).GET.get('utm_source')
+
+
+@benchmark
+def parse_cookie_header():
+    return lambda: parse_cookie(COOKIE)
+
+
+@benchmark
+def parse_cookie_header_uncached():
+    parse = _parse_cookie.__wrapped__
+    return lambda: parse(COOKIE)
+
+
+@benchmark
+def multivaluedict_access():
+    d = MultiValueDict({'name': ['pahaz'], 'tag': ['a', 'b'], 'page': ['2']})
+
+    def run():
+        d['name']
+        d.get('page')
+        d.getlist('tag')
+        'missing' in d
+    return run
+
+
+@benchmark
+def limitedstream_readline():
+    data = b''.join(b'line %d of a multipart body\r\n' % i
+                    for i in range(100))
+
+    def run():
+        stream = LimitedStream(BytesIO(data), len(data))
+        while stream.readline():
+            pass
+    return run
+
+
+@benchmark
+def response_iteration():
+    chunks = ['chunk %d' % i for i in range(50)]
+
+    def run():
+        for _ in HttpResponse(iter(chunks)):
+            pass
+    return run
+
+
+@benchmark
+def search_20k_messages():
+    words = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta']
+    index = InvertedIndex(['name', 'message'])
+    for i in range(20000):
+        index.add(i + 1, {
+            'name': 'user%d' % (i % 300),
+            'message': ' '.join(words[(i * k) % len(words)]
+                                for k in range(1, 5)),
+        })
+    return lambda: index.search('gamma del*', limit=20)
+
+
+@benchmark
+def template_render():
+    template = Template(TEMPLATE)
+    context = {'title': 'Messages', 'messages': MESSAGES, 'footer': 'bye'}
+    return lambda: template.render(context)
+
+
+class RequestMiddleware(object):
+    def process_request(self, request):
+        return None
+
+
+class ResponseMiddleware(object):
+    def process_response(self, request, response):
+        return response
+
+
+class ExceptionMiddleware(object):
+    def process_exception(self, request, exception):
+        return None
+
+
+def wsgi_app(middleware=()):
+    """Return a function doing a GET / round trip through WSGIHandler."""
+    def view(request):
+        return HttpResponse('Hello, %s' % request.GET.get('name', ''))
+
+    handler = WSGIHandler()
+    with mock.patch.dict(settings, {
+        'MIDDLEWARE_CLASSES': list(middleware),
+        'ROUTER': {'/': view},
+    }):
+        handler.load_metrics()
+        handler.load_router()
+        handler.load_middleware()
+    # keep this configuration after the settings are restored
+    settings.unsubscribe(handler.settings_changed)
+
+    def start_response(status, headers):
+        pass
+
+    def run():
+        response = handler(make_environ(), start_response)
+        b''.join(response)
+        response.close()
+    return run
+
+
+@benchmark
+def wsgi_round_trip():
+    return wsgi_app()
+
+
+@benchmark
+def wsgi_round_trip_12_middleware():
+    return wsgi_app(['benchmarks.cases.%s' % name for name in (
+        'RequestMiddleware', 'ResponseMiddleware', 'ExceptionMiddleware',
+    ) * 4])
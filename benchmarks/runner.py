@@ -0,0 +1,175 @@
+"""
+Benchmark registry, timing loop, JSON results and their comparison.
+
+Each benchmark is a setup function, registered with ``@benchmark``,
+which returns the zero-argument callable to measure. A run collects
+``repeat`` samples per benchmark; a sample is the mean time of one call
+over ``number`` calls, ``number`` being calibrated so that a sample
+takes about ``min_time`` seconds.
+"""
+import datetime
+import json
+import math
+import platform
+import statistics
+import sys
+from time import perf_counter
+
+__author__ = 'pahaz'
+
+BENCHMARKS = {}
+
+
+def benchmark(func=None, name=None):
+    """
+    Register a benchmark setup function, by default under its own name.
+    """
+    if func is None:
+        return lambda func: benchmark(func, name)
+    BENCHMARKS[name or func.__name__] = func
+    return func
+
+
+def calibrate(func, min_time):
+    number = 1
+    while True:
+        start = perf_counter()
+        for _ in range(number):
+            func()
+        if perf_counter() - start >= min_time:
+            return number
+        number *= 2
+
+
+def measure(func, repeat=20, min_time=0.01, number=None):
+    """Return ``(number, samples)``, samples are seconds per call."""
+    if number is None:
+        number = calibrate(func, min_time)
+    samples = []
+    loops = range(number)
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in loops:
+            func()
+        samples.append((perf_counter() - start) / number)
+    return number, samples
+
+
+def run(names=None, repeat=20, min_time=0.01, out=None):
+    """Run the benchmarks (all of them by default) and return results."""
+    results = {
+        'meta': {
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'repeat': repeat,
+        },
+        'benchmarks': {},
+    }
+    for name in sorted(names or BENCHMARKS):
+        func = BENCHMARKS[name]()
+        number, samples = measure(func, repeat, min_time)
+        results['benchmarks'][name] = {'number': number, 'samples': samples}
+        if out is not None:
+            out.write('%-32s %s\n' % (name, format_time(
+                statistics.median(samples))))
+    return results
+
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def format_time(seconds):
+    """
+    >>> format_time(0.0000125)
+    '12.50 us'
+    >>> format_time(2.5)
+    '2.50 s'
+    """
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '%.2f %s' % (seconds / scale, unit)
+    return '%.2f ns' % (seconds / 1e-9)
+
+
+def mann_whitney_u(a, b):
+    """
+    Two-sided Mann-Whitney U test with the normal approximation (and the
+    tie correction); returns the p-value. Timings are not normally
+    distributed, a rank test does not assume they are.
+
+    >>> mann_whitney_u(range(10), range(10, 20)) < 0.01
+    True
+    >>> mann_whitney_u([1, 3, 5, 7], [2, 4, 6, 8]) > 0.5
+    True
+    """
+    a, b = list(a), list(b)
+    n1, n2 = len(a), len(b)
+    values = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    rank_sum = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < len(values):
+        j = i
+        while j + 1 < len(values) and values[j + 1][0] == values[i][0]:
+            j += 1
+        rank = (i + j) / 2.0 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        rank_sum += rank * sum(1 for k in range(i, j + 1)
+                               if values[k][1] == 0)
+        i = j + 1
+    u = rank_sum - n1 * (n1 + 1) / 2.0
+    n = n1 + n2
+    variance = n1 * n2 / 12.0 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2.0) / math.sqrt(variance)
+    return 2 * (1 - statistics.NormalDist().cdf(abs(z)))
+
+
+def compare(base, new, alpha=0.01, threshold=0.05):
+    """
+    Compare two results. Return ``[(name, base_median, new_median,
+    ratio, p_value, verdict)]`` for the benchmarks present in both;
+    the verdict is 'slower' or 'faster' when the difference is both
+    statistically significant (p < alpha) and larger than ``threshold``
+    (relative), otherwise 'same'.
+    """
+    rows = []
+    base, new = base['benchmarks'], new['benchmarks']
+    for name in sorted(set(base) & set(new)):
+        a, b = base[name]['samples'], new[name]['samples']
+        base_median, new_median = statistics.median(a), statistics.median(b)
+        ratio = new_median / base_median
+        p_value = mann_whitney_u(a, b)
+        verdict = 'same'
+        if p_value < alpha:
+            if ratio > 1 + threshold:
+                verdict = 'slower'
+            elif ratio < 1 - threshold:
+                verdict = 'faster'
+        rows.append((name, base_median, new_median, ratio, p_value, verdict))
+    return rows
+
+
+def format_comparison(rows):
+    lines = ['%-32s %12s %12s %8s %8s' % (
+        'benchmark', 'base', 'new', 'ratio', 'p')]
+    for name, base_median, new_median, ratio, p_value, verdict in rows:
+        line = '%-32s %12s %12s %7.2fx %8.4f' % (
+            name, format_time(base_median), format_time(new_median),
+            ratio, p_value)
+        if verdict != 'same':
+            line += '  ' + verdict.upper()
+        lines.append(line)
+    return '\n'.join(lines)
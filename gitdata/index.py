@@ -0,0 +1,175 @@
+"""
+Sorted in-memory indexes over a collection, for keyset pagination.
+
+A page is addressed by the id of the last record of the previous page
+(``after``) instead of an offset, so fetching any page costs a binary
+search plus the page itself, however many records there are, and pages
+don't shift when records are added before them.
+"""
+import bisect
+import heapq
+import itertools
+
+__author__ = 'pahaz'
+
+# entries added to a SortedIndex since its base was last rebuilt
+DELTA_MAX = 1024
+
+
+class SortedIndex(object):
+    """
+    Record ids ordered by ``(key(record), id)``.
+
+    The entries are a large sorted base list, which is never changed and
+    is shared by the forks of the index, and a small sorted delta of the
+    entries added since, copied by fork(). The delta is merged into a new
+    base when it outgrows DELTA_MAX, so a fork costs O(DELTA_MAX) and not
+    O(len(index)).
+
+    >>> index = SortedIndex(lambda r: r['name'])
+    >>> for id, name in enumerate(['b', 'a', 'c', 'a'], 1):
+    ...     index.add(id, {'name': name})
+    >>> index.page(limit=2)
+    [2, 4]
+    >>> index.page(after=4, limit=2)
+    [1, 3]
+    >>> index.page(after=1, limit=2, reverse=True)
+    [4, 2]
+    >>> index.remove(4)
+    >>> index.page()
+    [2, 1, 3]
+    """
+    def __init__(self, key):
+        self.key = key
+        self._base = []  # sorted (key, id), shared with forks
+        self._base_keys = {}  # id -> key, shared with forks
+        self._removed = set()  # ids removed from the base
+        self._delta = []  # sorted (key, id)
+        self._delta_keys = {}  # id -> key
+
+    def __len__(self):
+        return len(self._base) - len(self._removed) + len(self._delta)
+
+    def __contains__(self, id):
+        return id in self._delta_keys or (
+            id in self._base_keys and id not in self._removed)
+
+    def _key(self, id):
+        if id in self._delta_keys:
+            return self._delta_keys[id]
+        if id in self._removed:
+            raise KeyError(id)
+        return self._base_keys[id]
+
+    def fork(self):
+        """Return a copy to extend with appended records."""
+        new = SortedIndex(self.key)
+        new._base = self._base
+        new._base_keys = self._base_keys
+        new._removed = set(self._removed)
+        new._delta = list(self._delta)
+        new._delta_keys = dict(self._delta_keys)
+        return new
+
+    copy = fork
+
+    def add(self, id, record):
+        self.add_many([(id, record)])
+
+    def add_many(self, items):
+        """
+        Add ``(id, record)`` pairs. A few are inserted into the delta one
+        by one, more are sorted in at once with the base: a build from
+        scratch costs one sort instead of an insertion per record.
+
+        >>> index = SortedIndex(lambda r: r)
+        >>> index.add_many(enumerate('bcab', 1))
+        >>> index.add_many([(2, 'a')])
+        >>> index.page()
+        [2, 3, 1, 4]
+        """
+        entries = {}  # id -> key
+        for id, record in items:
+            if id in self:
+                self.remove(id)
+            entries[id] = self.key(record)
+        if len(self._delta) + len(entries) <= DELTA_MAX:
+            for id, key in entries.items():
+                bisect.insort(self._delta, (key, id))
+            self._delta_keys.update(entries)
+            return
+        keys = dict(self._base_keys)
+        for id in self._removed:
+            del keys[id]
+        keys.update(self._delta_keys)
+        keys.update(entries)
+        base = self._base
+        if self._removed:
+            base = [entry for entry in base if entry[1] not in self._removed]
+        # the sort keeps the sorted run and merges the tail into it
+        base = base + self._delta + [(key, id) for id, key in entries.items()]
+        base.sort()
+        self._base, self._base_keys = base, keys
+        self._removed = set()
+        self._delta = []
+        self._delta_keys = {}
+
+    def remove(self, id):
+        if id in self._delta_keys:
+            key = self._delta_keys.pop(id)
+            del self._delta[bisect.bisect_left(self._delta, (key, id))]
+        elif id in self:
+            self._removed.add(id)
+        else:
+            raise KeyError(id)
+
+    def _run(self, entries, bound, reverse):
+        if reverse:
+            end = len(entries) if bound is None else \
+                bisect.bisect_left(entries, bound)
+            return map(entries.__getitem__, range(end - 1, -1, -1))
+        start = 0 if bound is None else bisect.bisect_right(entries, bound)
+        return map(entries.__getitem__, range(start, len(entries)))
+
+    def page(self, after=None, limit=20, reverse=False):
+        """
+        Return up to ``limit`` ids following (or, with ``reverse``,
+        preceding) the id ``after``. Raise KeyError if ``after`` is not
+        in the index.
+        """
+        bound = None if after is None else (self._key(after), after)
+        base = self._run(self._base, bound, reverse)
+        if self._removed:
+            removed = self._removed
+            base = (entry for entry in base if entry[1] not in removed)
+        entries = heapq.merge(base, self._run(self._delta, bound, reverse),
+                              reverse=reverse)
+        return [id for _, id in itertools.islice(entries, limit)]
+
+
+class InsertionOrder(object):
+    """
+    The ids ``1..count`` of an append-only sequence in insertion order.
+
+    >>> InsertionOrder(5).page(after=2, limit=2)
+    [3, 4]
+    >>> InsertionOrder(5).page(limit=2, reverse=True)
+    [5, 4]
+    """
+    def __init__(self, count=0):
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, id):
+        return 1 <= id <= self.count
+
+    def page(self, after=None, limit=20, reverse=False):
+        if after is not None and after not in self:
+            raise KeyError(after)
+        if not reverse:
+            start = 0 if after is None else after
+            return list(range(start + 1, min(start + limit, self.count) + 1))
+        end = self.count + 1 if after is None else after
+        return list(range(end - 1, max(end - limit, 1) - 1, -1))
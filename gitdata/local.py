@@ -1,8 +1,341 @@
+"""
+Read-only collections loaded from ``<name>.json`` files or from
+gitdata.storage logs (``<name>.jsonl``).
+
+    import gitdata.local as db
+    db.load(['messages'])
+    db.messages  # the current snapshot
+
+Each access checks, at most once per ``interval`` seconds, the file's
+mtime and size. When they change, the file (or only the new lines of a
+log that was just appended to) is parsed in a background thread and the
+new snapshot replaces the old one with a single reference assignment:
+readers never wait for a reload and never see a half-loaded collection.
+Snapshots are immutable (lists become tuples, dicts become FrozenDicts),
+so a reader can keep using the one it got. If the new file can't be
+parsed (e.g. it is being written), the old snapshot is kept.
+
+A snapshot of a list carries its indexes, built (or, when records were
+only appended, extended) with it; record ids are 1-based positions:
+
+    db.load(['messages'], indexes={
+        'name': lambda: SortedIndex(lambda m: m['name']),
+        'search': lambda: InvertedIndex(['name', 'message']),
+    })
+    for id, message in db.messages.page('name', after=10, limit=20):
+        ...
+    for id, message in db.messages.search('hello wor*'):
+        ...
+"""
 import json
+import logging
+import os
+import threading
+import time
+
+from gitdata.index import InsertionOrder, SortedIndex
+from gitdata.search import InvertedIndex
+from minidjango.utils.types import FrozenDict
+
+__author__ = 'pahaz'
+logger = logging.getLogger(__name__)
+
+RELOAD_INTERVAL = 2  # seconds between mtime/size checks
+
+_collections = {}
+
+
+def freeze(value):
+    """
+    >>> freeze([{'name': 'pahaz', 'tags': ['a']}])
+    ({'name': 'pahaz', 'tags': ('a',)},)
+    """
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class Snapshot(tuple):
+    """
+    An immutable list of records with its indexes. ``indexes`` maps
+    index names to factories of empty indexes; ``'id'`` (insertion
+    order) is always available.
+
+    >>> s = Snapshot(freeze([{'n': 'b'}, {'n': 'a'}]), {
+    ...     'n': lambda: SortedIndex(lambda r: r['n']),
+    ...     'search': lambda: InvertedIndex(['n']),
+    ... })
+    >>> s.page('n')
+    [(2, {'n': 'a'}), (1, {'n': 'b'})]
+    >>> s.page('id', after=1)
+    [(2, {'n': 'a'})]
+    >>> s.search('b')
+    [(1, {'n': 'b'})]
+    """
+    def __new__(cls, records=(), indexes=None, previous=None,
+                appended=False):
+        self = super(Snapshot, cls).__new__(cls, records)
+        self.indexes = {'id': InsertionOrder(len(self))}
+        if not indexes:
+            return self
+        # only appended to: extend copies of the previous indexes. A
+        # caller which only appended says so with ``appended``, the
+        # records are compared otherwise
+        if not appended:
+            appended = previous is not None and \
+                len(previous) <= len(self) and \
+                tuple.__eq__(previous, self[:len(previous)])
+        for name, factory in indexes.items():
+            start = 0
+            if appended and name in previous.indexes:
+                index = previous.indexes[name].fork()
+                start = len(previous)
+            else:
+                index = factory()
+            index.add_many((id, self[id - 1])
+                           for id in range(start + 1, len(self) + 1))
+            self.indexes[name] = index
+        return self
+
+    def get(self, id):
+        if id < 1:
+            raise IndexError(id)
+        return self[id - 1]
+
+    def page(self, order='id', after=None, limit=20, reverse=False):
+        """Return ``[(id, record)]``, see SortedIndex.page()."""
+        ids = self.indexes[order].page(after, limit, reverse)
+        return [(id, self[id - 1]) for id in ids]
+
+    def search(self, query, limit=10, index='search'):
+        """Return ``[(id, record)]``, see InvertedIndex.search()."""
+        # the index may be shared with newer snapshots
+        ids = self.indexes[index].search(query, limit, max_id=len(self))
+        return [(id, self[id - 1]) for id in ids]
+
+
+def _read_log(path, start=0):
+    """
+    Return ``(entries, end)``: the complete lines of a gitdata.storage log
+    after the offset ``start`` and the offset after the last of them.
+    """
+    entries = []
+    with open(path, 'rb') as f:
+        f.seek(start)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # a write in progress
+            entries.append(json.loads(line.decode('utf-8')))
+            start += len(line)
+    return entries, start
+
+
+def _parse_log(entries):
+    """
+    Return the live records of gitdata.storage log entries, in id order.
+
+    >>> _parse_log([{'id': 1, 'data': 'a'}, {'id': 2, 'data': 'b'},
+    ...             {'id': 1, 'deleted': True}])
+    ['b']
+    """
+    records = {}
+    for entry in entries:
+        if entry.get('deleted'):
+            records.pop(entry['id'], None)
+        else:
+            records[entry['id']] = entry['data']
+    return [records[id] for id in sorted(records)]
+
 
+def _appended(records, entries):
+    """
+    Return the frozen records the log ``entries`` append to ``records``,
+    or None if they change or delete any. Entries for records that are
+    already there (e.g. applied by Collection.extend()) are skipped.
 
-def load(names):
+    >>> _appended(('a',), [{'id': 1, 'data': 'a'}, {'id': 2, 'data': 'b'}])
+    ['b']
+    >>> _appended(('a',), [{'id': 1, 'deleted': True}]) is None
+    True
+    """
+    new = []
+    for entry in entries:
+        if entry.get('deleted'):
+            return None
+        id, data = entry['id'], freeze(entry['data'])
+        if id == len(records) + len(new) + 1:
+            new.append(data)
+        elif id > len(records) or records[id - 1] != data:
+            return None
+    return new
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class Collection(object):
+    def __init__(self, path, interval=RELOAD_INTERVAL, indexes=None):
+        self.path = path
+        self.interval = interval
+        self.indexes = indexes
+        self._reload_lock = threading.Lock()  # one reload at a time
+        self._swap_lock = threading.Lock()  # held to replace the snapshot
+        self._recheck = False  # checked during a reload
+        self.reload_thread = None
+        self.snapshot = None
+        # stat before reading: a change during the read is seen next time
+        self._stat = _stat_key(path)
+        self.snapshot, self._end = self._parse()
+        self._checked_at = time.monotonic()
+
+    def _parse(self):
+        """
+        Return the snapshot of the whole file and, for a log, the offset
+        it was read up to.
+        """
+        end = None
+        if self.path.endswith('.jsonl'):
+            entries, end = _read_log(self.path)
+            data = freeze(_parse_log(entries))
+        else:
+            with open(self.path, encoding='utf-8') as f:
+                data = freeze(json.loads(f.read().strip()))
+        if isinstance(data, tuple):
+            return Snapshot(data, self.indexes, self.snapshot), end
+        return data, end
+
+    def _parse_tail(self, snapshot, end):
+        """
+        Return ``snapshot`` with the records appended to the log after the
+        offset ``end`` and the new end offset, or None if the log was
+        changed otherwise.
+        """
+        if end is None:
+            return None
+        entries, end = _read_log(self.path, end)
+        records = _appended(snapshot, entries)
+        if records is None:
+            return None
+        if not records:
+            return snapshot, end
+        return Snapshot(snapshot + tuple(records), self.indexes,
+                        snapshot, appended=True), end
+
+    def get(self):
+        if self.interval is not None:
+            now = time.monotonic()
+            if now - self._checked_at >= self.interval:
+                self._checked_at = now
+                self.check()
+        return self.snapshot
+
+    def check(self):
+        """Start a background reload if the file changed."""
+        try:
+            stat = _stat_key(self.path)
+        except OSError:
+            return
+        if stat == self._stat:
+            return
+        self._recheck = True
+        if not self._reload_lock.acquire(blocking=False):
+            return  # already reloading, it checks again when done
+        self._recheck = False
+        self.reload_thread = threading.Thread(
+            target=self._reload, args=(stat,), daemon=True,
+            name='gitdata-reload-%s' % os.path.basename(self.path))
+        self.reload_thread.start()
+
+    def _reload(self, stat):
+        try:
+            snapshot = self.snapshot
+            result = None
+            if stat[0] == self._stat[0]:  # else compacted: a new file
+                result = self._parse_tail(snapshot, self._end)
+            if result is None:
+                result = self._parse()
+            while True:
+                with self._swap_lock:
+                    if self.snapshot is snapshot:
+                        self.snapshot, self._end = result
+                        break
+                    snapshot = self.snapshot
+                # extended while the log was read: the extended records
+                # are in the log, read them on top of the result
+                result = self._parse_tail(*result) or self._parse()
+        except (OSError, ValueError):
+            logger.warning('Keep the old %s, the new one is not loadable',
+                           self.path, exc_info=True)
+        else:
+            logger.info('Reloaded %s', self.path)
+        finally:
+            self._stat = stat
+            self._reload_lock.release()
+        if self._recheck:
+            self.check()
+
+    def extend(self, ids, records):
+        """
+        Append ``records``, just written to the log with ``ids``, to the
+        snapshot without reading the log, e.g. from the ``on_commit`` of
+        a GroupCommitWriter. If they don't follow the snapshot (another
+        process wrote to the log too), check the log instead.
+
+        A running reload doesn't block it: the snapshot which is replaced
+        first wins and the other one is rebuilt on top of it.
+        """
+        ids = list(ids)
+        while self._end is not None:
+            snapshot = self.snapshot
+            first = len(snapshot) + 1
+            if ids and ids[-1] < first:
+                return  # a reload already read them from the log
+            if ids != list(range(first, first + len(ids))):
+                break
+            new = Snapshot(snapshot + freeze(list(records)), self.indexes,
+                           snapshot, appended=True)
+            with self._swap_lock:
+                if self.snapshot is snapshot:
+                    self.snapshot = new
+                    return
+        self.check()
+
+
+def load(names, directory='', interval=RELOAD_INTERVAL, indexes=None):
+    """
+    Load ``<name>.jsonl`` (a gitdata.storage log) or ``<name>.json`` for
+    each name; ``interval=None`` disables the reloading. ``indexes`` maps
+    index names to factories of empty indexes, see Snapshot.
+    """
     for name in names:
-        with open(name + '.json') as f:
-            data = f.read().strip()
-            globals()[name] = json.loads(data)
+        path = os.path.join(directory, name + '.jsonl')
+        if not os.path.exists(path):
+            path = path[:-1]
+        _collections[name] = Collection(path, interval, indexes)
+
+
+def check(name):
+    """Check ``name`` for changes now, regardless of the interval."""
+    _collections[name].check()
+
+
+def extend(name, ids, records):
+    """Append records just written to the ``name`` log, see Collection."""
+    _collections[name].extend(ids, records)
+
+
+def get(name):
+    return _collections[name].get()
+
+
+def __getattr__(name):
+    try:
+        collection = _collections[name]
+    except KeyError:
+        raise AttributeError(
+            "module %r has no attribute %r" % (__name__, name))
+    return collection.get()
@@ -0,0 +1,150 @@
+"""
+In-memory inverted index for full-text search over record fields.
+
+Each word of the indexed fields maps to the ids of the records holding
+it (with the number of occurrences). Records are added one by one, the
+index is never rebuilt for an append. A query is a list of words, all of
+which must match (AND); ``word*`` matches every word starting with
+``word``. Results are the ``limit`` best records, ranked by the number
+of occurrences of the query words and then newest first.
+"""
+import bisect
+import heapq
+import re
+import threading
+from collections import Counter
+
+__author__ = 'pahaz'
+
+WORD_RE = re.compile(r'\w+')
+QUERY_RE = re.compile(r'(\w+)(\*?)')
+
+
+def tokenize(text):
+    """
+    >>> tokenize('Hello, World! hello')
+    ['hello', 'world', 'hello']
+    """
+    return WORD_RE.findall(text.lower())
+
+
+def parse_query(query):
+    """
+    >>> parse_query('Hello wor*')
+    [('hello', False), ('wor', True)]
+    """
+    return [(word, bool(star))
+            for word, star in QUERY_RE.findall(query.lower())]
+
+
+class InvertedIndex(object):
+    """
+    >>> index = InvertedIndex(['name', 'message'])
+    >>> index.add(1, {'name': 'pahaz', 'message': 'hello world'})
+    >>> index.add(2, {'name': 'admin', 'message': 'Hello, hello!'})
+    >>> index.add(3, {'name': 'pahaz', 'message': 'bye'})
+    >>> index.search('hello')
+    [2, 1]
+    >>> index.search('pahaz hel*')
+    [1]
+    >>> index.search('pa*')
+    [3, 1]
+    >>> index.search('pa*', max_id=2)
+    [1]
+    """
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self._postings = {}  # word -> {id: occurrences}
+        # the vocabulary, sorted when a prefix query needs it
+        self._words = []  # sorted
+        self._new_words = set()  # not in _words yet
+        self._documents = {}  # id -> words, for remove()
+        # writes happen in a reload thread while requests search
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def fork(self):
+        """
+        Return the index to extend with appended records: this one, it
+        is updated in place (searches of older snapshots pass their
+        ``max_id``).
+        """
+        return self
+
+    def add(self, id, record):
+        counts = Counter()
+        for field in self.fields:
+            value = record.get(field)
+            if isinstance(value, str):
+                counts.update(tokenize(value))
+        with self._lock:
+            if id in self._documents:
+                self._remove(id)
+            for word, count in counts.items():
+                postings = self._postings.get(word)
+                if postings is None:
+                    postings = self._postings[word] = {}
+                    self._new_words.add(word)
+                postings[id] = count
+            self._documents[id] = tuple(counts)
+
+    def add_many(self, items):
+        """Add ``(id, record)`` pairs."""
+        for id, record in items:
+            self.add(id, record)
+
+    def remove(self, id):
+        with self._lock:
+            self._remove(id)
+
+    def _remove(self, id):
+        for word in self._documents.pop(id):
+            postings = self._postings[word]
+            del postings[id]
+            if not postings:
+                del self._postings[word]
+                if word in self._new_words:
+                    self._new_words.remove(word)
+                else:
+                    del self._words[bisect.bisect_left(self._words, word)]
+
+    def _sorted_words(self):
+        if self._new_words:
+            # one sorted run and a sorted tail: merged in linear time
+            self._words.extend(sorted(self._new_words))
+            self._words.sort()
+            self._new_words.clear()
+        return self._words
+
+    def _match(self, word, prefix):
+        if not prefix:
+            return self._postings.get(word, {})
+        words = self._sorted_words()
+        matched = {}
+        for i in range(bisect.bisect_left(words, word), len(words)):
+            if not words[i].startswith(word):
+                break
+            for id, count in self._postings[words[i]].items():
+                matched[id] = matched.get(id, 0) + count
+        return matched
+
+    def search(self, query, limit=10, max_id=None):
+        """Return the ids of the best ``limit`` matches of ``query``."""
+        terms = parse_query(query)
+        if not terms:
+            return []
+        with self._lock:
+            postings = sorted((self._match(word, prefix)
+                               for word, prefix in terms), key=len)
+            # intersect starting from the rarest word
+            ids = set(postings[0])
+            for other in postings[1:]:
+                if not ids:
+                    break
+                ids.intersection_update(other)
+            if max_id is not None:
+                ids = [id for id in ids if id <= max_id]
+            return heapq.nlargest(limit, ids, key=lambda id: (
+                sum(p[id] for p in postings), id))
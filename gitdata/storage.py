@@ -0,0 +1,282 @@
+"""
+Append-only storage engine.
+
+Each collection is a JSON-lines log ``<name>.jsonl``. Every write appends
+one line, ``{"id": 1, "data": {...}}`` for a put and
+``{"id": 1, "deleted": true}`` for a delete, so adding a record never
+rewrites the file. An in-memory primary index maps ids to the offset and
+length of their latest line; records are read back on demand. Superseded
+lines are dropped by compaction, which runs when they make up more than
+``compact_ratio`` of the log.
+
+Several processes (e.g. prefork workers) may write to one log: a write
+holds an exclusive ``flock`` of the log and first indexes the lines the
+other processes appended, so ids are never handed out twice. Reads see
+those lines after the next write or ``refresh()``.
+"""
+import fcntl
+import json
+import os
+import threading
+
+__author__ = 'pahaz'
+
+
+class StorageError(Exception):
+    pass
+
+
+def _encode(entry):
+    return (json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+            + '\n').encode('utf-8')
+
+
+class Collection(object):
+    def __init__(self, path, compact_ratio=0.5, compact_min_lines=1000):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min_lines = compact_min_lines
+        self._lock = threading.RLock()
+        self._index = {}  # id -> (offset, length)
+        self._next_id = 1
+        self._lines = 0
+        self._file = None
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, 'a+b')
+        self._pid = os.getpid()
+        self._index = {}
+        self._lines = 0
+        self._next_id = 1
+        self._end = 0  # the log is indexed up to this offset
+        self._lock_file()
+        self._unlock_file()
+
+    def _lock_file(self):
+        """
+        Take the exclusive lock of the log and index the lines other
+        processes appended since the last time.
+        """
+        if self._pid != os.getpid():
+            # a forked child shares the open file, and its lock, with
+            # the parent: reopen it
+            self._file.close()
+            self._open()
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        while os.fstat(self._file.fileno()).st_ino != \
+                os.stat(self.path).st_ino:
+            # compacted by another process
+            self._file.close()
+            self._open()
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        self._file.seek(self._end)
+        offset = self._end
+        for line in self._file:
+            if not line.endswith(b'\n'):
+                # torn write of a crashed writer, drop it
+                self._file.truncate(offset)
+                break
+            try:
+                entry = json.loads(line.decode('utf-8'))
+                record_id = entry['id']
+            except (ValueError, KeyError, TypeError):
+                raise StorageError('Corrupted log line at %s:%d'
+                                   % (self.path, offset))
+            if entry.get('deleted'):
+                self._index.pop(record_id, None)
+            else:
+                self._index[record_id] = (offset, len(line))
+            self._next_id = max(self._next_id, record_id + 1)
+            self._lines += 1
+            offset += len(line)
+        self._end = offset
+
+    def _unlock_file(self):
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, record_id):
+        return record_id in self._index
+
+    def _read_entry(self, offset, length):
+        line = os.pread(self._file.fileno(), length, offset)
+        return json.loads(line.decode('utf-8'))
+
+    def get(self, record_id):
+        """Return the record with ``record_id``, raise KeyError if none."""
+        with self._lock:
+            offset, length = self._index[record_id]
+            return self._read_entry(offset, length)['data']
+
+    def _write(self, entries):
+        # the file lock is held, the log ends at self._end
+        lines = [_encode(entry) for entry in entries]
+        offset = self._end
+        self._file.write(b''.join(lines))
+        self._file.flush()
+        for entry, line in zip(entries, lines):
+            length = len(line)
+            if entry.get('deleted'):
+                self._index.pop(entry['id'], None)
+            else:
+                self._index[entry['id']] = (offset, length)
+            offset += length
+        self._lines += len(entries)
+        self._end = offset
+
+    def refresh(self):
+        """Index the records other processes appended."""
+        with self._lock:
+            self._lock_file()
+            self._unlock_file()
+
+    def append_many(self, records):
+        """
+        Append records with one write, return their ids. The data is
+        flushed to the OS; call ``sync()`` to make it durable.
+        """
+        with self._lock:
+            self._lock_file()
+            try:
+                entries = []
+                for record in records:
+                    entries.append({'id': self._next_id, 'data': record})
+                    self._next_id += 1
+                self._write(entries)
+            finally:
+                self._unlock_file()
+            return [entry['id'] for entry in entries]
+
+    def append(self, record):
+        return self.append_many([record])[0]
+
+    def put(self, record_id, record):
+        with self._lock:
+            self._lock_file()
+            try:
+                self._write([{'id': record_id, 'data': record}])
+                self._next_id = max(self._next_id, record_id + 1)
+            finally:
+                self._unlock_file()
+            self.maybe_compact()
+
+    def delete(self, record_id):
+        with self._lock:
+            self._lock_file()
+            try:
+                if record_id not in self._index:
+                    raise KeyError(record_id)
+                self._write([{'id': record_id, 'deleted': True}])
+            finally:
+                self._unlock_file()
+            self.maybe_compact()
+
+    def sync(self):
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def scan(self, start=None):
+        """
+        Iterate over ``(id, record)`` pairs in log order, reading the log
+        sequentially. Records written after the scan started are skipped.
+        With ``start``, only ids ``>= start`` are returned.
+        """
+        with self._lock:
+            index = dict(self._index)
+            end = self._end
+            path = self.path
+            reader = open(path, 'rb')
+        with reader:
+            offset = 0
+            for line in reader:
+                if offset >= end:
+                    break
+                length = len(line)
+                entry = json.loads(line.decode('utf-8'))
+                record_id = entry['id']
+                if index.get(record_id) == (offset, length) and \
+                        (start is None or record_id >= start):
+                    yield record_id, entry['data']
+                offset += length
+
+    def maybe_compact(self):
+        dead = self._lines - len(self._index)
+        if self._lines >= self.compact_min_lines and \
+                dead > self._lines * self.compact_ratio:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log with live records only."""
+        with self._lock:
+            self._lock_file()
+            tmp_path = self.path + '.compact'
+            try:
+                with open(tmp_path, 'wb') as tmp:
+                    for record_id, record in self.scan():
+                        tmp.write(_encode({'id': record_id, 'data': record}))
+                    tmp.flush()
+                    os.fsync(tmp.fileno())
+                os.replace(tmp_path, self.path)
+            finally:
+                # other processes see the log was replaced and reopen it
+                self._unlock_file()
+            # ids of deleted records at the end of the log are not reused
+            next_id = self._next_id
+            self._file.close()
+            self._open()
+            self._next_id = max(self._next_id, next_id)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Storage(object):
+    """
+    A directory of collections. A collection without a log is imported
+    from ``<name>.json`` (a JSON list) on first open.
+    """
+    def __init__(self, directory='.'):
+        self.directory = directory
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = self._open(name)
+            return self._collections[name]
+
+    __getitem__ = collection
+
+    def _open(self, name):
+        path = os.path.join(self.directory, name + '.jsonl')
+        legacy_path = os.path.join(self.directory, name + '.json')
+        if not os.path.exists(path) and os.path.exists(legacy_path):
+            with open(legacy_path) as f:
+                records = json.loads(f.read().strip() or '[]')
+            # a crash during the import must not leave a partial log,
+            # which would be taken for the complete collection
+            tmp_path = '%s.%d.import' % (path, os.getpid())
+            try:
+                with open(tmp_path, 'wb') as tmp:
+                    for record_id, record in enumerate(records, 1):
+                        tmp.write(_encode({'id': record_id, 'data': record}))
+                    tmp.flush()
+                    os.fsync(tmp.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        return Collection(path)
+
+    def close(self):
+        with self._lock:
+            for collection in self._collections.values():
+                collection.close()
+            self._collections.clear()
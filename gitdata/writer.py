@@ -0,0 +1,139 @@
+"""
+Group commit: a write-behind queue in front of a storage collection.
+
+Request threads submit records; one writer thread appends everything
+that queued up while the previous batch was being written with a single
+``append_many`` and, depending on ``fsync``, a single fsync:
+
+- ``'batch'``: fsync every batch, a submission returns once it is on
+  disk;
+- ``'interval'``: fsync at most every ``interval`` seconds, a submission
+  returns once it is written to the OS (a crash may lose the last
+  ``interval`` seconds);
+- ``'none'``: never fsync, leave it to the OS.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+__author__ = 'pahaz'
+logger = logging.getLogger(__name__)
+
+FSYNC_MODES = ('batch', 'interval', 'none')
+
+
+class WriterClosed(Exception):
+    pass
+
+
+class GroupCommitWriter(object):
+    def __init__(self, collection, fsync='batch', interval=1.0,
+                 max_batch=1024, on_commit=None):
+        if fsync not in FSYNC_MODES:
+            raise ValueError('fsync must be one of %s, not %r'
+                             % (', '.join(FSYNC_MODES), fsync))
+        self.collection = collection
+        self.fsync = fsync
+        self.interval = interval
+        self.max_batch = max_batch
+        # called with the ids and the records of each committed batch,
+        # before append() returns them
+        self.on_commit = on_commit
+        self.batches = 0
+        self._pending = []  # (record, future)
+        self._cond = threading.Condition()
+        self._closed = False
+        self._dirty = False
+        self._synced_at = time.monotonic()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # started lazily: threads don't survive a fork of a preloaded app
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, daemon=True, name='gitdata-writer')
+            self._thread.start()
+
+    def submit(self, record):
+        """Queue ``record``, return a Future of its id."""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise WriterClosed('the writer is closed')
+            self._ensure_thread()
+            self._pending.append((record, future))
+            self._cond.notify()
+        return future
+
+    def append(self, record, timeout=None):
+        """Append ``record`` and return its id once its batch is committed."""
+        return self.submit(record).result(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    timeout = None
+                    if self._dirty:
+                        # wake up for the interval fsync
+                        timeout = max(0, self._synced_at + self.interval -
+                                      time.monotonic())
+                        if timeout == 0:
+                            break
+                    self._cond.wait(timeout)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                closing = self._closed and not self._pending
+            if batch:
+                self._commit(batch)
+            elif self._dirty:
+                self._sync()
+            if closing:
+                if self._dirty:
+                    self._sync()
+                return
+
+    def _commit(self, batch):
+        try:
+            ids = self.collection.append_many([r for r, _ in batch])
+            if self.fsync == 'batch':
+                self.collection.sync()
+            elif self.fsync == 'interval':
+                self._dirty = True
+                if time.monotonic() - self._synced_at >= self.interval:
+                    self._sync()
+        except Exception as e:
+            logger.exception('Group commit of %d records failed', len(batch))
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        # publish before answering: a submitter may read its record next
+        if self.on_commit is not None:
+            try:
+                self.on_commit(ids, [r for r, _ in batch])
+            except Exception:
+                logger.exception('on_commit callback failed')
+        for (_, future), record_id in zip(batch, ids):
+            future.set_result(record_id)
+
+    def _sync(self):
+        try:
+            self.collection.sync()
+        except Exception:
+            logger.exception('fsync failed')
+        self._dirty = False
+        self._synced_at = time.monotonic()
+
+    def close(self):
+        """Commit what is queued and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            thread.join()
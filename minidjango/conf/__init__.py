@@ -1,24 +1,245 @@
+"""
+Settings.
+
+``settings`` is built once, at import time, from the defaults below, the
+module named by the MINIDJANGO_SETTINGS_MODULE environment variable (its
+upper case names) and MINIDJANGO_<NAME> environment variables, in that
+order. Every setting is a plain instance attribute, so reading
+``settings.DEBUG`` costs one attribute lookup.
+
+Settings are frozen: attribute assignment raises. Change them with the
+mapping API (``settings['DEBUG'] = True``, ``mock.patch.dict``), with
+``settings.override(DEBUG=True)`` or with ``settings.reload()``. Each
+change notifies the subscribers (``settings.subscribe(callback)``) with
+the set of changed names, so structures derived from settings can be
+rebuilt once, instead of re-reading the settings on every request.
+
+A list, dict or set setting changed in place, like
+``settings.ROUTER['/'] = view``, is compared with a copy taken at the
+last change: it is noticed on the next change or ``settings.refresh()``.
+"""
+import copy
+import contextlib
+import importlib
+import json
+import logging
+import os
+import weakref
 
 __author__ = 'pahaz'
+logger = logging.getLogger(__name__)
+
+ENVIRONMENT_VARIABLE = 'MINIDJANGO_SETTINGS_MODULE'
+ENVIRONMENT_PREFIX = 'MINIDJANGO_'
+
 _default = dict(
     DEBUG=False,
     MIDDLEWARE_CLASSES=[],
     DEFAULT_CONTENT_TYPE='text/html',
     DEFAULT_CHARSET='utf-8',
     PROPAGATE_EXCEPTIONS=True,
+    USE_X_FORWARDED_PORT=False,
+    SECURE_PROXY_SSL_HEADER=None,
     ROUTER={},
+    TEMPLATE_DIRS=[],
+    TEMPLATE_CACHE_SIZE=256,
+    TEMPLATE_CHECK_INTERVAL=2,
+    ASYNC_THREAD_POOL_SIZE=16,
+    FILE_UPLOAD_MAX_MEMORY_SIZE=2621440,  # 2.5 MB
+    DATA_UPLOAD_MAX_MEMORY_SIZE=2621440,  # 2.5 MB
+    CACHE_MIDDLEWARE_SECONDS=600,
+    CACHE_MIDDLEWARE_MAX_BYTES=64 * 1024 * 1024,
+    METRICS_URL=None,  # e.g. '/metrics', enables request timings
 )
 
 
+def parse_env_value(value, default=None):
+    """
+    Convert an environment variable to the type of the default value;
+    other values are read as JSON if they can be.
+
+    >>> parse_env_value('yes', False), parse_env_value('8', 16)
+    (True, 8)
+    >>> parse_env_value('["a.B"]'), parse_env_value('/metrics')
+    (['a.B'], '/metrics')
+    """
+    if isinstance(default, bool):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, int):
+        return int(value)
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def load_module(name):
+    """Return the upper case names of the module ``name`` as a dict."""
+    module = importlib.import_module(name)
+    return {key: getattr(module, key) for key in dir(module)
+            if key.isupper()}
+
+
+def load_environ(environ=None, prefix=ENVIRONMENT_PREFIX):
+    """
+    >>> load_environ({'MINIDJANGO_DEBUG': 'true', 'HOME': '/root'})
+    {'DEBUG': True}
+    """
+    if environ is None:
+        environ = os.environ
+    values = {}
+    for key, value in environ.items():
+        if not key.startswith(prefix) or key == ENVIRONMENT_VARIABLE:
+            continue
+        name = key[len(prefix):]
+        values[name] = parse_env_value(value, _default.get(name))
+    return values
+
+
 class Settings(dict):
+    """
+    The items of the dict are the explicit overrides; the attributes are
+    the frozen snapshot of all settings, rebuilt whenever an override
+    changes.
+    """
+    def __init__(self, *args, **kwargs):
+        super(Settings, self).__init__(*args, **kwargs)
+        object.__setattr__(self, '_subscribers', [])
+        object.__setattr__(self, '_configured', {})
+        # the values of the snapshot, as they were when it was built
+        object.__setattr__(self, '_saved', {})
+        self._load()
+        self._refresh()
+
     def __getattr__(self, item):
-        try:
-            return self[item]
-        except KeyError:
+        # only reached for names which are not in the snapshot
+        raise AttributeError('Setting "{}" is not set'.format(item))
+
+    def __setattr__(self, key, value):
+        raise AttributeError(
+            'Settings are frozen, use settings.override() or '
+            'settings[{!r}] = ...'.format(key))
+
+    __delattr__ = __setattr__
+
+    def _load(self):
+        configured = {}
+        module = os.environ.get(ENVIRONMENT_VARIABLE)
+        if module:
+            configured.update(load_module(module))
+        configured.update(load_environ())
+        object.__setattr__(self, '_configured', configured)
+
+    def _refresh(self):
+        snapshot = dict(_default)
+        snapshot.update(self._configured)
+        snapshot.update(self)
+        old = self._saved
+        changed = {key for key in set(old) | set(snapshot)
+                   if key not in old or key not in snapshot or
+                   old[key] != snapshot[key]}
+        for key in set(old) - set(snapshot):
+            del self.__dict__[key]
+        self.__dict__.update(snapshot)
+        object.__setattr__(self, '_saved', {
+            key: copy.copy(value)
+            if isinstance(value, (list, dict, set)) else value
+            for key, value in snapshot.items()})
+        if changed:
+            self._notify(changed)
+
+    def refresh(self):
+        """Notify the subscribers of the settings changed in place."""
+        self._refresh()
+
+    def _notify(self, changed):
+        for ref in list(self._subscribers):
+            callback = ref()
+            if callback is None:
+                self._subscribers.remove(ref)
+                continue
             try:
-                return _default[item]
-            except KeyError:
-                raise AttributeError('Setting "{}" is not set'.format(item))
+                callback(self, changed)
+            except Exception:
+                logger.exception('Settings subscriber %r failed', callback)
+
+    def subscribe(self, callback):
+        """
+        Call ``callback(settings, changed_names)`` after every change.
+        Only a weak reference to the callback is kept.
+        """
+        if hasattr(callback, '__self__'):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = weakref.ref(callback)
+        self._subscribers.append(ref)
+        return callback
+
+    def unsubscribe(self, callback):
+        self._subscribers[:] = [
+            ref for ref in self._subscribers if ref() not in (None, callback)]
+
+    def reload(self):
+        """Re-read the settings module and the environment."""
+        module = os.environ.get(ENVIRONMENT_VARIABLE)
+        if module:
+            importlib.reload(importlib.import_module(module))
+        self._load()
+        self._refresh()
+
+    @contextlib.contextmanager
+    def override(self, **values):
+        """
+        >>> with settings.override(DEBUG=True):
+        ...     settings.DEBUG
+        True
+        >>> settings.DEBUG
+        False
+        """
+        saved = {key: self[key] for key in values if key in self}
+        self.update(values)
+        try:
+            yield self
+        finally:
+            for key in values:
+                if key in saved:
+                    dict.__setitem__(self, key, saved[key])
+                else:
+                    dict.pop(self, key, None)
+            self._refresh()
+
+    # the mapping API changes the overrides
+
+    def __setitem__(self, key, value):
+        super(Settings, self).__setitem__(key, value)
+        self._refresh()
+
+    def __delitem__(self, key):
+        super(Settings, self).__delitem__(key)
+        self._refresh()
+
+    def update(self, *args, **kwargs):
+        super(Settings, self).update(*args, **kwargs)
+        self._refresh()
+
+    def clear(self):
+        super(Settings, self).clear()
+        self._refresh()
+
+    def pop(self, *args):
+        value = super(Settings, self).pop(*args)
+        self._refresh()
+        return value
+
+    def popitem(self):
+        item = super(Settings, self).popitem()
+        self._refresh()
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
 
 
 settings = Settings()
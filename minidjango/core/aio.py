@@ -0,0 +1,7 @@
+import minidjango
+from minidjango.core.handlers.aio import AsyncHandler
+
+
+def get_async_application():
+    minidjango.setup()
+    return AsyncHandler()
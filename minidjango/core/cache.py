@@ -0,0 +1,75 @@
+import collections
+import threading
+import time
+
+__author__ = 'pahaz'
+
+
+class LocMemCache(object):
+    """
+    Thread-safe in-process LRU cache bounded by the total size of the
+    stored values (the ``size`` passed to ``set()``), with per-entry TTL.
+
+    >>> cache = LocMemCache(max_bytes=10)
+    >>> cache.set('a', 'aaaa', size=4)
+    True
+    >>> cache.set('b', 'bbbb', size=4)
+    True
+    >>> cache.get('a')
+    'aaaa'
+    >>> cache.set('c', 'cccc', size=4)  # evicts 'b', 'a' was used recently
+    True
+    >>> cache.get('b') is None, cache.get('a'), cache.size
+    (True, 'aaaa', 8)
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, default_timeout=300):
+        self.max_bytes = max_bytes
+        self.default_timeout = default_timeout
+        self.size = 0
+        self._data = collections.OrderedDict()  # key -> (expires, size, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, _, value = entry
+            if expires is not None and expires <= time.monotonic():
+                self._delete(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None, size=1):
+        """Store ``value``; return False if it can never fit."""
+        if size > self.max_bytes:
+            return False
+        if timeout is None:
+            timeout = self.default_timeout
+        expires = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._delete(key)
+            self._data[key] = (expires, size, value)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self._data.popitem(last=False)
+                self.size -= evicted_size
+        return True
+
+    def _delete(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def delete(self, key):
+        with self._lock:
+            self._delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._data)
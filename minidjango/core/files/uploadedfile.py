@@ -0,0 +1,55 @@
+import tempfile
+
+__author__ = 'pahaz'
+
+
+class UploadedFile(object):
+    """
+    A file uploaded with a multipart/form-data request. The content is
+    kept in memory up to ``max_memory_size`` bytes and spills to a
+    temporary file on disk above that.
+    """
+    DEFAULT_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, name, content_type=None, charset=None,
+                 max_memory_size=2621440):
+        self.name = name
+        self.content_type = content_type
+        self.charset = charset
+        self.size = 0
+        self.max_memory_size = max_memory_size
+        self.file = tempfile.SpooledTemporaryFile(
+            max_size=max_memory_size, prefix='minidjango-upload-')
+
+    @property
+    def in_memory(self):
+        return self.size <= self.max_memory_size
+
+    def write(self, data):
+        self.file.write(data)
+        self.size += len(data)
+
+    def read(self, *args):
+        return self.file.read(*args)
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def tell(self):
+        return self.file.tell()
+
+    def chunks(self, chunk_size=None):
+        chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.file.seek(0)
+        while True:
+            data = self.file.read(chunk_size)
+            if not data:
+                break
+            yield data
+
+    def close(self):
+        self.file.close()
+
+    def __repr__(self):
+        return '<%s: %s (%s)>' % (
+            self.__class__.__name__, self.name, self.content_type)
@@ -0,0 +1,182 @@
+from __future__ import unicode_literals
+
+import asyncio
+import functools
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from minidjango import http
+from minidjango.conf import settings
+from minidjango.core.handlers.base import BaseHandler
+from minidjango.http.request import HttpRequest
+
+logger = logging.getLogger('minidjango.request')
+
+
+def is_async_callable(func):
+    return asyncio.iscoroutinefunction(func) or \
+        asyncio.iscoroutinefunction(getattr(func, '__call__', None))
+
+
+class AsyncHandler(BaseHandler):
+    """
+    Asyncio counterpart of WSGIHandler. ``async def`` views and middleware
+    hooks are awaited in the event loop; sync views run in a bounded
+    thread pool (settings.ASYNC_THREAD_POOL_SIZE threads) so they never
+    block the loop. Sync middleware hooks are called directly, they are
+    expected to be cheap.
+    """
+    def __init__(self):
+        super(AsyncHandler, self).__init__()
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_THREAD_POOL_SIZE,
+                thread_name_prefix='minidjango-sync')
+        return self._executor
+
+    async def __call__(self, environ):
+        # Set up middleware if needed. The event loop is single threaded,
+        # so no lock is needed here.
+        if self._middleware is None:
+            try:
+                self.load_metrics()
+                self.load_router()
+                self.load_middleware()
+            except:
+                self._middleware = None
+                self._router = None
+                raise
+
+        metrics = self._metrics
+        if metrics is not None:
+            start = perf_counter()
+        request = None
+        try:
+            request = HttpRequest(environ)
+        except UnicodeDecodeError:
+            logger.warning('Bad Request (UnicodeDecodeError)',
+                exc_info=sys.exc_info(),
+                extra={
+                    'status_code': 400,
+                }
+            )
+            response = http.HttpResponseBadRequest()
+        else:
+            if metrics is not None:
+                request._timings = [('request', perf_counter() - start)]
+            response = await self.get_response_async(request)
+
+        response._handler_class = self.__class__
+
+        if metrics is not None:
+            headers_start = perf_counter()
+
+        # the server writes these as they are, so building them is timed
+        # here like in WSGIHandler
+        response._response_headers = response.response_headers()
+
+        if metrics is not None and request is not None:
+            end = perf_counter()
+            timings = request._timings
+            timings.append(('headers', end - headers_start))
+            timings.append(('total', end - start))
+            resolver_match = getattr(request, 'resolver_match', None)
+            metrics.record(getattr(resolver_match, 'route', None), timings)
+        return response
+
+    async def call_hook(self, hook, *args):
+        if is_async_callable(hook):
+            return await hook(*args)
+        return hook(*args)
+
+    async def call_view(self, callback, request, args, kwargs):
+        if is_async_callable(callback):
+            return await callback(request, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(callback, request, *args, **kwargs))
+
+    async def get_response_async(self, request):
+        "Returns an HttpResponse object for the given HttpRequest"
+
+        timings = getattr(request, '_timings', None)
+        chain = self._middleware
+        try:
+            response = None
+            for middleware_method in chain.request:
+                response = await self.call_hook(middleware_method, request)
+                if response:
+                    break
+
+            if response is None:
+                if timings is not None:
+                    start = perf_counter()
+                resolver_match = self.resolve(request.path_info)
+                callback, callback_args, callback_kwargs = resolver_match
+                request.resolver_match = resolver_match
+                if timings is not None:
+                    timings.append(('resolve', perf_counter() - start))
+
+                for middleware_method in chain.view:
+                    response = await self.call_hook(
+                        middleware_method, request, callback, callback_args,
+                        callback_kwargs)
+                    if response:
+                        break
+
+            if response is None:
+                try:
+                    response = await self.call_view(
+                        callback, request, callback_args, callback_kwargs)
+                except Exception as e:
+                    response = await self.process_exception_by_middleware_async(
+                        e, request, chain)
+
+            if response is None:
+                self.check_response(response, callback)
+
+            if hasattr(response, 'render') and callable(response.render):
+                if timings is not None:
+                    start = perf_counter()
+                try:
+                    response = response.render()
+                except Exception as e:
+                    response = await self.process_exception_by_middleware_async(
+                        e, request, chain)
+                if timings is not None:
+                    timings.append(('render', perf_counter() - start))
+
+        except SystemExit:
+            raise
+
+        except:  # Handle everything else.
+            response = self.response_for_exception(request, sys.exc_info()[1])
+
+        if response is not None:
+            for middleware_method in chain.response:
+                response = await self.call_hook(
+                    middleware_method, request, response)
+        return response
+
+    async def process_exception_by_middleware_async(self, exception, request,
+                                                    chain=None):
+        if chain is None:
+            chain = self._middleware
+        for middleware_method in chain.exception:
+            response = await self.call_hook(
+                middleware_method, request, exception)
+            if response:
+                return response
+        raise exception
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
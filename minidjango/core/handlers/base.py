@@ -1,56 +1,134 @@
 from __future__ import unicode_literals
+import collections
 import logging
 import sys
 import types
+from time import perf_counter
+
 from minidjango.conf import settings
+from minidjango.core import metrics
 from minidjango.core.exceptions import PermissionDenied
 from minidjango.http import Http404, HttpResponse
 from minidjango.http.request import RequestParseError
+from minidjango.urls import Resolver404, Router
 from minidjango.utils.module_loading import import_string
 
 logger = logging.getLogger('minidjango.request')
 
+# the middleware instances and their bound hooks of each phase, swapped
+# in as a whole so that a request never sees two different chains
+MiddlewareChain = collections.namedtuple(
+    'MiddlewareChain', 'instances request view response exception')
+
 
 class BaseHandler(object):
+    middleware_hooks = ('process_request', 'process_view',
+                        'process_response', 'process_exception')
+    # the router and the middleware chain are rebuilt when these change
+    reload_settings = frozenset(['ROUTER', 'MIDDLEWARE_CLASSES',
+                                 'METRICS_URL'])
+
     def __init__(self):
-        self._middleware = None
+        self._middleware = None  # a MiddlewareChain once loaded
+        self._router = None
+        self._metrics = None
+        settings.subscribe(self.settings_changed)
+
+    def settings_changed(self, settings, changed):
+        if self._middleware is None or not changed & self.reload_settings:
+            return
+        self.load_metrics()
+        self.load_router()
+        self.load_middleware()
+
+    def load_metrics(self):
+        """Enable per-phase timings if settings.METRICS_URL is set."""
+        self._metrics = metrics.registry if settings.METRICS_URL else None
 
     def load_middleware(self):
-        self._middleware = []
+        """
+        Compile settings.MIDDLEWARE_CLASSES into one list of bound hooks
+        per phase; a middleware is only in the phases it implements.
+        Request and view hooks run in settings order, response hooks in
+        reverse order, exception hooks in settings order.
+        """
+        # built aside and swapped in, requests may be running
+        middleware = []
+        phases = {hook: [] for hook in self.middleware_hooks}
 
         for middleware_path in settings.MIDDLEWARE_CLASSES:
             mw_class = import_string(middleware_path)
             mw_instance = mw_class()
-            self._middleware.append(mw_instance)
+            for hook in self.middleware_hooks:
+                method = getattr(mw_instance, hook, None)
+                if method is None:
+                    continue
+                if self._metrics is not None:
+                    method = metrics.timed(
+                        method, '%s.%s' % (mw_class.__name__, hook))
+                phases[hook].append(method)
+            middleware.append(mw_instance)
+
+        phases['process_response'].reverse()
+        self._middleware = MiddlewareChain(
+            tuple(middleware),
+            tuple(phases['process_request']),
+            tuple(phases['process_view']),
+            tuple(phases['process_response']),
+            tuple(phases['process_exception']))
+
+    def load_router(self):
+        """
+        Compile settings.ROUTER into a route tree. Routes may contain
+        typed parameters, like '/messages/<int:id>/'.
+        """
+        routes = settings.ROUTER
+        if self._metrics is not None:
+            routes = {route: metrics.timed(callback, 'view')
+                      for route, callback in routes.items()}
+            routes[settings.METRICS_URL] = metrics.metrics_view
+        self._router = Router(routes)
 
     def resolve(self, request_path):
-        # TODO: write code here
-        args = tuple()
-        kwargs = {}
-        from minidjango.conf import settings
+        if self._router is None:
+            self.load_router()
 
-        if request_path in settings.ROUTER:
-            return settings.ROUTER[request_path], args, kwargs
+        try:
+            return self._router.resolve(request_path)
+        except Resolver404:
+            pass
 
         def index(request):
             return HttpResponse(b'HI!')
 
-        return index, args, kwargs
+        return index, (), {}
 
     def get_response(self, request):
         "Returns an HttpResponse object for the given HttpRequest"
 
+        timings = getattr(request, '_timings', None)
+        chain = self._middleware
         try:
             response = None
-            for middleware in self._middleware:
-                response = middleware.process_request(request)
+            for middleware_method in chain.request:
+                response = middleware_method(request)
                 if response:
                     break
 
             if response is None:
+                if timings is not None:
+                    start = perf_counter()
                 resolver_match = self.resolve(request.path_info)
                 callback, callback_args, callback_kwargs = resolver_match
                 request.resolver_match = resolver_match
+                if timings is not None:
+                    timings.append(('resolve', perf_counter() - start))
+
+                for middleware_method in chain.view:
+                    response = middleware_method(
+                        request, callback, callback_args, callback_kwargs)
+                    if response:
+                        break
 
             if response is None:
                 try:
@@ -59,71 +137,92 @@ class BaseHandler(object):
                     )
                 except Exception as e:
                     response = self.process_exception_by_middleware(
-                        e, request
+                        e, request, chain
                     )
 
             if response is None:
-                if isinstance(callback, types.FunctionType):  # FBV
-                    view_name = callback.__name__
-                else:  # CBV
-                    view_name = callback.__class__.__name__ + '.__call__'
-                raise ValueError("The view %s.%s didn't return an HttpResponse"
-                                 " object. It returned None instead."
-                                 % (callback.__module__, view_name))
+                self.check_response(response, callback)
 
             # If the response supports deferred rendering, apply template
             # response middleware and then render the response
             if hasattr(response, 'render') and callable(response.render):
+                if timings is not None:
+                    start = perf_counter()
                 try:
                     response = response.render()
                 except Exception as e:
-                    response = self.process_exception_by_middleware(e, request)
+                    response = self.process_exception_by_middleware(
+                        e, request, chain)
+                if timings is not None:
+                    timings.append(('render', perf_counter() - start))
 
-                response_is_rendered = True
+        except SystemExit:
+            # Allow sys.exit() to actually exit. See tickets #1023 and #4701
+            raise
+
+        except:  # Handle everything else.
+            response = self.response_for_exception(request, sys.exc_info()[1])
 
-        except Http404 as exc:
+        return self.apply_response_middleware(request, response, chain)
+
+    def apply_response_middleware(self, request, response, chain=None):
+        if response is None:
+            return response
+        if chain is None:
+            chain = self._middleware
+        for middleware_method in chain.response:
+            response = middleware_method(request, response)
+        return response
+
+    def check_response(self, response, callback):
+        if response is None:
+            if isinstance(callback, types.FunctionType):  # FBV
+                view_name = callback.__name__
+            else:  # CBV
+                view_name = callback.__class__.__name__ + '.__call__'
+            raise ValueError("The view %s.%s didn't return an HttpResponse"
+                             " object. It returned None instead."
+                             % (callback.__module__, view_name))
+
+    def response_for_exception(self, request, exc):
+        if isinstance(exc, Http404):
             logger.warning('Not Found: %s', request.path,
                            extra={
                                'status_code': 404,
                                'request': request
                            })
-            response = self.get_exception_response(
+            return self.get_exception_response(
                 request, 404, exc)
 
-        except PermissionDenied as exc:
+        if isinstance(exc, PermissionDenied):
             logger.warning(
                 'Forbidden (Permission denied): %s', request.path,
                 extra={
                     'status_code': 403,
                     'request': request
                 })
-            response = self.get_exception_response(
+            return self.get_exception_response(
                 request, 403, exc)
 
-        except RequestParseError as exc:
+        if isinstance(exc, RequestParseError):
             logger.warning(
                 'Bad request (Unable to parse request body): %s', request.path,
                 extra={
                     'status_code': 400,
                     'request': request
                 })
-            response = self.get_exception_response(
+            return self.get_exception_response(
                 request, 400, exc)
 
-        except SystemExit:
-            # Allow sys.exit() to actually exit. See tickets #1023 and #4701
-            raise
-
-        except:  # Handle everything else.
-            # Get the exception info now, in case another exception is thrown later.
-            response = self.handle_uncaught_exception(
-                request, sys.exc_info())
-
-        return response
+        # Get the exception info now, in case another exception is thrown later.
+        return self.handle_uncaught_exception(request, sys.exc_info())
 
-    def process_exception_by_middleware(self, exception, request):
-        for middleware in self._middleware:
-            response = middleware.process_exception(request, exception)
+    def process_exception_by_middleware(self, exception, request,
+                                        chain=None):
+        if chain is None:
+            chain = self._middleware
+        for middleware_method in chain.exception:
+            response = middleware_method(request, exception)
             if response:
                 return response
         raise
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 import logging
 import sys
 from threading import Lock
+from time import perf_counter
 
 from minidjango import http
 from minidjango.core.handlers.base import BaseHandler
@@ -22,12 +23,19 @@ class WSGIHandler(BaseHandler):
                 try:
                     # Check that middleware is still uninitialized.
                     if self._middleware is None:
+                        self.load_metrics()
+                        self.load_router()
                         self.load_middleware()
                 except:
                     # Unload whatever middleware we got
                     self._middleware = None
+                    self._router = None
                     raise
 
+        metrics = self._metrics
+        if metrics is not None:
+            start = perf_counter()
+        request = None
         try:
             request = HttpRequest(environ)
         except UnicodeDecodeError:
@@ -39,17 +47,25 @@ class WSGIHandler(BaseHandler):
             )
             response = http.HttpResponseBadRequest()
         else:
+            if metrics is not None:
+                request._timings = [('request', perf_counter() - start)]
             response = self.get_response(request)
 
         response._handler_class = self.__class__
 
-        status = '%s %s' % (response.status_code, response.reason_phrase)
+        if metrics is not None:
+            headers_start = perf_counter()
 
-        response_headers = [(str(k), str(v)) for k, v in response.items()]
-        for c in response.cookies.values():
-            response_headers.append(
-                ('Set-Cookie', str(c.output(header='')))
-            )
+        status = response.status_line
+        response_headers = response.response_headers()
+
+        if metrics is not None and request is not None:
+            end = perf_counter()
+            timings = request._timings
+            timings.append(('headers', end - headers_start))
+            timings.append(('total', end - start))
+            resolver_match = getattr(request, 'resolver_match', None)
+            metrics.record(getattr(resolver_match, 'route', None), timings)
 
         start_response(status, response_headers)
 
@@ -0,0 +1,198 @@
+"""
+Per-route, per-phase request timing histograms.
+
+Enabled by setting METRICS_URL; the histograms are then served at that
+URL in the Prometheus text exposition format. Each thread accumulates
+observations into its own shard without locking; shards are merged when
+the metrics are scraped, and folded into the registry when their thread
+ends.
+
+The registry lives in process memory: under the prefork server every
+worker has its own and the metrics URL shows the worker that answered.
+Label the targets per worker (e.g. with ``reuse_port`` and one port per
+worker) or aggregate them in Prometheus.
+
+Phases: ``request`` (HttpRequest construction), ``<Middleware>.<hook>``
+for each middleware hook, ``resolve``, ``view``, ``render`` (deferred
+response rendering), ``headers`` (status line and header serialization)
+and ``total``. The body of a streaming response is produced while the
+server iterates it and is not part of these timings.
+"""
+import asyncio
+import bisect
+import functools
+import threading
+import time
+import weakref
+
+__author__ = 'pahaz'
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+METRIC_NAME = 'minidjango_request_phase_seconds'
+UNRESOLVED_ROUTE = '<unresolved>'
+
+
+class Histogram(object):
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class _ShardOwner(object):
+    """Kept in thread-local storage, collected when its thread ends."""
+    __slots__ = ('__weakref__',)
+
+
+def _merge(merged, shard, size):
+    for key, histogram in shard.items():
+        total = merged.get(key)
+        if total is None:
+            total = merged[key] = Histogram(size)
+        for i, count in enumerate(histogram.counts):
+            total.counts[i] += count
+        total.sum += histogram.sum
+        total.count += histogram.count
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+class Registry(object):
+    """
+    >>> registry = Registry(buckets=(0.1, 1.0))
+    >>> registry.observe('/', 'view', 0.05)
+    >>> registry.observe('/', 'view', 0.5)
+    >>> print(registry.render())  # doctest: +NORMALIZE_WHITESPACE
+    # HELP minidjango_request_phase_seconds Time spent in each request phase.
+    # TYPE minidjango_request_phase_seconds histogram
+    minidjango_request_phase_seconds_bucket{route="/",phase="view",le="0.1"} 1
+    minidjango_request_phase_seconds_bucket{route="/",phase="view",le="1.0"} 2
+    minidjango_request_phase_seconds_bucket{route="/",phase="view",le="+Inf"} 2
+    minidjango_request_phase_seconds_sum{route="/",phase="view"} 0.55
+    minidjango_request_phase_seconds_count{route="/",phase="view"} 2
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = {}  # id -> shard of a live thread
+        self._retired = {}  # merged shards of finished threads
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            owner = self._local.owner = _ShardOwner()
+            weakref.finalize(owner, self._retire, shard)
+            with self._lock:
+                self._shards[id(shard)] = shard
+            return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            if self._shards.pop(id(shard), None) is not None:
+                _merge(self._retired, shard, len(self.buckets) + 1)
+
+    def observe(self, route, phase, seconds):
+        shard = self._shard()
+        key = (route, phase)
+        histogram = shard.get(key)
+        if histogram is None:
+            histogram = shard[key] = Histogram(len(self.buckets) + 1)
+        histogram.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        histogram.sum += seconds
+        histogram.count += 1
+
+    def record(self, route, timings):
+        """Record a request's ``[(phase, seconds), ...]`` timings."""
+        if route is None:
+            route = UNRESOLVED_ROUTE
+        for phase, seconds in timings:
+            self.observe(route, phase, seconds)
+
+    def collect(self):
+        """Merge the per-thread shards into ``{(route, phase): Histogram}``."""
+        size = len(self.buckets) + 1
+        merged = {}
+        with self._lock:
+            _merge(merged, self._retired, size)
+            shards = list(self._shards.values())
+        for shard in shards:
+            # dict.copy() is atomic, the owner thread may be writing
+            _merge(merged, shard.copy(), size)
+        return merged
+
+    def render(self):
+        lines = [
+            '# HELP %s Time spent in each request phase.' % METRIC_NAME,
+            '# TYPE %s histogram' % METRIC_NAME,
+        ]
+        bounds = [repr(float(b)) for b in self.buckets] + ['+Inf']
+        for (route, phase), histogram in sorted(self.collect().items()):
+            labels = 'route="%s",phase="%s"' % (_escape(route), _escape(phase))
+            cumulative = 0
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                lines.append('%s_bucket{%s,le="%s"} %d'
+                             % (METRIC_NAME, labels, bound, cumulative))
+            lines.append('%s_sum{%s} %r'
+                         % (METRIC_NAME, labels, round(histogram.sum, 9)))
+            lines.append('%s_count{%s} %d'
+                         % (METRIC_NAME, labels, histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._retired.clear()
+            for shard in self._shards.values():
+                shard.clear()
+
+
+registry = Registry()
+
+
+def timed(func, phase):
+    """
+    Wrap a view or middleware hook (``request`` is the first argument)
+    to append ``(phase, seconds)`` to ``request._timings``.
+    """
+    perf_counter = time.perf_counter
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def inner(request, *args, **kwargs):
+            start = perf_counter()
+            try:
+                return await func(request, *args, **kwargs)
+            finally:
+                timings = getattr(request, '_timings', None)
+                if timings is not None:
+                    timings.append((phase, perf_counter() - start))
+    else:
+        @functools.wraps(func)
+        def inner(request, *args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(request, *args, **kwargs)
+            finally:
+                timings = getattr(request, '_timings', None)
+                if timings is not None:
+                    timings.append((phase, perf_counter() - start))
+    return inner
+
+
+def metrics_view(request):
+    from minidjango.http import HttpResponse
+
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
@@ -0,0 +1,202 @@
+"""
+Minimal asyncio HTTP/1.1 front end for AsyncHandler.
+
+Supports keep-alive and Content-Length request bodies of at most
+``max_body_size`` bytes. Requests are translated into a WSGI-style
+environ, so views get the usual HttpRequest. Streaming responses are
+sent with ``Connection: close``; they are iterated in the handler's
+thread pool, so a slow generator never blocks the event loop.
+"""
+import asyncio
+import io
+import logging
+import sys
+from urllib.parse import unquote
+
+__author__ = 'pahaz'
+logger = logging.getLogger('minidjango.server')
+
+MAX_HEADERS = 100
+MAX_BODY_SIZE = 10 * 1024 * 1024  # 10 MB
+
+
+class BadRequest(Exception):
+    pass
+
+
+class RequestEntityTooLarge(BadRequest):
+    pass
+
+
+class AsyncHTTPServer(object):
+    server_software = 'minidjango-aio/0.1'
+
+    def __init__(self, handler, host='', port=8000,
+                 max_body_size=MAX_BODY_SIZE):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.max_body_size = max_body_size
+
+    async def read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, version = \
+                request_line.decode('latin-1').rstrip('\r\n').split(' ')
+        except ValueError:
+            raise BadRequest(request_line)
+
+        headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise BadRequest('Too many headers')
+            name, sep, value = line.decode('latin-1').partition(':')
+            if not sep:
+                raise BadRequest(line)
+            headers.append((name.strip(), value.strip()))
+        return method, target, version, headers
+
+    def get_environ(self, method, target, version, headers, body, peer):
+        path, _, query = target.partition('?')
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote(path, 'latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_NAME': self.host or 'localhost',
+            'SERVER_PORT': str(self.port),
+            'SERVER_PROTOCOL': version,
+            'SERVER_SOFTWARE': self.server_software,
+            'REMOTE_ADDR': peer[0] if peer else '',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in headers:
+            key = name.upper().replace('-', '_')
+            if key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[key] = value
+                continue
+            key = 'HTTP_' + key
+            if key in environ:
+                value = environ[key] + ',' + value
+            environ[key] = value
+        return environ
+
+    async def write_response(self, writer, response, keep_alive):
+        headers = getattr(response, '_response_headers', None)
+        if headers is None:
+            headers = response.response_headers()
+
+        streaming = response.streaming
+        if streaming:
+            keep_alive = False
+            body = None
+        else:
+            body = response.content
+            headers.append(('Content-Length', str(len(body))))
+        headers.append(('Connection', 'keep-alive' if keep_alive else 'close'))
+
+        head = ['HTTP/1.1 %s\r\n' % response.status_line]
+        head.extend('%s: %s\r\n' % header for header in headers)
+        head.append('\r\n')
+        writer.write(''.join(head).encode('latin-1'))
+
+        if streaming:
+            loop = asyncio.get_running_loop()
+            executor = getattr(self.handler, 'executor', None)
+            chunks = iter(response)
+            while True:
+                chunk = await loop.run_in_executor(
+                    executor, next, chunks, None)
+                if chunk is None:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        else:
+            writer.write(body)
+            await writer.drain()
+        return keep_alive
+
+    def write_error(self, writer, status_line):
+        writer.write(('HTTP/1.1 %s\r\nContent-Length: 0\r\n'
+                      'Connection: close\r\n\r\n' % status_line)
+                     .encode('latin-1'))
+
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                try:
+                    parsed = await self.read_request(reader)
+                    if parsed is None:
+                        break
+                    method, target, version, headers = parsed
+                    lower = {k.lower(): v for k, v in headers}
+                    if 'chunked' in lower.get('transfer-encoding', ''):
+                        raise BadRequest('Chunked request bodies '
+                                         'are not supported')
+                    length = int(lower.get('content-length') or 0)
+                    if length > self.max_body_size:
+                        raise RequestEntityTooLarge(length)
+                    body = await reader.readexactly(length) if length else b''
+                except RequestEntityTooLarge:
+                    self.write_error(writer, '413 Request Entity Too Large')
+                    break
+                except (BadRequest, ValueError, asyncio.LimitOverrunError,
+                        asyncio.IncompleteReadError):
+                    self.write_error(writer, '400 Bad Request')
+                    break
+
+                connection = lower.get('connection', '').lower()
+                if version == 'HTTP/1.1':
+                    keep_alive = connection != 'close'
+                else:
+                    keep_alive = connection == 'keep-alive'
+
+                environ = self.get_environ(
+                    method, target, version, headers, body, peer)
+                try:
+                    response = await self.handler(environ)
+                except Exception:
+                    logger.exception('Error handling %s %s', method, target)
+                    self.write_error(writer, '500 Internal Server Error')
+                    break
+                try:
+                    keep_alive = await self.write_response(
+                        writer, response, keep_alive)
+                finally:
+                    response.close()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        except Exception:
+            logger.exception('Error handling connection from %s', peer)
+        finally:
+            writer.close()
+
+    async def serve(self):
+        server = await asyncio.start_server(
+            self.handle_connection, self.host or None, self.port)
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            close = getattr(self.handler, 'close', None)
+            if close is not None:
+                close()
@@ -0,0 +1,214 @@
+"""
+Pre-fork multi-process WSGI server.
+
+The master process gets an already imported (preloaded) application,
+freezes the garbage collector so that the preloaded objects stay in
+copy-on-write shared pages, and forks workers. Workers accept on one
+listening socket inherited from the master or, with ``reuse_port``, on
+their own ``SO_REUSEPORT`` sockets.
+
+Signals (sent to the master):
+    SIGHUP           graceful restart: start new workers, stop old ones
+    SIGTERM, SIGINT  graceful shutdown
+    SIGTTIN/SIGTTOU  increment/decrement the number of workers
+"""
+import errno
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler
+
+__author__ = 'pahaz'
+logger = logging.getLogger('minidjango.server')
+
+
+class WorkerWSGIServer(WSGIServer):
+    """WSGIServer serving on an already bound and listening socket."""
+
+    def __init__(self, listener, handler_class=WSGIRequestHandler):
+        super(WorkerWSGIServer, self).__init__(
+            listener.getsockname()[:2], handler_class,
+            bind_and_activate=False)
+        self.socket.close()
+        self.socket = listener
+        # mimic HTTPServer.server_bind() without binding
+        host, port = listener.getsockname()[:2]
+        self.server_address = (host, port)
+        self.server_name = socket.getfqdn(host)
+        self.server_port = port
+        self.setup_environ()
+
+
+class PreforkServer(object):
+    def __init__(self, application, host='', port=8000, workers=None,
+                 reuse_port=False, backlog=1024, graceful_timeout=30,
+                 handler_class=WSGIRequestHandler):
+        self.application = application
+        self.address = (host, port)
+        self.workers = workers or os.cpu_count() or 1
+        self.reuse_port = reuse_port
+        self.backlog = backlog
+        self.graceful_timeout = graceful_timeout
+        self.handler_class = handler_class
+        self.listener = None
+        self.children = {}  # pid -> generation
+        self.generation = 0
+        self.alive = True
+        self._signals = []
+
+    # master
+
+    def create_listener(self):
+        return socket.create_server(
+            self.address, backlog=self.backlog,
+            reuse_port=self.reuse_port)
+
+    def run(self):
+        if self.reuse_port:
+            # fail early if the address is unusable, the workers bind their
+            # own sockets
+            self.create_listener().close()
+        else:
+            self.listener = self.create_listener()
+
+        # everything imported so far is shared with the workers;
+        # keep the gc from touching (and un-sharing) those pages
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT,
+                    signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(sig, self.handle_signal)
+        signal.signal(signal.SIGCHLD, lambda *args: None)
+
+        logger.info('Master %d listening on %s:%s with %d workers',
+                    os.getpid(), self.address[0], self.address[1],
+                    self.workers)
+        try:
+            self.manage_workers()
+            while self.alive:
+                self.process_signals()
+                self.reap_workers()
+                self.manage_workers()
+                time.sleep(0.5)
+        finally:
+            self.stop()
+            if self.listener is not None:
+                self.listener.close()
+
+    def handle_signal(self, signum, frame):
+        self._signals.append(signum)
+
+    def process_signals(self):
+        while self._signals:
+            signum = self._signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                self.alive = False
+            elif signum == signal.SIGHUP:
+                logger.info('Graceful restart of workers')
+                self.generation += 1
+            elif signum == signal.SIGTTIN:
+                self.workers += 1
+            elif signum == signal.SIGTTOU:
+                self.workers = max(1, self.workers - 1)
+
+    def reap_workers(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            if self.children.pop(pid, None) is not None and status:
+                logger.warning('Worker %d exited with status %d',
+                               pid, status)
+
+    def manage_workers(self):
+        current = [pid for pid, generation in self.children.items()
+                   if generation == self.generation]
+        for _ in range(self.workers - len(current)):
+            self.spawn_worker()
+        old = [pid for pid, generation in self.children.items()
+               if generation not in (self.generation, None)]
+        for pid in old + current[self.workers:]:
+            # generation None marks a stopping worker, signalled only once
+            self.children[pid] = None
+            self.kill_worker(pid, signal.SIGTERM)
+
+    def spawn_worker(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = self.generation
+            return pid
+
+        # worker
+        exit_code = 0
+        try:
+            Worker(self).run()
+        except SystemExit as e:
+            exit_code = e.code or 0
+        except BaseException:
+            logger.exception('Worker %d failed', os.getpid())
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    def kill_worker(self, pid, sig):
+        try:
+            os.kill(pid, sig)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
+            self.children.pop(pid, None)
+
+    def stop(self):
+        for pid in list(self.children):
+            self.kill_worker(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+        for pid in list(self.children):
+            self.kill_worker(pid, signal.SIGKILL)
+        self.reap_workers()
+
+
+class Worker(object):
+    # accept() timeout, bounds how long a stop signal may wait
+    timeout = 1
+
+    def __init__(self, master):
+        self.master = master
+        self.alive = True
+
+    def handle_exit(self, signum, frame):
+        self.alive = False
+
+    def run(self):
+        for sig in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU,
+                    signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, self.handle_exit)
+        # Ctrl+C goes to the whole process group, let the master stop us
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        master = self.master
+        listener = master.listener or master.create_listener()
+        # workers race for connections on a shared socket, a worker that
+        # lost the race must not block in accept()
+        listener.setblocking(False)
+        httpd = WorkerWSGIServer(listener, master.handler_class)
+        httpd.set_app(master.application)
+        httpd.timeout = self.timeout
+        parent = os.getppid()
+        while self.alive and os.getppid() == parent:
+            httpd.handle_request()
+        httpd.server_close()
@@ -1,20 +1,20 @@
 from .response import (
-    Http404, HttpResponse,
+    Http404, HttpResponse, StreamingHttpResponse,
     HttpResponseBadRequest, HttpResponseForbidden, HttpResponseGone,
-    HttpResponseNotFound,
+    HttpResponseNotFound, HttpResponseNotModified,
     HttpResponsePermanentRedirect, HttpResponseRedirect,
     HttpResponseServerError,
 )
 from .cookie import SimpleCookie, parse_cookie
-from .request import HttpRequest
+from .request import HttpRequest, QueryDict
 
 __author__ = 'pahaz'
 __all__ = [
-    'SimpleCookie', 'parse_cookie', 'HttpRequest',
-    'HttpResponse', 'HttpResponseRedirect',
+    'SimpleCookie', 'parse_cookie', 'HttpRequest', 'QueryDict',
+    'HttpResponse', 'StreamingHttpResponse', 'HttpResponseRedirect',
     'HttpResponsePermanentRedirect',
     'HttpResponseBadRequest', 'HttpResponseForbidden',
-    'HttpResponseNotFound',
+    'HttpResponseNotFound', 'HttpResponseNotModified',
     'HttpResponseGone', 'HttpResponseServerError',
     'Http404',
 ]
@@ -1,8 +1,20 @@
-from http.cookies import SimpleCookie, BaseCookie, CookieError
+import functools
+from http import cookies
+from http.cookies import SimpleCookie, BaseCookie
+
+from minidjango.utils.types import FrozenDict
+
+COOKIE_CACHE_SIZE = 1024
+EMPTY_COOKIES = FrozenDict()
 
 
 def parse_cookie(cookie):
     """
+    Parse a Cookie header the way browsers write it: ``;`` separated
+    ``name=value`` pairs, a malformed pair doesn't invalidate the others
+    and a later duplicate wins. The result is immutable; parses of
+    repeated headers are memoized.
+
     >>> parse_cookie('')
     {}
     >>> parse_cookie('foo=bar;')
@@ -11,16 +23,31 @@ def parse_cookie(cookie):
     {'foo': 'baz'}
     >>> parse_cookie('f1=v1;f2=v2') == {'f1': 'v1', 'f2': 'v2'}
     True
+    >>> parse_cookie('a=1; b c=2; bad"name=3; d="q\\\\"x"')
+    {'a': '1', 'b c': '2', 'bad"name': '3', 'd': 'q"x'}
+    >>> parse_cookie('flag; e=') == {'': 'flag', 'e': ''}
+    True
     """
     if not cookie:
-        return {}
-    if not isinstance(cookie, BaseCookie):
-        try:
-            c = SimpleCookie()
-            c.load(cookie)
-        except CookieError:
-            # Invalid cookie
-            return {}
-    else:
-        c = cookie
-    return {k: c.get(k).value for k in c.keys()}
+        return EMPTY_COOKIES
+    if isinstance(cookie, BaseCookie):
+        return FrozenDict((k, c.value) for k, c in cookie.items())
+    return _parse_cookie(cookie)
+
+
+@functools.lru_cache(maxsize=COOKIE_CACHE_SIZE)
+def _parse_cookie(cookie):
+    cookiedict = {}
+    unquote = cookies._unquote
+    for chunk in cookie.split(';'):
+        if '=' in chunk:
+            key, val = chunk.split('=', 1)
+        else:
+            # Assume an empty name per
+            # https://bugzilla.mozilla.org/show_bug.cgi?id=169091
+            key, val = '', chunk
+        key, val = key.strip(), val.strip()
+        if key or val:
+            # unquote using Python's algorithm
+            cookiedict[key] = unquote(val) if '"' in val else val
+    return FrozenDict(cookiedict)
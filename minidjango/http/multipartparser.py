@@ -0,0 +1,186 @@
+"""
+Incremental multipart/form-data parser.
+
+The body is read from the stream in ``chunk_size`` pieces and boundaries
+are searched in a small rolling buffer, so memory use does not depend on
+the body size: form fields are kept in memory (up to
+DATA_UPLOAD_MAX_MEMORY_SIZE in total), files are written chunk by chunk
+into ``UploadedFile`` objects which spill to disk above
+FILE_UPLOAD_MAX_MEMORY_SIZE.
+"""
+import os
+
+from minidjango.conf import settings
+from minidjango.core.files.uploadedfile import UploadedFile
+from minidjango.http.request import RequestParseError
+from minidjango.utils.http import parse_header
+from minidjango.utils.types import MultiValueDict
+
+__author__ = 'pahaz'
+
+
+class MultiPartParserError(RequestParseError):
+    pass
+
+
+class MultiPartParser(object):
+    chunk_size = 64 * 1024
+    max_header_size = 8 * 1024
+
+    def __init__(self, META, stream, encoding='utf-8'):
+        content_type, params = parse_header(META.get('CONTENT_TYPE', ''))
+        if content_type != 'multipart/form-data':
+            raise MultiPartParserError(
+                'Invalid Content-Type: %s' % content_type)
+        boundary = params.get('boundary', '')
+        if not 0 < len(boundary) <= 70:
+            raise MultiPartParserError(
+                'Invalid boundary in multipart: %r' % boundary)
+        try:
+            self._boundary = boundary.encode('ascii')
+        except UnicodeEncodeError:
+            raise MultiPartParserError(
+                'Invalid boundary in multipart: %r' % boundary)
+        self._stream = stream
+        self._encoding = encoding
+        self._buffer = bytearray()
+
+    def _fill(self):
+        chunk = self._stream.read(self.chunk_size)
+        if not chunk:
+            return False
+        self._buffer += chunk
+        return True
+
+    def _read_until(self, marker, limit):
+        """Consume and return the bytes before ``marker``."""
+        buffer = self._buffer
+        start = 0
+        while True:
+            index = buffer.find(marker, start)
+            if index != -1:
+                data = bytes(buffer[:index])
+                del buffer[:index + len(marker)]
+                return data
+            if len(buffer) > limit:
+                raise MultiPartParserError('Multipart headers are too long')
+            start = max(0, len(buffer) - len(marker) + 1)
+            if not self._fill():
+                raise MultiPartParserError('Unexpected end of multipart data')
+
+    def _iter_until(self, marker):
+        """
+        Yield the bytes before ``marker`` chunk by chunk and consume the
+        marker. Only a marker-sized tail is held back between reads.
+        """
+        buffer = self._buffer
+        keep = len(marker) - 1
+        while True:
+            index = buffer.find(marker)
+            if index != -1:
+                if index:
+                    yield bytes(buffer[:index])
+                del buffer[:index + len(marker)]
+                return
+            safe = len(buffer) - keep
+            if safe > 0:
+                yield bytes(buffer[:safe])
+                del buffer[:safe]
+            if not self._fill():
+                raise MultiPartParserError('Unexpected end of multipart data')
+
+    def _parse_headers(self):
+        while len(self._buffer) < 2:
+            if not self._fill():
+                raise MultiPartParserError('Unexpected end of multipart data')
+        if self._buffer.startswith(b'\r\n'):
+            del self._buffer[:2]
+            return {}
+        raw = self._read_until(b'\r\n\r\n', self.max_header_size)
+        headers = {}
+        for line in raw.decode(self._encoding, 'replace').split('\r\n'):
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        return headers
+
+    def parse(self):
+        """Return ``(POST, FILES)`` MultiValueDicts."""
+        post, files = MultiValueDict(), MultiValueDict()
+        field_memory = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        file_memory = settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+
+        dash_boundary = b'--' + self._boundary
+        delimiter = b'\r\n' + dash_boundary
+
+        # skip the preamble, the first boundary may lack the leading CRLF
+        self._buffer[:0] = b'\r\n'
+        for _ in self._iter_until(delimiter):
+            pass
+
+        try:
+            while True:
+                while len(self._buffer) < 2:
+                    if not self._fill():
+                        raise MultiPartParserError(
+                            'Unexpected end of multipart data')
+                if self._buffer.startswith(b'--'):
+                    break  # close delimiter, ignore the epilogue
+                # the rest of the boundary line (transport padding + CRLF)
+                self._read_until(b'\r\n', self.max_header_size)
+
+                headers = self._parse_headers()
+                disposition, params = parse_header(
+                    headers.get('content-disposition', ''))
+                name = params.get('name')
+                body = self._iter_until(delimiter)
+                if disposition != 'form-data' or name is None:
+                    for _ in body:
+                        pass
+                    continue
+
+                content_type, content_params = parse_header(
+                    headers.get('content-type', 'text/plain'))
+                charset = content_params.get('charset')
+                filename = params.get('filename')
+
+                if filename is None:
+                    data = bytearray()
+                    for chunk in body:
+                        data += chunk
+                        if field_memory is not None and \
+                                len(data) > field_memory:
+                            raise MultiPartParserError(
+                                'Request body exceeded '
+                                'DATA_UPLOAD_MAX_MEMORY_SIZE')
+                    if field_memory is not None:
+                        field_memory -= len(data)
+                    post.appendlist(
+                        name, data.decode(charset or self._encoding,
+                                          'replace'))
+                    continue
+
+                # strip any path the client sent along with the name
+                filename = os.path.basename(filename.replace('\\', '/'))
+                if not filename:
+                    # empty file input
+                    for _ in body:
+                        pass
+                    continue
+                upload = UploadedFile(filename, content_type, charset,
+                                      max_memory_size=file_memory)
+                try:
+                    for chunk in body:
+                        upload.write(chunk)
+                except BaseException:
+                    upload.close()
+                    raise
+                upload.seek(0)
+                files.appendlist(name, upload)
+        except BaseException:
+            for key in files:
+                for upload in files.getlist(key):
+                    upload.close()
+            raise
+
+        return post, files
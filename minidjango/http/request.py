@@ -1,7 +1,7 @@
-import cgi
 import codecs
 import io
-from urllib.parse import quote, parse_qs, urlparse, urljoin
+from collections.abc import Mapping
+from urllib.parse import quote, unquote_plus, urlparse, urljoin
 from wsgiref.util import request_uri
 
 from minidjango.conf import settings
@@ -9,7 +9,8 @@ from minidjango.core.exceptions import ImproperlyConfigured
 from minidjango.http.cookie import parse_cookie
 from minidjango.utils.encoding import escape_uri_path
 from minidjango.utils.encoding import iri_to_uri
-from minidjango.utils.functional import cached_property
+from minidjango.utils.cache import header_to_meta_key
+from minidjango.utils.http import parse_header
 from minidjango.utils.types import MultiValueDict, LimitedStream
 
 
@@ -17,26 +18,203 @@ class RequestParseError(Exception):
     pass
 
 
+class HttpHeaders(Mapping):
+    """
+    Case-insensitive, read-only view of the HTTP headers in a WSGI
+    environ. Nothing is copied, lookups go straight to the environ.
+
+    >>> headers = HttpHeaders({'HTTP_ACCEPT_ENCODING': 'gzip',
+    ...                        'CONTENT_TYPE': 'text/plain',
+    ...                        'PATH_INFO': '/'})
+    >>> headers['accept-encoding'], headers['Content-Type']
+    ('gzip', 'text/plain')
+    >>> sorted(headers)
+    ['Accept-Encoding', 'Content-Type']
+    """
+    UNPREFIXED_HEADERS = ('CONTENT_TYPE', 'CONTENT_LENGTH')
+
+    __slots__ = ('_environ',)
+
+    def __init__(self, environ):
+        self._environ = environ
+
+    @classmethod
+    def to_header_name(cls, key):
+        if key.startswith('HTTP_'):
+            key = key[5:]
+        elif key not in cls.UNPREFIXED_HEADERS:
+            return None
+        return key.replace('_', '-').title()
+
+    def __getitem__(self, header):
+        return self._environ[header_to_meta_key(header)]
+
+    def __iter__(self):
+        for key in self._environ:
+            name = self.to_header_name(key)
+            if name is not None:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class QueryDict(MultiValueDict):
+    """
+    A MultiValueDict over a query string (``str`` or ``bytes``), parsed
+    on first access. Instances are immutable unless ``mutable=True``;
+    ``copy()`` returns a mutable copy.
+
+    >>> q = QueryDict('a=1&a=2&b=%D0%B9')
+    >>> q['a'], q.getlist('a'), q['b']
+    ('1', ['1', '2'], 'й')
+    >>> q['a'] = ['3']
+    Traceback (most recent call last):
+      ...
+    AttributeError: This QueryDict instance is immutable
+    >>> c = q.copy()
+    >>> c.appendlist('a', '3')
+    >>> c.getlist('a')
+    ['1', '2', '3']
+    """
+    __slots__ = ('_query_string', 'encoding', '_mutable')
+
+    def __init__(self, query_string=None, mutable=False, encoding=None):
+        self._query_string = query_string
+        self.encoding = encoding or 'utf-8'
+        self._mutable = mutable
+        if not query_string:
+            self._data = {}
+
+    def __getattr__(self, name):
+        # the _data slot is filled on first access
+        if name != '_data':
+            raise AttributeError(name)
+        query_string = self._query_string
+        if isinstance(query_string, bytes):
+            query_string = query_string.decode(self.encoding)
+        data = {}
+        encoding = self.encoding
+        # urllib.parse.parse_qsl semantics (blank values are dropped),
+        # but only the fields that need it are unquoted
+        for field in query_string.split('&'):
+            key, _, value = field.partition('=')
+            if not value:
+                continue
+            if '%' in key or '+' in key:
+                key = unquote_plus(key, encoding)
+            if '%' in value or '+' in value:
+                value = unquote_plus(value, encoding)
+            values = data.get(key)
+            if values is None:
+                data[key] = [value]
+            else:
+                values.append(value)
+        self._data = data
+        return data
+
+    def _assert_mutable(self):
+        if not self._mutable:
+            raise AttributeError('This QueryDict instance is immutable')
+
+    def __setitem__(self, key, item):
+        self._assert_mutable()
+        super(QueryDict, self).__setitem__(key, item)
+
+    def __delitem__(self, key):
+        self._assert_mutable()
+        super(QueryDict, self).__delitem__(key)
+
+    def appendlist(self, key, value):
+        self._assert_mutable()
+        super(QueryDict, self).appendlist(key, value)
+
+    def copy(self):
+        new = QueryDict(mutable=True, encoding=self.encoding)
+        new._data = {key: list(values) for key, values in self.lists()}
+        return new
+
+
+# shared by every request without a query string or a form body
+EMPTY_QUERY_DICT = QueryDict()
+
+
 class HttpRequest(object):
+    """
+    A request over a WSGI environ. Only the method is computed up front;
+    the path, encoding, body stream, GET, COOKIES and headers are
+    computed on first access and kept in slots. The ``__dict__`` slot
+    still lets middleware attach their own attributes.
+    """
+    __slots__ = (
+        'environ', 'META', 'method', 'resolver_match', '_timings',
+        '_path', '_path_info', '_encoding', '_stream', '_read_started',
+        '_body', '_post', '_files', '_get', '_cookies', '__dict__',
+    )
+
     def __init__(self, environ):
         self.environ = environ
         self.META = environ
-
-        raw_script_name = environ.get('SCRIPT_NAME') or '/'
-        raw_path_info = environ.get('PATH_INFO') or '/'
-        script_name = quote(raw_script_name, encoding='latin1')
-        path_info = quote(raw_path_info, safe='/;=,', encoding='latin1')
-
-        self.path = script_name.rstrip('/') + path_info
-        self.path_info = path_info
         self.method = environ['REQUEST_METHOD'].upper()
-        self.encoding = _detect_encoding(environ) or 'utf-8'
-        self._stream = LimitedStream(
-            self.environ['wsgi.input'],
-            _content_length(environ)
-        )
+        self.resolver_match = None
         self._read_started = False
 
+    @property
+    def path_info(self):
+        try:
+            return self._path_info
+        except AttributeError:
+            raw_path_info = self.environ.get('PATH_INFO') or '/'
+            self._path_info = quote(raw_path_info, safe='/;=,',
+                                    encoding='latin1')
+            return self._path_info
+
+    @property
+    def path(self):
+        try:
+            return self._path
+        except AttributeError:
+            raw_script_name = self.environ.get('SCRIPT_NAME')
+            if raw_script_name and raw_script_name != '/':
+                script_name = quote(raw_script_name, encoding='latin1')
+                self._path = script_name.rstrip('/') + self.path_info
+            else:
+                self._path = self.path_info
+            return self._path
+
+    @property
+    def encoding(self):
+        try:
+            return self._encoding
+        except AttributeError:
+            self._encoding = _detect_encoding(self.environ) or 'utf-8'
+            return self._encoding
+
+    @encoding.setter
+    def encoding(self, value):
+        """Set the encoding used for GET and POST, they are re-parsed."""
+        self._encoding = value
+        for attr in ('_get', '_post'):
+            if hasattr(self, attr):
+                delattr(self, attr)
+
+    def _get_stream(self):
+        try:
+            return self._stream
+        except AttributeError:
+            content_length = _content_length(self.environ)
+            if content_length:
+                self._stream = LimitedStream(
+                    self.environ['wsgi.input'], content_length)
+            else:
+                # GET without a body: never touch wsgi.input
+                self._stream = io.BytesIO()
+            return self._stream
+
+    @property
+    def headers(self):
+        return HttpHeaders(self.environ)
+
     def get_host(self):
         """Return the HTTP host using the environment or request
         headers. So may return an insecure host."""
@@ -96,17 +274,26 @@ class HttpRequest(object):
     def is_secure(self):
         return self.scheme == 'https'
 
-    @cached_property
+    @property
     def GET(self):
-        qs = self.environ.get("QUERY_STRING", "")
-        if isinstance(qs, bytes):
-            qs = qs.decode(self.encoding)
-        return MultiValueDict(parse_qs(qs))
+        try:
+            return self._get
+        except AttributeError:
+            qs = self.environ.get("QUERY_STRING")
+            if qs:
+                self._get = QueryDict(qs, encoding=self.encoding)
+            else:
+                self._get = EMPTY_QUERY_DICT
+            return self._get
 
-    @cached_property
+    @property
     def COOKIES(self):
-        raw_cookie = self.environ.get('HTTP_COOKIE', '')
-        return parse_cookie(raw_cookie)
+        try:
+            return self._cookies
+        except AttributeError:
+            raw_cookie = self.environ.get('HTTP_COOKIE', '')
+            self._cookies = parse_cookie(raw_cookie)
+            return self._cookies
 
     def _get_post(self):
         if not hasattr(self, '_post'):
@@ -139,7 +326,7 @@ class HttpRequest(object):
         """Populate self._post and self._files if the content-type
         is a form type"""
         if self.method != 'POST':
-            self._post, self._files = MultiValueDict(), MultiValueDict()
+            self._post = self._files = EMPTY_QUERY_DICT
             return
 
         content_type = self.META.get('CONTENT_TYPE', '')
@@ -150,11 +337,8 @@ class HttpRequest(object):
             self._post, self._files = self.parse_file_upload(self.META, self)
 
         elif is_www_form:
-            request_body_bytes = self.body
-            request_body_text = request_body_bytes.decode(self.encoding)
-            body_query_dict = parse_qs(request_body_text)
-            self._post = MultiValueDict(body_query_dict)
-            self._files = MultiValueDict()
+            self._post = QueryDict(self.body, encoding=self.encoding)
+            self._files = EMPTY_QUERY_DICT
 
         else:
             raise RequestParseError(
@@ -163,36 +347,39 @@ class HttpRequest(object):
 
     def close(self):
         if hasattr(self, '_files'):
-            for f in self._files:
-                if hasattr(f, 'close'):
-                    f.close()
+            for key in self._files:
+                for f in self._files.getlist(key):
+                    if hasattr(f, 'close'):
+                        f.close()
 
     # File-like and iterator interface.
 
     def read(self, *args, **kwargs):
         self._read_started = True
         try:
-            return self._stream.read(*args, **kwargs)
+            return self._get_stream().read(*args, **kwargs)
         except IOError as e:
             raise RequestParseError() from e
 
     def readline(self, *args, **kwargs):
         self._read_started = True
         try:
-            return self._stream.readline(*args, **kwargs)
+            return self._get_stream().readline(*args, **kwargs)
         except IOError as e:
             raise RequestParseError() from e
 
     __iter__ = readline
 
     def parse_file_upload(self, META, filelike):
-        raise RequestParseError("How to parse multipart data?? "
-                                "Not implemented!")
+        """Return a tuple of (POST MultiValueDict, FILES MultiValueDict)."""
+        from minidjango.http.multipartparser import MultiPartParser
+        parser = MultiPartParser(META, filelike, self.encoding)
+        return parser.parse()
 
 
 def _detect_encoding(environ):
     encoding = None
-    _, content_params = cgi.parse_header(environ.get('CONTENT_TYPE', ''))
+    _, content_params = parse_header(environ.get('CONTENT_TYPE', ''))
     if 'charset' in content_params:
         try:
             codecs.lookup(content_params['charset'])
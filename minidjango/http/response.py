@@ -1,4 +1,4 @@
-import collections
+import collections.abc
 import datetime
 import re
 import time
@@ -15,6 +15,23 @@ _charset_from_content_type_re = re.compile(
     re.I)
 _default = object()
 
+# "200 OK" for every known status code, computed once
+STATUS_LINES = {
+    code: '%d %s' % (code, reason) for code, reason in responses.items()
+}
+
+_default_content_type = None
+
+
+@settings.subscribe
+def _update_default_content_type(settings, changed=None):
+    global _default_content_type
+    _default_content_type = '%s; charset=%s' % (
+        settings.DEFAULT_CONTENT_TYPE, settings.DEFAULT_CHARSET)
+
+
+_update_default_content_type(settings)
+
 
 class HttpCookiesMixin:
     def set_cookie(self, key, value='', max_age=None, expires=None, path='/',
@@ -64,45 +81,102 @@ class HttpCookiesMixin:
                         expires='Thu, 01-Jan-1970 00:00:00 GMT')
 
 
-class HttpResponse(HttpCookiesMixin, collections.Iterable):
+class HttpResponse(HttpCookiesMixin, collections.abc.Iterable):
     status_code = 200
 
     def __iter__(self):
-        for x in self._content:
-            if not isinstance(x, bytes):
-                x = bytes(x, encoding=self.charset)
-            yield x
+        # bind the current content now, so that the iterator can be used
+        # to build a new content (e.g. compress the old one)
+        return self._iter_content(self._content)
+
+    def _iter_content(self, content):
+        charset = None
+        try:
+            for x in content:
+                if not isinstance(x, bytes):
+                    if charset is None:
+                        charset = self.charset
+                    x = x.encode(charset)
+                yield x
+        finally:
+            if hasattr(content, 'close'):
+                content.close()
+
+    def get(self, key, default=None):
+        header = self._headers.get(key.lower())
+        return default if header is None else header[1]
 
-    def get(self, *args, **kwargs):
-        return self._headers.get(*args, **kwargs)
+    def has_header(self, key):
+        return key.lower() in self._headers
+
+    __contains__ = has_header
 
     def __getitem__(self, key):
-        return self._headers[key.lower()]
+        return self._headers[key.lower()][1]
 
     def __setitem__(self, key, item):
-        self._headers[key.lower()] = item
+        # headers are kept as ready-to-send (name, str value) pairs
+        lower = key.lower()
+        if lower == 'content-type':
+            self._content_type_charset = None
+        self._headers[lower] = (key, str(item))
 
     def __delitem__(self, key):
+        lower = key.lower()
+        if lower == 'content-type':
+            self._content_type_charset = None
         try:
-            del self._headers[key.lower()]
+            del self._headers[lower]
         except KeyError:
             pass
 
     def items(self):
-        return self._headers.items()
+        return self._headers.values()
+
+    @property
+    def status_line(self):
+        """
+        >>> HttpResponse(status=404).status_line
+        '404 Not Found'
+        >>> HttpResponse(status=200, reason='Fine').status_line
+        '200 Fine'
+        """
+        if self._reason_phrase is None:
+            status_line = STATUS_LINES.get(self.status_code)
+            if status_line is not None:
+                return status_line
+        return '%d %s' % (self.status_code, self.reason_phrase)
+
+    def response_headers(self):
+        """
+        Return the list of ``(name, value)`` headers to send, Set-Cookie
+        headers included.
+
+        >>> r = HttpResponse()
+        >>> r.set_cookie('id', '1', path=None)
+        >>> r.response_headers()
+        [('Content-Type', 'text/html; charset=utf-8'), ('Set-Cookie', 'id=1')]
+        """
+        headers = list(self._headers.values())
+        if self.cookies:
+            headers.extend(('Set-Cookie', morsel.OutputString())
+                           for morsel in self.cookies.values())
+        return headers
 
     # The WSGI server must call this method upon completion
     # of the request.
     # See http://blog.dscpl.com.au/2012/10/
     # obligations-for-calling-close-on.html
     def close(self):
-        pass
+        if hasattr(self._content, 'close'):
+            self._content.close()
 
     def __init__(self, content=b'', content_type=None,
                  status=None, reason=None,
                  charset=None):
-        self._content = [content]
+        self.content = content
         self._headers = {}
+        self._content_type_charset = None
 
         self.cookies = SimpleCookie()
         if status is not None:
@@ -110,9 +184,11 @@ class HttpResponse(HttpCookiesMixin, collections.Iterable):
         self._reason_phrase = reason
         self._charset = charset
         if content_type is None:
-            content_type = '%s; charset=%s' % (
-                settings.DEFAULT_CONTENT_TYPE,
-                self.charset)
+            if charset is None:
+                content_type = _default_content_type
+            else:
+                content_type = '%s; charset=%s' % (
+                    settings.DEFAULT_CONTENT_TYPE, charset)
         self['Content-Type'] = content_type
 
     @property
@@ -129,12 +205,18 @@ class HttpResponse(HttpCookiesMixin, collections.Iterable):
     def charset(self):
         if self._charset is not None:
             return self._charset
-        content_type = self.get('Content-Type', '')
-        matched = _charset_from_content_type_re.search(content_type)
-        if matched:
-            # Extract the charset and strip its double quotes
-            return matched.group('charset').replace('"', '')
-        return settings.DEFAULT_CHARSET
+        # parsed once per Content-Type value
+        charset = self._content_type_charset
+        if charset is None:
+            matched = _charset_from_content_type_re.search(
+                self.get('Content-Type', ''))
+            if matched:
+                # Extract the charset and strip its double quotes
+                charset = matched.group('charset').replace('"', '')
+            else:
+                charset = settings.DEFAULT_CHARSET
+            self._content_type_charset = charset
+        return charset
 
     @charset.setter
     def charset(self, value):
@@ -148,10 +230,59 @@ class HttpResponse(HttpCookiesMixin, collections.Iterable):
             'content_type': self['Content-Type'],
         }
 
+    @property
+    def streaming(self):
+        return not isinstance(self._content, list)
+
     @property
     def content(self):
+        if self.streaming:
+            # materialize once, an iterator can only be consumed once
+            self._content = [b''.join(iter(self))]
         return b''.join(iter(self))
 
+    @content.setter
+    def content(self, value):
+        if isinstance(value, (bytes, str)) or \
+                not hasattr(value, '__iter__'):
+            self._content = [value]
+        else:
+            # lazy iterable (e.g. a template render_iter() generator),
+            # consumed chunk by chunk in __iter__
+            self._content = value
+
+
+class StreamingHttpResponse(HttpResponse):
+    """
+    A response whose body is an iterable of bytes or str which is never
+    buffered: it is consumed chunk by chunk while the server sends it.
+    There is no ``content``; iterate the response or use
+    ``streaming_content`` instead.
+    """
+    streaming = True
+
+    def __init__(self, streaming_content=(), *args, **kwargs):
+        super(StreamingHttpResponse, self).__init__(
+            streaming_content, *args, **kwargs)
+
+    @property
+    def content(self):
+        raise AttributeError(
+            "This %s instance has no `content` attribute. Use "
+            "`streaming_content` instead." % self.__class__.__name__)
+
+    @content.setter
+    def content(self, value):
+        self._content = iter(value)
+
+    @property
+    def streaming_content(self):
+        return iter(self)
+
+    @streaming_content.setter
+    def streaming_content(self, value):
+        self._content = iter(value)
+
 
 class HttpResponseRedirectBase(HttpResponse):
     def __init__(self, redirect_to, *args, **kwargs):
@@ -178,6 +309,14 @@ class HttpResponsePermanentRedirect(HttpResponseRedirectBase):
     status_code = 301
 
 
+class HttpResponseNotModified(HttpResponse):
+    status_code = 304
+
+    def __init__(self, *args, **kwargs):
+        super(HttpResponseNotModified, self).__init__(*args, **kwargs)
+        del self['content-type']
+
+
 class HttpResponseBadRequest(HttpResponse):
     status_code = 400
 
@@ -0,0 +1,116 @@
+"""
+Full-page response cache.
+
+Add 'minidjango.middleware.cache.CacheMiddleware' to MIDDLEWARE_CLASSES.
+Cached GET/HEAD responses are returned from ``process_request``, before
+routing and the view. The cache key is the method, path, query string
+and the values of the request headers named in the response's Vary
+header. Entries live CACHE_MIDDLEWARE_SECONDS (or the response's
+``max-age``), the cache is bounded by CACHE_MIDDLEWARE_MAX_BYTES.
+
+Streaming responses, responses setting cookies and responses marked
+``private``, ``no-cache`` or ``no-store`` are not cached.
+"""
+from minidjango.conf import settings
+from minidjango.core.cache import LocMemCache
+from minidjango.http import HttpResponse
+from minidjango.utils.cache import (
+    get_cache_control, get_vary_headers, header_to_meta_key,
+)
+
+__author__ = 'pahaz'
+
+CACHEABLE_METHODS = ('GET', 'HEAD')
+
+
+class CachedResponse(object):
+    __slots__ = ('status_code', 'reason_phrase', 'headers', 'content')
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.reason_phrase = response.reason_phrase
+        self.headers = list(response.items())
+        self.content = response.content
+
+    @property
+    def size(self):
+        return len(self.content) + sum(
+            len(k) + len(v) for k, v in self.headers)
+
+    def to_response(self):
+        response = HttpResponse(self.content, status=self.status_code,
+                                reason=self.reason_phrase)
+        for key, value in self.headers:
+            response[key] = value
+        return response
+
+
+class CacheMiddleware(object):
+    def __init__(self):
+        self.cache = LocMemCache(
+            max_bytes=settings.CACHE_MIDDLEWARE_MAX_BYTES,
+            default_timeout=settings.CACHE_MIDDLEWARE_SECONDS)
+
+    def base_key(self, request):
+        return (request.method, request.path,
+                request.META.get('QUERY_STRING', ''))
+
+    def vary_key(self, base_key):
+        return ('vary',) + base_key
+
+    def cache_key(self, request, base_key, vary_headers):
+        meta = request.META
+        return ('response',) + base_key + tuple(
+            meta.get(header_to_meta_key(header), '')
+            for header in vary_headers)
+
+    def process_request(self, request):
+        if request.method not in CACHEABLE_METHODS:
+            request._cache_update_cache = False
+            return None
+
+        request._cache_update_cache = True
+        base_key = self.base_key(request)
+        # the Vary header list of the last cached response for this URL
+        vary_headers = self.cache.get(self.vary_key(base_key))
+        if vary_headers is None:
+            return None
+        cached = self.cache.get(
+            self.cache_key(request, base_key, vary_headers))
+        if cached is None:
+            return None
+
+        request._cache_update_cache = False
+        return cached.to_response()
+
+    def process_response(self, request, response):
+        if not getattr(request, '_cache_update_cache', False):
+            return response
+        if response.streaming or response.status_code != 200 or \
+                response.cookies:
+            return response
+
+        cache_control = get_cache_control(response)
+        if {'private', 'no-cache', 'no-store'} & set(cache_control):
+            return response
+        vary_headers = get_vary_headers(response)
+        if '*' in vary_headers:
+            return response
+
+        timeout = None
+        if 'max-age' in cache_control:
+            try:
+                timeout = int(cache_control['max-age'])
+            except (ValueError, TypeError):
+                pass
+            if not timeout:
+                return response
+
+        base_key = self.base_key(request)
+        cached = CachedResponse(response)
+        vary_headers = tuple(h.lower() for h in vary_headers)
+        if self.cache.set(self.cache_key(request, base_key, vary_headers),
+                          cached, timeout, size=cached.size):
+            self.cache.set(self.vary_key(base_key), vary_headers, timeout,
+                           size=len(repr(vary_headers)))
+        return response
@@ -0,0 +1,134 @@
+import re
+import zlib
+
+from minidjango.utils.cache import get_cache_control, patch_vary_headers
+
+__author__ = 'pahaz'
+
+# zlib wbits for each content coding: gzip container and zlib stream
+# ("deflate" in HTTP means the zlib format, RFC 7230 section 4.2.2)
+WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+# already compressed formats, compressing them again only costs CPU
+INCOMPRESSIBLE_CONTENT_TYPE_RE = re.compile(
+    r'^(image/(?!svg)|audio/|video/|font/woff|'
+    r'application/(zip|gzip|x-gzip|x-bzip2|x-xz|x-7z-compressed|'
+    r'octet-stream|pdf))',
+    re.I)
+
+
+def parse_accept_encoding(header):
+    """
+    Return a dict of content coding -> quality from an Accept-Encoding
+    header.
+
+    >>> sorted(parse_accept_encoding('gzip;q=0.5, deflate, br;q=0').items())
+    [('br', 0.0), ('deflate', 1.0), ('gzip', 0.5)]
+    """
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def choose_encoding(header):
+    """
+    >>> choose_encoding('deflate, gzip')
+    'gzip'
+    >>> choose_encoding('gzip;q=0, *')
+    'deflate'
+    >>> choose_encoding('br') is None
+    True
+    """
+    codings = parse_accept_encoding(header)
+    default = codings.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for coding in ('gzip', 'deflate'):
+        quality = codings.get(coding, default)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress_string(data, coding, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS[coding])
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_sequence(chunks, coding, level=6):
+    """
+    Compress an iterable of bytes chunk by chunk, yielding compressed
+    data as soon as zlib emits it; the input is never joined.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS[coding])
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+class GZipMiddleware(object):
+    """
+    Compress responses with gzip or deflate, according to the request's
+    Accept-Encoding. Streaming responses are compressed chunk by chunk as
+    they are sent. Small bodies, already compressed content types and
+    responses with a Content-Encoding are left alone.
+    """
+    min_length = 200
+    compress_level = 6
+
+    def process_response(self, request, response):
+        if response.get('content-encoding') is not None:
+            return response
+        if 'no-transform' in get_cache_control(response):
+            return response
+        content_type = response.get('content-type', '')
+        if INCOMPRESSIBLE_CONTENT_TYPE_RE.match(content_type):
+            return response
+        if not response.streaming and \
+                len(response.content) < self.min_length:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        coding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+
+        if response.streaming:
+            response.content = compress_sequence(
+                iter(response), coding, self.compress_level)
+        else:
+            compressed = compress_string(
+                response.content, coding, self.compress_level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+
+        # the compressed body differs byte-wise, so a strong ETag is
+        # no longer valid for it
+        etag = response.get('etag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+        return response
@@ -0,0 +1,38 @@
+import hashlib
+
+from minidjango.utils.cache import get_conditional_response
+from minidjango.utils.http import parse_http_date_safe
+
+__author__ = 'pahaz'
+
+
+class ConditionalGetMiddleware(object):
+    """
+    Handle conditional GET operations. If the response has an ETag or
+    Last-Modified header and the request has If-None-Match or
+    If-Modified-Since, replace the response with a bodiless 304.
+
+    Responses without an ETag get a strong one computed from the body.
+    Streaming responses are never hashed (that would produce the whole
+    body): views supply a cheap validator instead, e.g. with the
+    ``minidjango.views.decorators.http.condition`` decorator.
+    """
+    def process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD') or \
+                response.status_code != 200:
+            return response
+
+        etag = response.get('etag')
+        if etag is None and not response.streaming:
+            etag = '"%s"' % hashlib.md5(response.content).hexdigest()
+            response['ETag'] = etag
+
+        last_modified = response.get('last-modified')
+        if last_modified is not None:
+            last_modified = parse_http_date_safe(last_modified)
+
+        if etag is None and last_modified is None:
+            return response
+        return get_conditional_response(
+            request, etag=etag, last_modified=last_modified,
+            response=response)
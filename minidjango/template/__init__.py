@@ -0,0 +1,13 @@
+from .base import (
+    Template, TemplateDoesNotExist, TemplateSyntaxError,
+    compile_template, render, render_iter,
+)
+from .loader import Loader, get_template
+from minidjango.utils.safestring import mark_safe
+
+__author__ = 'pahaz'
+__all__ = [
+    'Template', 'TemplateDoesNotExist', 'TemplateSyntaxError',
+    'compile_template', 'render', 'render_iter',
+    'Loader', 'get_template', 'mark_safe',
+]
@@ -0,0 +1,273 @@
+import functools
+import logging
+import re
+
+from minidjango.utils.safestring import escape
+
+__author__ = 'pahaz'
+logger = logging.getLogger(__name__)
+
+TEMPLATE_CACHE_SIZE = 256
+
+VARIABLE_TAG_START = '{{'
+VARIABLE_TAG_END = '}}'
+BLOCK_TAG_START = '{%'
+BLOCK_TAG_END = '%}'
+
+TOKEN_REGEXP = re.compile(
+    '(%s.*?%s|%s.*?%s)' % (
+        re.escape(VARIABLE_TAG_START), re.escape(VARIABLE_TAG_END),
+        re.escape(BLOCK_TAG_START), re.escape(BLOCK_TAG_END),
+    ),
+    re.MULTILINE | re.DOTALL
+)
+FOR_BLOCK_REGEXP = re.compile(
+    r'^for\s+(?P<var>[a-zA-Z0-9_]+)\s+in\s+(?P<iterator>\S+)$')
+IF_BLOCK_REGEXP = re.compile(
+    r'^if\s+(?P<negate>not\s+)?(?P<condition>\S+)$')
+
+TOKEN_TEXT = 'TEXT'
+TOKEN_VAR = 'VAR'
+TOKEN_BLOCK = 'BLOCK'
+
+
+class TemplateSyntaxError(Exception):
+    pass
+
+
+class TemplateDoesNotExist(Exception):
+    pass
+
+
+def tokenize(template):
+    """
+    Split the template source into a list of ``(kind, value)`` tokens.
+
+    >>> tokenize('Hi {{ name }}!{% if x %}')
+    [('TEXT', 'Hi '), ('VAR', 'name'), ('TEXT', '!'), ('BLOCK', 'if x')]
+    """
+    tokens = []
+    for bit in TOKEN_REGEXP.split(template):
+        if not bit:
+            continue
+        if bit.startswith(VARIABLE_TAG_START):
+            tokens.append((TOKEN_VAR, bit[2:-2].strip()))
+        elif bit.startswith(BLOCK_TAG_START):
+            tokens.append((TOKEN_BLOCK, bit[2:-2].strip()))
+        else:
+            tokens.append((TOKEN_TEXT, bit))
+    return tokens
+
+
+class Variable(object):
+    """
+    A dotted lookup path (``message.name``) resolved against the context.
+    Dict keys are tried first, then attributes, then list indexes.
+    Missing values resolve to ``''``.
+    """
+    def __init__(self, expression):
+        self.expression = expression
+        self.lookups = tuple(expression.split('.'))
+
+    def resolve(self, context):
+        current = context
+        for bit in self.lookups:
+            try:
+                current = current[bit]
+            except (TypeError, KeyError, IndexError, AttributeError):
+                try:
+                    current = getattr(current, bit)
+                except AttributeError:
+                    try:
+                        current = current[int(bit)]
+                    except (ValueError, TypeError, KeyError, IndexError):
+                        return ''
+        return current
+
+
+class Node(object):
+    def render(self, context, output):
+        raise NotImplementedError
+
+    def iter_render(self, context):
+        output = []
+        self.render(context, output)
+        yield ''.join(output)
+
+
+class TextNode(Node):
+    def __init__(self, text):
+        self.text = text
+
+    def render(self, context, output):
+        output.append(self.text)
+
+
+class VariableNode(Node):
+    """
+    Output a variable, HTML-escaped unless the value is marked safe
+    (``mark_safe``) or the tag uses the ``safe`` filter.
+
+    >>> Template('{{ x }} {{ x|safe }}').render({'x': '<b>'})
+    '&lt;b&gt; <b>'
+    """
+    def __init__(self, expression):
+        expression, _, filter_name = expression.partition('|')
+        filter_name = filter_name.strip()
+        if filter_name not in ('', 'safe'):
+            raise TemplateSyntaxError('Unknown filter %r' % filter_name)
+        self.variable = Variable(expression.strip())
+        self.autoescape = filter_name != 'safe'
+
+    def render(self, context, output):
+        value = self.variable.resolve(context)
+        if self.autoescape:
+            output.append(escape(value))
+        else:
+            output.append(str(value))
+
+
+class ForNode(Node):
+    def __init__(self, var, iterator, body):
+        self.var = var
+        self.iterator = Variable(iterator)
+        self.body = body
+
+    def render(self, context, output):
+        values = self.iterator.resolve(context) or ()
+        body = self.body
+        scope = dict(context)
+        for value in values:
+            scope[self.var] = value
+            for node in body:
+                node.render(scope, output)
+
+    def iter_render(self, context):
+        # one chunk per loop iteration, so big loops are never joined
+        values = self.iterator.resolve(context) or ()
+        body = self.body
+        scope = dict(context)
+        for value in values:
+            scope[self.var] = value
+            output = []
+            for node in body:
+                node.render(scope, output)
+            yield ''.join(output)
+
+
+class IfNode(Node):
+    def __init__(self, condition, negate, body_true, body_false):
+        self.condition = Variable(condition)
+        self.negate = negate
+        self.body_true = body_true
+        self.body_false = body_false
+
+    def get_body(self, context):
+        value = bool(self.condition.resolve(context))
+        if value != self.negate:
+            return self.body_true
+        return self.body_false
+
+    def render(self, context, output):
+        for node in self.get_body(context):
+            node.render(context, output)
+
+    def iter_render(self, context):
+        for node in self.get_body(context):
+            yield from node.iter_render(context)
+
+
+class Parser(object):
+    def __init__(self, tokens):
+        # reversed so that the next token is popped from the end in O(1)
+        self.tokens = list(reversed(tokens))
+
+    def parse(self, parse_until=()):
+        nodes = []
+        while self.tokens:
+            kind, value = self.tokens.pop()
+            if kind == TOKEN_TEXT:
+                nodes.append(TextNode(value))
+            elif kind == TOKEN_VAR:
+                if not value:
+                    raise TemplateSyntaxError('Empty variable tag')
+                nodes.append(VariableNode(value))
+            elif value in parse_until:
+                return nodes, value
+            else:
+                nodes.append(self.parse_block(value))
+        if parse_until:
+            raise TemplateSyntaxError(
+                'Unclosed tag, expected one of: %s' % ', '.join(parse_until))
+        return nodes, None
+
+    def parse_block(self, value):
+        match = FOR_BLOCK_REGEXP.match(value)
+        if match:
+            body, _ = self.parse(('endfor',))
+            return ForNode(match.group('var'), match.group('iterator'), body)
+
+        match = IF_BLOCK_REGEXP.match(value)
+        if match:
+            body_true, end = self.parse(('else', 'endif'))
+            body_false = []
+            if end == 'else':
+                body_false, _ = self.parse(('endif',))
+            return IfNode(match.group('condition'), bool(match.group('negate')),
+                          body_true, body_false)
+
+        raise TemplateSyntaxError('Invalid block tag: %r' % value)
+
+
+class Template(object):
+    """
+    A compiled template. Compilation happens once in ``__init__``,
+    ``render()`` only walks the node tree.
+
+    >>> Template('{% for x in xs %}{{ x }},{% endfor %}').render({'xs': [1, 2]})
+    '1,2,'
+    """
+    def __init__(self, template, name=None):
+        self.source = template
+        self.name = name
+        self.nodelist, _ = Parser(tokenize(template)).parse()
+
+    def render(self, context=None):
+        if not context:
+            context = {}
+        output = []
+        for node in self.nodelist:
+            node.render(context, output)
+        return ''.join(output)
+
+    def render_iter(self, context=None):
+        """
+        Render the template lazily, yielding output chunks. Loop bodies
+        are yielded per iteration so the whole page is never joined.
+
+        >>> t = Template('<{% for x in xs %}{{ x }}{% endfor %}>')
+        >>> list(t.render_iter({'xs': [1, 2]}))
+        ['<', '1', '2', '>']
+        """
+        if not context:
+            context = {}
+        for node in self.nodelist:
+            yield from node.iter_render(context)
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(template):
+    """
+    Return the compiled ``Template`` for the template source. Compiled
+    templates are cached by source (str hash) with LRU eviction.
+    """
+    logger.debug('Compile template %r', template[:50])
+    return Template(template)
+
+
+def render(template, context=None):
+    return compile_template(template).render(context)
+
+
+def render_iter(template, context=None):
+    return compile_template(template).render_iter(context)
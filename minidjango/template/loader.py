@@ -0,0 +1,122 @@
+import collections
+import logging
+import os
+import time
+from threading import Lock
+
+from minidjango.conf import settings
+from minidjango.template.base import Template, TemplateDoesNotExist
+
+__author__ = 'pahaz'
+logger = logging.getLogger(__name__)
+
+CacheEntry = collections.namedtuple(
+    'CacheEntry', 'template path mtime checked_at')
+
+
+class Loader(object):
+    """
+    Filesystem template loader. Each file is read and compiled once; the
+    compiled template is kept in an LRU cache of ``max_size`` entries and
+    re-compiled only when the file mtime changes. The mtime is checked
+    with ``os.stat`` at most once per ``check_interval`` seconds.
+
+    >>> import tempfile
+    >>> d = tempfile.mkdtemp()
+    >>> with open(os.path.join(d, 'hi.html'), 'w') as f:
+    ...     _ = f.write('Hi {{ name }}')
+    >>> loader = Loader([d])
+    >>> loader.get_template('hi.html').render({'name': 'pahaz'})
+    'Hi pahaz'
+    >>> loader.get_template('hi.html') is loader.get_template('hi.html')
+    True
+    """
+    def __init__(self, dirs, max_size=256, check_interval=2):
+        self.dirs = [os.path.abspath(d) for d in dirs]
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self._cache = collections.OrderedDict()
+        self._lock = Lock()
+
+    def find_template(self, name):
+        for template_dir in self.dirs:
+            path = os.path.abspath(os.path.join(template_dir, name))
+            # don't let '../' escape from the template directory
+            if not path.startswith(template_dir + os.sep):
+                continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            return path, mtime
+        raise TemplateDoesNotExist(name)
+
+    def load_template(self, name):
+        path, mtime = self.find_template(name)
+        with open(path, encoding=settings.DEFAULT_CHARSET) as f:
+            source = f.read()
+        logger.debug('Compile template %s', path)
+        return CacheEntry(Template(source, name), path, mtime, time.monotonic())
+
+    def is_stale(self, entry):
+        try:
+            return os.stat(entry.path).st_mtime_ns != entry.mtime
+        except OSError:
+            return True
+
+    def get_template(self, name):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is not None:
+                self._cache.move_to_end(name)
+        if entry is not None:
+            if now - entry.checked_at < self.check_interval:
+                return entry.template
+            if not self.is_stale(entry):
+                with self._lock:
+                    if name in self._cache:
+                        self._cache[name] = entry._replace(checked_at=now)
+                return entry.template
+
+        entry = self.load_template(name)
+        with self._lock:
+            self._cache[name] = entry
+            self._cache.move_to_end(name)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return entry.template
+
+    def reset(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_loader = None
+_loader_lock = Lock()
+
+
+def get_default_loader():
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                _loader = Loader(
+                    settings.TEMPLATE_DIRS,
+                    max_size=settings.TEMPLATE_CACHE_SIZE,
+                    check_interval=settings.TEMPLATE_CHECK_INTERVAL,
+                )
+    return _loader
+
+
+@settings.subscribe
+def _reset_default_loader(settings, changed):
+    global _loader
+    if changed & {'TEMPLATE_DIRS', 'TEMPLATE_CACHE_SIZE',
+                  'TEMPLATE_CHECK_INTERVAL', 'DEFAULT_CHARSET'}:
+        _loader = None
+
+
+def get_template(name):
+    """Return the compiled template ``name`` from ``settings.TEMPLATE_DIRS``."""
+    return get_default_loader().get_template(name)
@@ -0,0 +1,4 @@
+from .resolvers import Resolver404, ResolverMatch, Router
+
+__author__ = 'pahaz'
+__all__ = ['Resolver404', 'ResolverMatch', 'Router']
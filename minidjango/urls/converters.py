@@ -0,0 +1,57 @@
+import re
+
+__author__ = 'pahaz'
+
+
+class IntConverter(object):
+    regex = '[0-9]+'
+
+    def to_python(self, value):
+        return int(value)
+
+
+class StringConverter(object):
+    regex = '[^/]+'
+
+    def to_python(self, value):
+        return value
+
+
+class SlugConverter(StringConverter):
+    regex = '[-a-zA-Z0-9_]+'
+
+
+DEFAULT_CONVERTERS = {
+    'int': IntConverter(),
+    'str': StringConverter(),
+    'slug': SlugConverter(),
+}
+
+
+def get_converter(name):
+    return DEFAULT_CONVERTERS[name]
+
+
+def compile_converter(converter):
+    """
+    Return a ``(segment) -> value`` function for the converter which
+    raises ``ValueError`` if the segment doesn't match.
+
+    >>> to_python = compile_converter(get_converter('int'))
+    >>> to_python('42')
+    42
+    >>> to_python('x')
+    Traceback (most recent call last):
+    ...
+    ValueError: 'x' doesn't match [0-9]+
+    """
+    fullmatch = re.compile(converter.regex).fullmatch
+    regex = converter.regex
+    to_python = converter.to_python
+
+    def convert(segment):
+        if fullmatch(segment) is None:
+            raise ValueError("%r doesn't match %s" % (segment, regex))
+        return to_python(segment)
+
+    return convert
@@ -0,0 +1,142 @@
+import re
+
+from minidjango.core.exceptions import ImproperlyConfigured
+from minidjango.http import Http404
+from minidjango.urls.converters import compile_converter, get_converter
+
+__author__ = 'pahaz'
+
+_PARAMETER_RE = re.compile(r'^<(?:(?P<converter>[^>:]+):)?(?P<name>\w+)>$')
+
+
+class Resolver404(Http404):
+    pass
+
+
+class ResolverMatch(tuple):
+    """
+    ``(func, args, kwargs)`` of a resolved path; ``route`` is the matched
+    route pattern, e.g. '/messages/<int:id>/'.
+    """
+    def __new__(cls, func, args, kwargs, route=None):
+        match = super(ResolverMatch, cls).__new__(cls, (func, args, kwargs))
+        match.route = route
+        return match
+
+    func = property(lambda self: self[0])
+    args = property(lambda self: self[1])
+    kwargs = property(lambda self: self[2])
+
+
+class RouteNode(object):
+    """
+    A node of the route tree. Path segments are the tree edges: static
+    segments are looked up in a dict, typed parameters are tried in the
+    order they were registered.
+    """
+    __slots__ = ('static', 'dynamic', 'callback', 'route')
+
+    def __init__(self):
+        self.static = {}
+        self.dynamic = []
+        self.callback = None
+        self.route = None
+
+
+class Router(object):
+    """
+    Routes compiled into a tree of path segments, so matching costs
+    O(path length) however many routes are registered.
+
+    >>> router = Router({
+    ...     '/': 'index',
+    ...     '/messages/<int:id>/': 'message',
+    ...     '/messages/<slug:name>/': 'by_name',
+    ... })
+    >>> router.resolve('/messages/42/')
+    ('message', (), {'id': 42})
+    >>> router.resolve('/messages/pahaz/')
+    ('by_name', (), {'name': 'pahaz'})
+    >>> router.resolve('/nope/')  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    ...
+    Resolver404: /nope/
+    """
+    def __init__(self, routes=None):
+        self.root = RouteNode()
+        for route, callback in (routes or {}).items():
+            self.add(route, callback)
+
+    @staticmethod
+    def split(path):
+        return path.split('/')[1:]
+
+    def add(self, route, callback):
+        if not route.startswith('/'):
+            raise ImproperlyConfigured(
+                'Route "%s" must start with a slash' % route)
+        node = self.root
+        for segment in self.split(route):
+            if '<' not in segment:
+                node = node.static.setdefault(segment, RouteNode())
+                continue
+
+            match = _PARAMETER_RE.match(segment)
+            if not match:
+                raise ImproperlyConfigured(
+                    'Route "%s" has an invalid parameter segment "%s"'
+                    % (route, segment))
+            name = match.group('name')
+            converter_name = match.group('converter') or 'str'
+            try:
+                converter = get_converter(converter_name)
+            except KeyError:
+                raise ImproperlyConfigured(
+                    'Route "%s" uses an unknown converter "%s"'
+                    % (route, converter_name))
+
+            for key, _, child in node.dynamic:
+                if key == (converter_name, name):
+                    node = child
+                    break
+            else:
+                child = RouteNode()
+                node.dynamic.append(
+                    ((converter_name, name), compile_converter(converter),
+                     child))
+                node = child
+
+        if node.callback is not None:
+            raise ImproperlyConfigured(
+                'Route "%s" conflicts with "%s"' % (route, node.route))
+        node.callback = callback
+        node.route = route
+
+    def _match(self, node, segments, index, kwargs):
+        if index == len(segments):
+            return node if node.callback is not None else None
+
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            found = self._match(child, segments, index + 1, kwargs)
+            if found is not None:
+                return found
+
+        for (_, name), convert, child in node.dynamic:
+            try:
+                kwargs[name] = convert(segment)
+            except ValueError:
+                continue
+            found = self._match(child, segments, index + 1, kwargs)
+            if found is not None:
+                return found
+            del kwargs[name]
+        return None
+
+    def resolve(self, path):
+        kwargs = {}
+        node = self._match(self.root, self.split(path), 0, kwargs)
+        if node is None:
+            raise Resolver404(path)
+        return ResolverMatch(node.callback, (), kwargs, node.route)
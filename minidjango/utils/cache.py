@@ -0,0 +1,135 @@
+import re
+
+from minidjango.utils.http import (
+    http_date, parse_etags, parse_http_date_safe,
+)
+
+__author__ = 'pahaz'
+
+cc_delim_re = re.compile(r'\s*,\s*')
+
+
+def get_vary_headers(response):
+    """
+    Return the list of header names from the response's Vary header.
+
+    >>> from minidjango.http import HttpResponse
+    >>> r = HttpResponse()
+    >>> r['Vary'] = 'Accept-Encoding, Cookie'
+    >>> get_vary_headers(r)
+    ['Accept-Encoding', 'Cookie']
+    """
+    vary = response.get('vary')
+    if not vary:
+        return []
+    return [h for h in cc_delim_re.split(vary) if h]
+
+
+def patch_vary_headers(response, newheaders):
+    """
+    Add (or update) the Vary header in the given response object.
+    Existing headers in Vary aren't removed.
+
+    >>> from minidjango.http import HttpResponse
+    >>> r = HttpResponse()
+    >>> patch_vary_headers(r, ['Cookie'])
+    >>> patch_vary_headers(r, ['accept-encoding', 'cookie'])
+    >>> r['Vary']
+    'Cookie, accept-encoding'
+    """
+    vary_headers = get_vary_headers(response)
+    existing = {h.lower() for h in vary_headers}
+    additional = [h for h in newheaders if h.lower() not in existing]
+    response['Vary'] = ', '.join(vary_headers + additional)
+
+
+def get_cache_control(response):
+    """
+    Parse the Cache-Control header into a dict, valueless directives
+    map to True.
+
+    >>> from minidjango.http import HttpResponse
+    >>> r = HttpResponse()
+    >>> r['Cache-Control'] = 'public, max-age=60'
+    >>> get_cache_control(r) == {'public': True, 'max-age': '60'}
+    True
+    """
+    directives = {}
+    for directive in cc_delim_re.split(response.get('cache-control', '')):
+        if not directive:
+            continue
+        name, sep, value = directive.partition('=')
+        directives[name.strip().lower()] = value.strip() if sep else True
+    return directives
+
+
+def header_to_meta_key(header):
+    """
+    >>> header_to_meta_key('Accept-Encoding')
+    'HTTP_ACCEPT_ENCODING'
+    >>> header_to_meta_key('content-type')
+    'CONTENT_TYPE'
+    """
+    key = header.upper().replace('-', '_')
+    if key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+        return key
+    return 'HTTP_' + key
+
+
+NOT_MODIFIED_HEADERS = (
+    'cache-control', 'content-location', 'date', 'etag', 'expires',
+    'last-modified', 'vary',
+)
+
+
+def _etag_matches(etag, etags):
+    # weak comparison (RFC 7232 section 2.3.2), as If-None-Match requires
+    if etags == ['*']:
+        return True
+    etag = etag[2:] if etag.startswith('W/') else etag
+    return any((e[2:] if e.startswith('W/') else e) == etag for e in etags)
+
+
+def _not_modified(response, etag, last_modified):
+    from minidjango.http import HttpResponseNotModified
+
+    new_response = HttpResponseNotModified()
+    if response is not None:
+        for header in NOT_MODIFIED_HEADERS:
+            value = response.get(header)
+            if value is not None:
+                new_response[header] = value
+        new_response.cookies = response.cookies
+        response.close()
+    else:
+        if etag:
+            new_response['ETag'] = etag
+        if last_modified is not None:
+            new_response['Last-Modified'] = http_date(last_modified)
+    return new_response
+
+
+def get_conditional_response(request, etag=None, last_modified=None,
+                             response=None):
+    """
+    Return an HttpResponseNotModified if the request's If-None-Match
+    (or, without it, If-Modified-Since) header matches ``etag``
+    (or ``last_modified``, seconds since the epoch); otherwise return
+    ``response``. Only GET and HEAD requests are considered.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return response
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        if etag and _etag_matches(etag, parse_etags(if_none_match)):
+            return _not_modified(response, etag, last_modified)
+        return response
+
+    if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+    if if_modified_since and last_modified is not None:
+        if_modified_since = parse_http_date_safe(if_modified_since)
+        if if_modified_since is not None and \
+                int(last_modified) <= if_modified_since:
+            return _not_modified(response, etag, last_modified)
+    return response
@@ -1,4 +1,6 @@
-from email.utils import formatdate
+import re
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
 
 __author__ = 'pahaz'
 
@@ -15,3 +17,104 @@ def cookie_date(epoch_seconds=None):
     """
     rfcdate = formatdate(epoch_seconds)
     return '%s-%s-%s GMT' % (rfcdate[:7], rfcdate[8:11], rfcdate[12:25])
+
+
+def _parse_header_params(s):
+    while s[:1] == ';':
+        s = s[1:]
+        end = s.find(';')
+        # skip semicolons inside quoted strings
+        while end > 0 and (s.count('"', 0, end) - s.count('\\"', 0, end)) % 2:
+            end = s.find(';', end + 1)
+        if end < 0:
+            end = len(s)
+        yield s[:end].strip()
+        s = s[end:]
+
+
+def parse_header(line):
+    """
+    Parse a Content-Type like header. Return the lowercased main value
+    and a dictionary of parameters (drop-in for the deprecated
+    ``cgi.parse_header``).
+
+    >>> parse_header('text/HTML; charset="utf-8"')
+    ('text/html', {'charset': 'utf-8'})
+    >>> parse_header('form-data; name="f"; filename="a;b.txt"')
+    ('form-data', {'name': 'f', 'filename': 'a;b.txt'})
+    """
+    parts = _parse_header_params(';' + line)
+    key = next(parts).lower()
+    params = {}
+    for p in parts:
+        i = p.find('=')
+        if i >= 0:
+            name = p[:i].strip().lower()
+            value = p[i + 1:].strip()
+            if len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+                value = value.replace('\\\\', '\\').replace('\\"', '"')
+            params[name] = value
+    return key, params
+
+
+def http_date(epoch_seconds=None):
+    """
+    Format the time to match the RFC 7231 date format, as used by the
+    Last-Modified and Expires headers.
+
+    >>> http_date(0)
+    'Thu, 01 Jan 1970 00:00:00 GMT'
+    """
+    return formatdate(epoch_seconds, usegmt=True)
+
+
+def parse_http_date_safe(date):
+    """
+    Parse an HTTP date into seconds since the epoch, return None if the
+    date is invalid.
+
+    >>> parse_http_date_safe('Thu, 01 Jan 1970 00:01:00 GMT')
+    60
+    >>> parse_http_date_safe('yesterday') is None
+    True
+    """
+    try:
+        parsed = parsedate_to_datetime(date)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+ETAG_MATCH = re.compile(r'\A((?:W/)?"[^"]*")\Z')
+
+
+def quote_etag(etag):
+    """
+    Quote the string if it isn't already a quoted (weak or strong) ETag.
+
+    >>> quote_etag('abc'), quote_etag('W/"abc"')
+    ('"abc"', 'W/"abc"')
+    """
+    if ETAG_MATCH.match(etag):
+        return etag
+    return '"%s"' % etag
+
+
+def parse_etags(etag_str):
+    """
+    Parse a comma-separated list of ETags from an If-None-Match header.
+
+    >>> parse_etags('"a", W/"b", bad')
+    ['"a"', 'W/"b"']
+    >>> parse_etags(' * ')
+    ['*']
+    """
+    if etag_str.strip() == '*':
+        return ['*']
+    etags = (ETAG_MATCH.match(etag.strip()) for etag in etag_str.split(','))
+    return [match.group(1) for match in etags if match]
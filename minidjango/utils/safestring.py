@@ -0,0 +1,31 @@
+import html
+
+__author__ = 'pahaz'
+
+
+class SafeString(str):
+    """A string which is already safe to put into HTML as is."""
+    __slots__ = ()
+
+    def __html__(self):
+        return self
+
+
+def mark_safe(s):
+    """
+    >>> escape(mark_safe('<b>'))
+    '<b>'
+    """
+    return SafeString(s)
+
+
+def escape(value):
+    """
+    HTML-escape ``value`` unless it is marked safe.
+
+    >>> escape('<a href="?a=1&b=2">')
+    '&lt;a href=&quot;?a=1&amp;b=2&quot;&gt;'
+    """
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    return html.escape(str(value))
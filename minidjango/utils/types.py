@@ -1,13 +1,36 @@
-import collections
-from io import BytesIO
-
+import collections.abc
 import io
 
 __author__ = 'pahaz'
 
 
-class MultiValueDict(collections.UserDict):
+class FrozenDict(dict):
+    """
+    A dict which can't be changed, so it can be shared between requests
+    and threads.
+
+    >>> d = FrozenDict({'foo': 'bar'})
+    >>> d['foo']
+    'bar'
+    >>> d['foo'] = 'baz'
+    Traceback (most recent call last):
+    ...
+    TypeError: 'FrozenDict' object is immutable
+    """
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("'%s' object is immutable" % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = clear = pop = popitem = \
+        setdefault = update = __ior__ = _immutable
+
+
+class MultiValueDict(collections.abc.MutableMapping):
     """
+    A mapping of keys to lists of values, backed by a plain dict of
+    lists. Item access returns the first value of the list.
+
     >>> d = MultiValueDict()
     >>> d['foo'] = ['bar']
     >>> d['foo']
@@ -23,33 +46,89 @@ class MultiValueDict(collections.UserDict):
     {'foo': 'v1'}
     >>> dict(MultiValueDict({'foo': ['v1']}))
     {'foo': 'v1'}
+    >>> d.getlist('missing')
+    []
     """
+    __slots__ = ('_data',)
+
+    def __init__(self, mapping=None):
+        self._data = {}
+        if mapping:
+            for key, value in mapping.items():
+                self[key] = value
+
+    def __repr__(self):
+        return '<%s: %r>' % (self.__class__.__name__, self._data)
 
     def __iter__(self):
-        a = super().__iter__()
-        for x in a:
-            yield x
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
 
     def __getitem__(self, key):
-        val = super().__getitem__(key)
-        if isinstance(val, (list, tuple)):
-            val = val[0]
-        else:
-            raise RuntimeError('Invalid MultiValueDict inner state')
-        return val
+        return self._data[key][0]
 
     def __setitem__(self, key, item):
         if not isinstance(item, (list, tuple)):
             raise TypeError("Can't set not a multi value")
         if not item:
             raise ValueError("Can't set empty multi value")
-        self.data[key] = item
+        self._data[key] = list(item)
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __eq__(self, other):
+        if isinstance(other, MultiValueDict):
+            return self._data == other._data
+        return super(MultiValueDict, self).__eq__(other)
+
+    def get(self, key, default=None):
+        values = self._data.get(key)
+        return default if values is None else values[0]
+
+    def keys(self):
+        return self._data.keys()
+
+    def items(self):
+        return [(key, values[0]) for key, values in self._data.items()]
+
+    def values(self):
+        return [values[0] for values in self._data.values()]
+
+    def lists(self):
+        """Return ``(key, list)`` pairs."""
+        return self._data.items()
 
     def getlist(self, key, default=None):
-        val = self.data.get(key, default)
-        if not isinstance(val, (list, tuple)):
-            raise RuntimeError('Invalid MultiValueDict inner state')
-        return val
+        values = self._data.get(key)
+        if values is None:
+            return [] if default is None else default
+        return values
+
+    def appendlist(self, key, value):
+        """
+        >>> d = MultiValueDict()
+        >>> d.appendlist('foo', 'v1')
+        >>> d.appendlist('foo', 'v2')
+        >>> d.getlist('foo')
+        ['v1', 'v2']
+        """
+        values = self._data.get(key)
+        if values is None:
+            self._data[key] = [value]
+        else:
+            values.append(value)
+
+    def copy(self):
+        """Return a mutable copy."""
+        new = MultiValueDict()
+        new._data = {key: list(values) for key, values in self.lists()}
+        return new
 
 
 class LimitedStream(io.IOBase):
@@ -57,6 +136,11 @@ class LimitedStream(io.IOBase):
     LimitedStream wraps another stream in order to not allow
     reading from it past specified amount of bytes.
 
+    Read-ahead (for ``readline``) is kept in a ``bytearray`` and is
+    bounded by ``buf_size`` bytes per read from the wrapped stream;
+    consumed bytes are dropped from the front of the buffer without
+    copying the rest.
+
     >>> import io
     >>> bio = io.BytesIO(b"some -- long -- byte string")
     >>> lbio = LimitedStream(bio, 4)
@@ -74,13 +158,22 @@ class LimitedStream(io.IOBase):
     >>> lbio.read()
     b''
 
+    >>> lbio = LimitedStream(io.BytesIO(b"0123456789"), 8)
+    >>> buf = bytearray(5)
+    >>> lbio.readinto(buf), bytes(buf)
+    (5, b'01234')
+    >>> list(lbio.chunks(2))
+    [b'56', b'7']
     """
-    def __init__(self, stream, limit, buf_size=64 * 1024 * 1024):
+    def __init__(self, stream, limit, buf_size=64 * 1024):
         self.stream = stream
         self.remaining = limit
-        self.buffer = b''
+        self.buffer = bytearray()
         self.buf_size = buf_size
 
+    def readable(self):
+        return True
+
     def _read_limited(self, size=None):
         if size is None or size > self.remaining:
             size = self.remaining
@@ -91,32 +184,76 @@ class LimitedStream(io.IOBase):
         return result
 
     def read(self, size=None):
-        if size is None:
-            result = self.buffer + self._read_limited()
-            self.buffer = b''
-        elif size < len(self.buffer):
-            result = self.buffer[:size]
-            self.buffer = self.buffer[size:]
-        else:  # size >= len(self.buffer)
-            result = self.buffer + self._read_limited(size - len(self.buffer))
-            self.buffer = b''
+        buffer = self.buffer
+        if size is None or size < 0:
+            if not buffer:
+                return self._read_limited()
+            result = bytes(buffer) + self._read_limited()
+            buffer.clear()
+        elif size <= len(buffer):
+            result = bytes(buffer[:size])
+            del buffer[:size]
+        elif not buffer:
+            result = self._read_limited(size)
+        else:
+            result = bytes(buffer) + self._read_limited(size - len(buffer))
+            buffer.clear()
         return result
 
-    def readline(self, size=None):
-        while b'\n' not in self.buffer and \
-              (size is None or len(self.buffer) < size):
-            if size:
-                # since size is not None here, len(self.buffer) < size
-                chunk = self._read_limited(size - len(self.buffer))
+    def readinto(self, b):
+        view = memoryview(b).cast('B')
+        size = len(view)
+        buffer = self.buffer
+        n = min(size, len(buffer))
+        if n:
+            view[:n] = buffer[:n]
+            del buffer[:n]
+        if n < size and self.remaining:
+            want = min(size - n, self.remaining)
+            readinto = getattr(self.stream, 'readinto', None)
+            if readinto is not None:
+                read = readinto(view[n:n + want]) or 0
             else:
-                chunk = self._read_limited()
+                chunk = self.stream.read(want)
+                read = len(chunk)
+                view[n:n + read] = chunk
+            self.remaining -= read
+            n += read
+        return n
+
+    def readline(self, size=None):
+        if size is not None and size < 0:
+            size = None
+        buffer = self.buffer
+        start = 0
+        while True:
+            index = buffer.find(b'\n', start)
+            if index != -1:
+                end = index + 1
+                break
+            if size is not None and len(buffer) >= size:
+                end = size
+                break
+            start = len(buffer)
+            want = self.buf_size
+            if size is not None:
+                want = min(want, size - len(buffer))
+            chunk = self._read_limited(want)
             if not chunk:
+                end = len(buffer)
                 break
-            self.buffer += chunk
-        sio = BytesIO(self.buffer)
-        if size:
-            line = sio.readline(size)
-        else:
-            line = sio.readline()
-        self.buffer = sio.read()
+            buffer += chunk
+        if size is not None and end > size:
+            end = size
+        line = bytes(buffer[:end])
+        del buffer[:end]
         return line
+
+    def chunks(self, chunk_size=None):
+        """Iterate over the rest of the stream in ``chunk_size`` pieces."""
+        chunk_size = chunk_size or self.buf_size
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
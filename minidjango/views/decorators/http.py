@@ -0,0 +1,64 @@
+"""
+Decorators for views based on HTTP headers.
+"""
+import functools
+
+from minidjango.utils.cache import get_conditional_response
+from minidjango.utils.http import http_date, quote_etag
+
+__author__ = 'pahaz'
+
+
+def condition(etag_func=None, last_modified_func=None):
+    """
+    Decorator to support conditional retrieval (or change) for a view.
+
+    ``etag_func`` and ``last_modified_func`` get the view arguments and
+    return a cheap validator: an ETag string and a modification time in
+    seconds since the epoch (or None). When the request's If-None-Match or
+    If-Modified-Since header matches, a 304 is returned and the view is
+    not called at all, so the body is never produced.
+
+    For example, the messages are only ever appended to, so their count
+    changes with every write::
+
+        import gitdata.local as db
+
+        @condition(etag_func=lambda request: str(len(db.messages)))
+        def export_json(request):
+            ...
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def inner(request, *args, **kwargs):
+            etag = None
+            if etag_func is not None:
+                etag = etag_func(request, *args, **kwargs)
+                etag = quote_etag(etag) if etag is not None else None
+            last_modified = None
+            if last_modified_func is not None:
+                last_modified = last_modified_func(request, *args, **kwargs)
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+
+            response = func(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                if etag is not None and response.get('etag') is None:
+                    response['ETag'] = etag
+                if last_modified is not None and \
+                        response.get('last-modified') is None:
+                    response['Last-Modified'] = http_date(last_modified)
+            return response
+        return inner
+    return decorator
+
+
+def etag(etag_func):
+    return condition(etag_func=etag_func)
+
+
+def last_modified(last_modified_func):
+    return condition(last_modified_func=last_modified_func)
@@ -1,7 +1,35 @@
+import argparse
+import logging
 from wsgiref.validate import validator
 from wsgiref.simple_server import make_server
-from app import application
 
-httpd = make_server('', 8002, validator(application))
-print("Listening on port 8002....")
-httpd.serve_forever()
+parser = argparse.ArgumentParser()
+parser.add_argument('--host', default='')
+parser.add_argument('--port', type=int, default=8002)
+parser.add_argument('--workers', type=int, default=0,
+                    help='run the pre-fork server with N worker processes')
+parser.add_argument('--asyncio', action='store_true',
+                    help='serve with the asyncio handler and front end')
+parser.add_argument('--reuse-port', action='store_true',
+                    help='each worker binds its own SO_REUSEPORT socket')
+args = parser.parse_args()
+
+# preload: import the application (and load gitdata) once, before forking
+from app import application  # noqa
+
+if args.asyncio:
+    from minidjango.core.aio import get_async_application
+    from minidjango.core.servers.aio import AsyncHTTPServer
+
+    print("Listening on port %d (asyncio)...." % args.port)
+    AsyncHTTPServer(get_async_application(), args.host, args.port).run()
+elif args.workers:
+    from minidjango.core.servers.prefork import PreforkServer
+
+    logging.basicConfig(level=logging.INFO)
+    PreforkServer(application, args.host, args.port, workers=args.workers,
+                  reuse_port=args.reuse_port).run()
+else:
+    httpd = make_server(args.host, args.port, validator(application))
+    print("Listening on port %d...." % args.port)
+    httpd.serve_forever()
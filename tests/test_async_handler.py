@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import unittest
+from io import BytesIO
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
+
+from minidjango.conf import settings
+from minidjango.core.aio import get_async_application
+from minidjango.core.servers.aio import AsyncHTTPServer
+from minidjango.http import HttpResponse, StreamingHttpResponse
+
+__author__ = 'pahaz'
+
+
+async def async_view(request, id):
+    await asyncio.sleep(0)
+    return HttpResponse('async %d' % id)
+
+
+def sync_view(request):
+    return HttpResponse(threading.current_thread().name)
+
+
+def streaming_view(request):
+    return StreamingHttpResponse(
+        threading.current_thread().name for _ in range(1))
+
+
+async def broken_handler(environ):
+    raise RuntimeError('broken')
+
+
+ROUTES = {
+    '/async/<int:id>/': async_view,
+    '/sync/': sync_view,
+    '/streaming/': streaming_view,
+}
+
+
+class AsyncHandlerTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(settings.ROUTER, ROUTES)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app = get_async_application()
+        self.addCleanup(self.app.close)
+
+    def request(self, path):
+        environ = {'PATH_INFO': path, 'wsgi.input': BytesIO()}
+        setup_testing_defaults(environ)
+        return asyncio.run(self.app(environ))
+
+    def test_async_view_is_awaited(self):
+        self.assertEqual(self.request('/async/3/').content, b'async 3')
+
+    def test_sync_view_runs_in_thread_pool(self):
+        content = self.request('/sync/').content
+        self.assertTrue(content.startswith(b'minidjango-sync'))
+
+    def exchange(self, request, handler=None, **kwargs):
+        async def scenario():
+            server = AsyncHTTPServer(handler or self.app, '127.0.0.1', 0,
+                                     **kwargs)
+            tcp = await asyncio.start_server(
+                server.handle_connection, '127.0.0.1', 0)
+            port = tcp.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(request)
+            data = await reader.read()
+            writer.close()
+            tcp.close()
+            await tcp.wait_closed()
+            return data
+
+        return asyncio.run(scenario())
+
+    def test_http_front_end(self):
+        data = self.exchange(b'GET /async/7/ HTTP/1.1\r\nHost: x\r\n'
+                             b'Connection: close\r\n\r\n')
+        self.assertTrue(data.startswith(b'HTTP/1.1 200 OK\r\n'))
+        self.assertTrue(data.endswith(b'\r\n\r\nasync 7'))
+
+    def test_streaming_response_is_iterated_off_the_loop(self):
+        data = self.exchange(b'GET /streaming/ HTTP/1.1\r\nHost: x\r\n\r\n')
+        self.assertTrue(data.endswith(b'\r\n\r\nminidjango-sync_0'))
+
+    def test_too_large_body(self):
+        data = self.exchange(b'POST /sync/ HTTP/1.1\r\nHost: x\r\n'
+                             b'Content-Length: 11\r\n\r\nhello world',
+                             max_body_size=10)
+        self.assertTrue(
+            data.startswith(b'HTTP/1.1 413 Request Entity Too Large\r\n'))
+
+    def test_handler_error(self):
+        with self.assertLogs('minidjango.server', 'ERROR'):
+            data = self.exchange(b'GET / HTTP/1.1\r\nHost: x\r\n\r\n',
+                                 handler=broken_handler)
+        self.assertTrue(
+            data.startswith(b'HTTP/1.1 500 Internal Server Error\r\n'))
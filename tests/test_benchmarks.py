@@ -0,0 +1,34 @@
+import unittest
+
+from benchmarks import cases  # noqa
+from benchmarks.runner import BENCHMARKS, compare, run
+
+__author__ = 'pahaz'
+
+
+def results(samples):
+    return {'benchmarks': {'b': {'number': 1, 'samples': samples}}}
+
+
+class CompareTestCase(unittest.TestCase):
+    def test_significant_regression(self):
+        base = results([1.0 + i * 0.001 for i in range(20)])
+        new = results([1.2 + i * 0.001 for i in range(20)])
+        self.assertEqual(compare(base, new)[0][-1], 'slower')
+        self.assertEqual(compare(new, base)[0][-1], 'faster')
+
+    def test_noise_is_not_flagged(self):
+        base = results([1.0, 1.3, 1.1, 1.2] * 5)
+        new = results([1.3, 1.0, 1.2, 1.1] * 5)
+        self.assertEqual(compare(base, new)[0][-1], 'same')
+
+    def test_small_change_is_not_flagged(self):
+        base = results([1.0 + i * 0.0001 for i in range(20)])
+        new = results([1.01 + i * 0.0001 for i in range(20)])
+        self.assertEqual(compare(base, new)[0][-1], 'same')
+
+
+class RunTestCase(unittest.TestCase):
+    def test_all_benchmarks_run(self):
+        result = run(repeat=1, min_time=0)
+        self.assertEqual(set(result['benchmarks']), set(BENCHMARKS))
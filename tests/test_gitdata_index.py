@@ -0,0 +1,57 @@
+import random
+import unittest
+from unittest import mock
+
+from gitdata.index import SortedIndex
+
+__author__ = 'pahaz'
+
+
+class SortedIndexTestCase(unittest.TestCase):
+    def expected(self, records, after=None, reverse=False):
+        ids = sorted(records, key=lambda id: (records[id], id),
+                     reverse=reverse)
+        return ids[ids.index(after) + 1:] if after is not None else ids
+
+    @mock.patch('gitdata.index.DELTA_MAX', 8)
+    def test_matches_sorting(self):
+        rnd = random.Random(42)
+        index = SortedIndex(lambda r: r)
+        records = {}
+        for step in range(300):
+            id = rnd.randint(1, 60)
+            if id in records and rnd.random() < 0.3:
+                index.remove(id)
+                del records[id]
+            else:
+                records[id] = rnd.choice('abcdef')
+                index.add(id, records[id])
+            if step % 20 == 0:
+                batch = {rnd.randint(1, 60): rnd.choice('abcdef')
+                         for _ in range(rnd.randint(1, 15))}
+                index.add_many(batch.items())
+                records.update(batch)
+            self.assertEqual(len(index), len(records))
+            after = rnd.choice(list(records))
+            for reverse in (False, True):
+                self.assertEqual(index.page(limit=100, reverse=reverse),
+                                 self.expected(records, reverse=reverse))
+                self.assertEqual(
+                    index.page(after, limit=5, reverse=reverse),
+                    self.expected(records, after, reverse)[:5])
+
+    @mock.patch('gitdata.index.DELTA_MAX', 2)
+    def test_forks_are_independent(self):
+        index = SortedIndex(lambda r: r)
+        index.add_many(enumerate('cab', 1))
+        fork = index.fork()
+        self.assertIs(fork._base, index._base)
+        fork.add(4, 'a')
+        fork.remove(1)
+        self.assertEqual(index.page(), [2, 3, 1])
+        self.assertEqual(fork.page(), [2, 4, 3])
+        fork.add_many([(5, 'd'), (6, 'e')])  # rebuilds the fork's base
+        self.assertEqual(fork.page(), [2, 4, 3, 5, 6])
+        self.assertEqual(index.page(), [2, 3, 1])
+        with self.assertRaises(KeyError):
+            fork.page(after=1)
@@ -0,0 +1,236 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import gitdata.local as db
+from gitdata import local
+from gitdata.index import SortedIndex
+from gitdata.local import Collection
+from gitdata.storage import Collection as Log
+from gitdata.search import InvertedIndex
+from gitdata.storage import Storage
+
+__author__ = 'pahaz'
+
+
+class LocalCollectionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'messages.json')
+        self.write([{'name': 'pahaz', 'message': 'hi'}])
+
+    def write(self, data, raw=None):
+        with open(self.path, 'w') as f:
+            f.write(json.dumps(data) if raw is None else raw)
+
+    def reload(self, collection):
+        collection.check()
+        if collection.reload_thread is not None:
+            collection.reload_thread.join()
+
+    def test_snapshot_is_immutable(self):
+        messages = Collection(self.path).get()
+        self.assertEqual(messages[0]['name'], 'pahaz')
+        with self.assertRaises(TypeError):
+            messages[0]['name'] = 'admin'
+        self.assertIsInstance(messages, tuple)
+
+    def test_reload_swaps_the_snapshot(self):
+        collection = Collection(self.path)
+        old = collection.get()
+        self.write([{'name': 'pahaz', 'message': 'hi'},
+                    {'name': 'admin', 'message': 'yo'}])
+        self.reload(collection)
+        self.assertEqual(len(collection.get()), 2)
+        # a reader keeps the snapshot it got
+        self.assertEqual(len(old), 1)
+
+    def test_unchanged_file_is_not_reparsed(self):
+        collection = Collection(self.path)
+        self.reload(collection)
+        self.assertIsNone(collection.reload_thread)
+
+    def test_broken_file_keeps_the_old_snapshot(self):
+        collection = Collection(self.path)
+        self.write(None, raw='[{"name": "pa')
+        self.reload(collection)
+        self.assertEqual(collection.get()[0]['message'], 'hi')
+
+    def test_checks_are_rate_limited(self):
+        collection = Collection(self.path, interval=3600)
+        self.write([])
+        collection.get()
+        self.assertIsNone(collection.reload_thread)
+
+    def test_indexes_follow_reloads(self):
+        collection = Collection(self.path, indexes={
+            'name': lambda: SortedIndex(lambda m: m['name']),
+        })
+        self.write([{'name': 'pahaz', 'message': 'hi'},
+                    {'name': 'admin', 'message': 'yo'}])
+        self.reload(collection)
+        snapshot = collection.get()
+        self.assertEqual([id for id, _ in snapshot.page('name')], [2, 1])
+        self.assertEqual(snapshot.page('name', after=2), [(1, snapshot[0])])
+        self.assertEqual([id for id, _ in snapshot.page('id', reverse=True)],
+                         [2, 1])
+        # a rewrite (not an append) rebuilds the index
+        self.write([{'name': 'zed', 'message': '!'}])
+        self.reload(collection)
+        self.assertEqual(collection.get().page('name'),
+                         [(1, {'name': 'zed', 'message': '!'})])
+
+    def test_appended_records_extend_the_index(self):
+        keys = []
+
+        def key(message):
+            keys.append(message['name'])
+            return message['name']
+
+        collection = Collection(self.path, indexes={
+            'name': lambda: SortedIndex(key),
+            'search': lambda: InvertedIndex(['message']),
+        })
+        old = collection.get()
+        self.write([{'name': 'pahaz', 'message': 'hi'},
+                    {'name': 'admin', 'message': 'yo'}])
+        self.reload(collection)
+        self.assertEqual(keys, ['pahaz', 'admin'])
+        new = collection.get()
+        # the search index is shared, each snapshot sees its own records
+        self.assertIs(new.indexes['search'], old.indexes['search'])
+        self.assertEqual(new.search('yo'), [(2, new[1])])
+        self.assertEqual(old.search('yo'), [])
+
+    def test_module_attribute(self):
+        patcher = mock.patch.dict(db._collections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        db.load(['messages'], directory=self.dir, interval=None)
+        self.assertEqual(db.messages[0]['name'], 'pahaz')
+        self.assertIs(db.get('messages'), db.messages)
+        with self.assertRaises(AttributeError):
+            db.missing
+
+    def test_storage_log_is_preferred(self):
+        patcher = mock.patch.dict(db._collections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        log = Storage(self.dir)['messages']
+        self.addCleanup(log.close)
+        log.append({'name': 'admin', 'message': 'yo'})
+        db.load(['messages'], directory=self.dir, interval=None)
+        self.assertEqual([m['name'] for m in db.messages], ['pahaz', 'admin'])
+
+
+class LogCollectionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'messages.jsonl')
+        self.log = Log(self.path)
+        self.addCleanup(self.log.close)
+        self.log.append({'name': 'pahaz'})
+        self.keys = []
+        self.collection = Collection(self.path, interval=None, indexes={
+            'name': lambda: SortedIndex(self.key),
+        })
+
+    def key(self, message):
+        self.keys.append(message['name'])
+        return message['name']
+
+    def reload(self):
+        self.collection.check()
+        if self.collection.reload_thread is not None:
+            self.collection.reload_thread.join()
+
+    def test_reload_reads_appended_lines_only(self):
+        self.log.append({'name': 'admin'})
+        with mock.patch('gitdata.local._parse_log') as parse_log:
+            self.reload()
+        self.assertFalse(parse_log.called)
+        self.assertEqual([m['name'] for m in self.collection.get()],
+                         ['pahaz', 'admin'])
+        self.assertEqual(self.keys, ['pahaz', 'admin'])
+
+    def test_extend_applies_committed_records(self):
+        records = [{'name': 'admin'}, {'name': 'user'}]
+        ids = self.log.append_many(records)
+        self.collection.extend(ids, records)
+        self.assertIsNone(self.collection.reload_thread)
+        self.assertEqual(self.collection.get().page('name', limit=1),
+                         [(2, {'name': 'admin'})])
+        # the reload skips the lines that are already applied
+        snapshot = self.collection.get()
+        self.reload()
+        self.assertIs(self.collection.get(), snapshot)
+        self.assertEqual(self.keys, ['pahaz', 'admin', 'user'])
+
+    def test_extend_checks_the_log_after_foreign_writes(self):
+        self.log.append({'name': 'admin'})  # another process
+        records = [{'name': 'user'}]
+        ids = self.log.append_many(records)
+        self.collection.extend(ids, records)
+        self.collection.reload_thread.join()
+        self.assertEqual([m['name'] for m in self.collection.get()],
+                         ['pahaz', 'admin', 'user'])
+
+    def block_reload(self):
+        """Return events: the reload has read the log, let it go on."""
+        reading, done = threading.Event(), threading.Event()
+        read_log = local._read_log
+
+        def slow_read_log(path, start=0):
+            result = read_log(path, start)
+            if not reading.is_set():
+                reading.set()
+                self.assertTrue(done.wait(5))
+            return result
+
+        patcher = mock.patch('gitdata.local._read_log', slow_read_log)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return reading, done
+
+    def test_extend_does_not_wait_for_a_reload(self):
+        os.utime(self.path, ns=(0, 0))
+        reading, done = self.block_reload()
+        self.collection.check()
+        self.assertTrue(reading.wait(5))
+        records = [{'name': 'admin'}]
+        ids = self.log.append_many(records)
+        self.collection.extend(ids, records)
+        self.assertEqual(len(self.collection.get()), 2)
+        done.set()
+        self.collection.reload_thread.join()
+        # the reload result was rebuilt on top of the extended snapshot
+        self.assertEqual([m['name'] for m in self.collection.get()],
+                         ['pahaz', 'admin'])
+
+    def test_check_during_a_reload_is_repeated(self):
+        self.log.append({'name': 'other'})  # another process
+        reading, done = self.block_reload()
+        self.collection.check()
+        self.assertTrue(reading.wait(5))
+        records = [{'name': 'admin'}]
+        ids = self.log.append_many(records)
+        self.collection.extend(ids, records)
+        thread = self.collection.reload_thread
+        done.set()
+        thread.join()
+        self.collection.reload_thread.join()
+        self.assertEqual([m['name'] for m in self.collection.get()],
+                         ['pahaz', 'other', 'admin'])
+
+    def test_rewritten_log_is_reparsed(self):
+        self.log.delete(1)
+        self.log.append({'name': 'admin'})
+        self.reload()
+        self.assertEqual(self.collection.get().page('name'),
+                         [(1, {'name': 'admin'})])
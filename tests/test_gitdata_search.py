@@ -0,0 +1,49 @@
+import unittest
+
+from gitdata.search import InvertedIndex
+
+__author__ = 'pahaz'
+
+
+class InvertedIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = InvertedIndex(['name', 'message'])
+        for id, (name, message) in enumerate([
+            ('pahaz', 'Привет, мир'),
+            ('admin', 'hello world'),
+            ('pahaz', 'hello hello'),
+            ('guest', 'help!'),
+        ], 1):
+            self.index.add(id, {'name': name, 'message': message})
+
+    def test_and(self):
+        self.assertEqual(self.index.search('pahaz hello'), [3])
+        self.assertEqual(self.index.search('pahaz nothing'), [])
+
+    def test_prefix(self):
+        self.assertEqual(self.index.search('hel*'), [3, 4, 2])
+        self.assertEqual(self.index.search('прив*'), [1])
+        self.assertEqual(self.index.search('hel'), [])
+
+    def test_top_k(self):
+        self.assertEqual(self.index.search('hello', limit=1), [3])
+
+    def test_remove_and_update(self):
+        self.index.remove(3)
+        self.assertEqual(self.index.search('pahaz'), [1])
+        self.index.add(1, {'name': 'root', 'message': ''})
+        self.assertEqual(self.index.search('pahaz'), [])
+        self.assertEqual(self.index.search('прив*'), [])
+        self.assertEqual(len(self.index), 3)
+
+    def test_empty_query(self):
+        self.assertEqual(self.index.search(' ,'), [])
+
+    def test_vocabulary_is_sorted_when_needed(self):
+        self.assertEqual(self.index.search('he*'), [3, 4, 2])
+        self.index.add(5, {'name': 'hermit', 'message': 'herb'})
+        self.index.add(6, {'name': 'heron', 'message': ''})
+        self.index.remove(6)  # a word which was never sorted in
+        self.index.remove(4)  # a word which was
+        self.assertEqual(self.index.search('he*'), [5, 3, 2])
+        self.assertEqual(self.index._words, sorted(self.index._postings))
@@ -0,0 +1,119 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gitdata.storage import Collection, Storage
+
+__author__ = 'pahaz'
+
+
+class CollectionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'messages.jsonl')
+
+    def open(self, **kwargs):
+        collection = Collection(self.path, **kwargs)
+        self.addCleanup(collection.close)
+        return collection
+
+    def test_append_get_scan(self):
+        messages = self.open()
+        first = messages.append({'name': 'pahaz', 'message': 'hi'})
+        second = messages.append({'name': 'admin', 'message': 'yo'})
+        self.assertEqual((first, second), (1, 2))
+        self.assertEqual(messages.get(2), {'name': 'admin', 'message': 'yo'})
+        self.assertEqual([i for i, _ in messages.scan()], [1, 2])
+        self.assertEqual([i for i, _ in messages.scan(start=2)], [2])
+        with self.assertRaises(KeyError):
+            messages.get(3)
+
+    def test_append_only(self):
+        messages = self.open()
+        messages.append({'n': 1})
+        size = os.path.getsize(self.path)
+        messages.append({'n': 2})
+        with open(self.path, 'rb') as f:
+            f.seek(size)
+            self.assertEqual(json.loads(f.read().decode()),
+                             {'id': 2, 'data': {'n': 2}})
+
+    def test_reopen_rebuilds_index(self):
+        messages = self.open()
+        messages.append({'n': 1})
+        messages.append({'n': 2})
+        messages.put(1, {'n': 10})
+        messages.delete(2)
+        messages.close()
+        with open(self.path, 'ab') as f:
+            f.write(b'{"id": 3, "da')  # torn write
+        messages = self.open()
+        self.assertEqual(list(messages.scan()), [(1, {'n': 10})])
+        self.assertEqual(messages.append({'n': 3}), 3)
+
+    def test_compaction(self):
+        messages = self.open(compact_min_lines=4, compact_ratio=0.5)
+        ids = messages.append_many([{'n': n} for n in range(3)])
+        for record_id in ids[:2]:
+            messages.delete(record_id)
+        with open(self.path) as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertEqual(list(messages.scan()), [(3, {'n': 2})])
+        self.assertEqual(messages.append({'n': 3}), 4)
+
+    def test_processes_share_the_log(self):
+        first = self.open()
+        second = self.open()
+        self.assertEqual(first.append({'n': 1}), 1)
+        self.assertEqual(second.append({'n': 2}), 2)
+        self.assertEqual(first.append_many([{'n': 3}, {'n': 4}]), [3, 4])
+        second.refresh()
+        self.assertEqual(second.get(4), {'n': 4})
+        self.assertEqual([i for i, _ in second.scan()], [1, 2, 3, 4])
+
+    def test_forked_writers_do_not_reuse_ids(self):
+        messages = self.open()
+        messages.append({'n': 0})
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for n in range(50):
+                    messages.append({'child': n})
+            finally:
+                os._exit(0)
+        for n in range(50):
+            messages.append({'parent': n})
+        os.waitpid(pid, 0)
+        messages.refresh()
+        ids = [i for i, _ in messages.scan()]
+        self.assertEqual(ids, list(range(1, 102)))
+
+
+class StorageTestCase(unittest.TestCase):
+    def test_imports_legacy_json(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'messages.json'), 'w') as f:
+            json.dump([{'name': 'pahaz', 'message': 'qwer'}], f)
+        storage = Storage(directory)
+        self.addCleanup(storage.close)
+        self.assertEqual(storage['messages'].get(1),
+                         {'name': 'pahaz', 'message': 'qwer'})
+        self.assertIs(storage['messages'], storage.collection('messages'))
+        self.assertEqual(sorted(os.listdir(directory)),
+                         ['messages.json', 'messages.jsonl'])
+
+    def test_failed_import_leaves_no_log(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'messages.json'), 'w') as f:
+            json.dump([{'name': 'pahaz', 'message': 'qwer'}], f)
+        storage = Storage(directory)
+        with mock.patch('os.fsync', side_effect=OSError):
+            with self.assertRaises(OSError):
+                storage['messages']
+        self.assertEqual(os.listdir(directory), ['messages.json'])
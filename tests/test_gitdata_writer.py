@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from gitdata.storage import Collection
+from gitdata.writer import GroupCommitWriter, WriterClosed
+
+__author__ = 'pahaz'
+
+
+class GroupCommitWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.collection = Collection(os.path.join(self.dir, 'messages.jsonl'))
+        self.addCleanup(self.collection.close)
+        patcher = mock.patch.object(self.collection, 'sync',
+                                    wraps=self.collection.sync)
+        self.sync = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def writer(self, **kwargs):
+        writer = GroupCommitWriter(self.collection, **kwargs)
+        self.addCleanup(writer.close)
+        return writer
+
+    def test_concurrent_appends_are_grouped(self):
+        syncing, release = threading.Event(), threading.Event()
+
+        def slow_sync():
+            # hold the first batch until the other appends queue up
+            syncing.set()
+            self.assertTrue(release.wait(5))
+            Collection.sync(self.collection)
+
+        self.sync.side_effect = slow_sync
+        writer = self.writer()
+        first = writer.submit({'message': 'first'})
+        self.assertTrue(syncing.wait(5))
+        futures = [writer.submit({'message': str(i)}) for i in range(49)]
+        release.set()
+        ids = [future.result(5) for future in [first] + futures]
+        self.assertEqual(ids, list(range(1, 51)))
+        self.assertEqual(len(self.collection), 50)
+        self.assertEqual(writer.batches, 2)
+        self.assertEqual(self.sync.call_count, 2)
+
+    def test_batch_is_synced_before_returning(self):
+        writer = self.writer()
+        record_id = writer.append({'message': 'hi'})
+        self.assertEqual(self.collection.get(record_id), {'message': 'hi'})
+        self.assertEqual(self.sync.call_count, 1)
+
+    def test_on_commit_runs_before_append_returns(self):
+        on_commit = mock.Mock()
+        writer = self.writer(on_commit=on_commit)
+        writer.append({'message': 'hi'})
+        on_commit.assert_called_once_with([1], [{'message': 'hi'}])
+
+    def test_no_fsync(self):
+        writer = self.writer(fsync='none')
+        writer.append({'message': 'hi'})
+        writer.close()
+        self.sync.assert_not_called()
+
+    def test_interval_fsync(self):
+        writer = self.writer(fsync='interval', interval=3600)
+        writer.append({'message': 'hi'})
+        self.sync.assert_not_called()
+        # pending data is synced on close
+        writer.close()
+        self.assertEqual(self.sync.call_count, 1)
+
+    def test_errors_reach_the_submitter(self):
+        writer = self.writer()
+        with mock.patch.object(self.collection, 'append_many',
+                               side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                writer.append({'message': 'hi'})
+
+    def test_closed(self):
+        writer = self.writer()
+        writer.close()
+        with self.assertRaises(WriterClosed):
+            writer.submit({})
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            GroupCommitWriter(self.collection, fsync='always')
@@ -0,0 +1,84 @@
+import unittest
+
+from minidjango.http import HttpResponse, StreamingHttpResponse
+
+__author__ = 'pahaz'
+
+
+class HttpResponseTestCase(unittest.TestCase):
+    def test_content(self):
+        response = HttpResponse('hello')
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content, b'hello')
+
+    def test_iterator_content_is_consumed_lazily(self):
+        consumed = []
+
+        def chunks():
+            for chunk in ['a', 'b', 'c']:
+                consumed.append(chunk)
+                yield chunk
+
+        response = HttpResponse(chunks())
+        self.assertTrue(response.streaming)
+        self.assertEqual(consumed, [])
+        iterator = iter(response)
+        self.assertEqual(next(iterator), b'a')
+        self.assertEqual(consumed, ['a'])
+        self.assertEqual(list(iterator), [b'b', b'c'])
+
+    def test_headers_keep_case(self):
+        response = HttpResponse()
+        response['X-Request-Id'] = 42
+        self.assertEqual(response['x-request-id'], '42')
+        self.assertEqual(response.get('X-REQUEST-ID'), '42')
+        self.assertIn('x-request-id', response)
+        self.assertIn(('X-Request-Id', '42'), list(response.items()))
+
+    def test_charset_follows_content_type(self):
+        response = HttpResponse('й', content_type='text/plain; charset=cp1251')
+        self.assertEqual(response.charset, 'cp1251')
+        self.assertEqual(response.content, 'й'.encode('cp1251'))
+        response['Content-Type'] = 'text/plain; charset="koi8-r"'
+        self.assertEqual(response.charset, 'koi8-r')
+        response.charset = 'utf-8'
+        self.assertEqual(response.content, 'й'.encode('utf-8'))
+
+    def test_response_headers(self):
+        response = HttpResponse(status=404)
+        response.set_cookie('a', '1')
+        response.set_cookie('b', '2', httponly=True)
+        self.assertEqual(response.status_line, '404 Not Found')
+        self.assertEqual(response.response_headers()[1:], [
+            ('Set-Cookie', 'a=1; Path=/'),
+            ('Set-Cookie', 'b=2; HttpOnly; Path=/'),
+        ])
+
+
+class StreamingHttpResponseTestCase(unittest.TestCase):
+    def test_never_buffers(self):
+        response = StreamingHttpResponse(iter(['a', b'b']))
+        self.assertTrue(response.streaming)
+        with self.assertRaises(AttributeError):
+            response.content
+        self.assertEqual(list(response.streaming_content), [b'a', b'b'])
+
+    def test_replace_streaming_content(self):
+        response = StreamingHttpResponse(['a', 'b'])
+        response.streaming_content = (c.upper() for c in response)
+        self.assertEqual(list(response), [b'A', b'B'])
+
+    def test_close_closes_iterator(self):
+        closed = []
+
+        def chunks():
+            try:
+                yield 'a'
+                yield 'b'
+            finally:
+                closed.append(True)
+
+        response = StreamingHttpResponse(chunks())
+        self.assertEqual(next(iter(response)), b'a')
+        response.close()
+        self.assertEqual(closed, [True])
@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+from io import BytesIO
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
+
+from minidjango.conf import settings
+from minidjango.core.aio import get_async_application
+from minidjango.core.metrics import Registry, registry, timed
+from minidjango.core.wsgi import get_wsgi_application
+from minidjango.http import HttpResponse
+
+__author__ = 'pahaz'
+
+
+class Middleware(object):
+    def process_request(self, request):
+        return None
+
+
+class RegistryTestCase(unittest.TestCase):
+    def test_shards_are_merged(self):
+        import threading
+
+        r = Registry(buckets=(1.0,))
+        threads = [threading.Thread(target=r.observe, args=('/', 'view', 0.5))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        histogram = r.collect()[('/', 'view')]
+        self.assertEqual((histogram.count, histogram.counts), (4, [4, 0]))
+
+    def test_shards_of_finished_threads_are_folded(self):
+        import threading
+
+        r = Registry(buckets=(1.0,))
+        r.observe('/', 'view', 2.0)
+        for _ in range(10):
+            t = threading.Thread(target=r.observe, args=('/', 'view', 0.5))
+            t.start()
+            t.join()
+        # only the shard of this (live) thread is left
+        self.assertEqual(len(r._shards), 1)
+        histogram = r.collect()[('/', 'view')]
+        self.assertEqual((histogram.count, histogram.counts), (11, [10, 1]))
+        r.reset()
+        self.assertEqual(r.collect(), {})
+
+    def test_timed_appends_phase(self):
+        class Request(object):
+            _timings = []
+
+        request = Request()
+        self.assertEqual(timed(lambda r: 42, 'view')(request), 42)
+        self.assertEqual([p for p, _ in request._timings], ['view'])
+
+
+class MetricsEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(settings, {
+            'METRICS_URL': '/metrics',
+            'MIDDLEWARE_CLASSES': ['tests.test_metrics.Middleware'],
+            'ROUTER': {'/messages/<int:id>/': self.view},
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.app = get_wsgi_application()
+
+    def view(self, request, id):
+        return HttpResponse('message %d' % id)
+
+    def request(self, path):
+        environ = {'PATH_INFO': path, 'wsgi.input': BytesIO()}
+        setup_testing_defaults(environ)
+        return self.app(environ, lambda *args: None)
+
+    def test_phases_are_recorded_per_route(self):
+        self.assertEqual(self.request('/messages/1/').content, b'message 1')
+        self.request('/messages/2/')
+        phases = {phase: h.count for (route, phase), h
+                  in registry.collect().items()
+                  if route == '/messages/<int:id>/'}
+        self.assertEqual(phases, {
+            'request': 2, 'Middleware.process_request': 2, 'resolve': 2,
+            'view': 2, 'headers': 2, 'total': 2,
+        })
+
+    def test_async_handler_records_the_same_phases(self):
+        app = get_async_application()
+        self.addCleanup(app.close)
+        environ = {'PATH_INFO': '/messages/1/', 'wsgi.input': BytesIO()}
+        setup_testing_defaults(environ)
+        asyncio.run(app(environ))
+        phases = {phase for route, phase in registry.collect()
+                  if route == '/messages/<int:id>/'}
+        self.assertEqual(phases, {
+            'request', 'Middleware.process_request', 'resolve', 'view',
+            'headers', 'total',
+        })
+
+    def test_prometheus_endpoint(self):
+        self.request('/messages/1/')
+        response = self.request('/metrics')
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'minidjango_request_phase_seconds_count{'
+                      b'route="/messages/<int:id>/",phase="view"} 1',
+                      response.content)
@@ -0,0 +1,235 @@
+import unittest
+import zlib
+from io import BytesIO
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
+
+from minidjango.conf import settings
+from minidjango.core.wsgi import get_wsgi_application
+from minidjango.http import HttpResponse
+from minidjango.views.decorators.http import condition
+
+__author__ = 'pahaz'
+
+
+BIG_PAGE = '<p>message</p>' * 100
+
+CALLS = []
+
+
+class RecordingMiddleware(object):
+    def process_request(self, request):
+        CALLS.append(('request', self.name))
+
+    def process_response(self, request, response):
+        CALLS.append(('response', self.name))
+        return response
+
+
+class FirstMiddleware(RecordingMiddleware):
+    name = 'first'
+
+
+class ViewMiddleware(object):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        CALLS.append(('view', callback.__name__))
+        if request.path == '/cookie/':
+            return HttpResponse('from process_view')
+
+
+class LastMiddleware(RecordingMiddleware):
+    name = 'last'
+
+
+class MiddlewareTestCase(unittest.TestCase):
+    middleware = []
+    version = 1
+
+    def setUp(self):
+        self.calls = []
+        patcher = mock.patch.dict(settings, {
+            'MIDDLEWARE_CLASSES': self.middleware,
+            'ROUTER': {
+                '/': self.view,
+                '/vary/': self.vary_view,
+                '/cookie/': self.cookie_view,
+                '/big/': self.big_view,
+                '/versioned/': condition(
+                    etag_func=lambda request: 'v%d' % self.version
+                )(self.streaming_view),
+            },
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app = get_wsgi_application()
+
+    def view(self, request):
+        self.calls.append(request.path)
+        return HttpResponse('page %d' % len(self.calls))
+
+    def vary_view(self, request):
+        self.calls.append(request.path)
+        response = HttpResponse(request.META.get('HTTP_ACCEPT_LANGUAGE', ''))
+        response['Vary'] = 'Accept-Language'
+        return response
+
+    def cookie_view(self, request):
+        self.calls.append(request.path)
+        response = HttpResponse('cookie')
+        response.set_cookie('session', 'x')
+        return response
+
+    def big_view(self, request):
+        return HttpResponse(BIG_PAGE)
+
+    def streaming_view(self, request):
+        self.calls.append(request.path)
+        return HttpResponse(iter(['big', ' ', 'body']))
+
+    def request(self, path='/', method='GET', **extra):
+        environ = dict(extra, PATH_INFO=path, REQUEST_METHOD=method,
+                       **{'wsgi.input': BytesIO()})
+        setup_testing_defaults(environ)
+        return self.app(environ, lambda *args: None)
+
+
+class CacheMiddlewareTestCase(MiddlewareTestCase):
+    middleware = ['minidjango.middleware.cache.CacheMiddleware']
+
+    def test_hit_skips_view(self):
+        self.assertEqual(self.request().content, b'page 1')
+        self.assertEqual(self.request().content, b'page 1')
+        self.assertEqual(self.calls, ['/'])
+
+    def test_key_includes_query_string_and_method(self):
+        self.request()
+        self.request(QUERY_STRING='a=1')
+        self.request(method='POST', CONTENT_TYPE='text/plain')
+        self.assertEqual(len(self.calls), 3)
+
+    def test_vary(self):
+        en = self.request('/vary/', HTTP_ACCEPT_LANGUAGE='en')
+        ru = self.request('/vary/', HTTP_ACCEPT_LANGUAGE='ru')
+        self.assertEqual((en.content, ru.content), (b'en', b'ru'))
+        self.request('/vary/', HTTP_ACCEPT_LANGUAGE='en')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_responses_with_cookies_are_not_cached(self):
+        self.request('/cookie/')
+        self.request('/cookie/')
+        self.assertEqual(len(self.calls), 2)
+
+
+class ConditionalGetMiddlewareTestCase(MiddlewareTestCase):
+    middleware = ['minidjango.middleware.http.ConditionalGetMiddleware']
+
+    def test_etag_computed_from_body(self):
+        response = self.request('/vary/')
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+        response = self.request('/vary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response['Vary'], 'Accept-Language')
+        self.assertIsNone(response.get('content-type'))
+        response = self.request('/vary/', HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        def view(request):
+            response = HttpResponse('old')
+            response['Last-Modified'] = 'Thu, 01 Jan 1970 00:01:00 GMT'
+            return response
+
+        with mock.patch.dict(settings.ROUTER, {'/': view}):
+            self.app.load_router()
+            response = self.request(
+                HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 1970 00:02:00 GMT')
+        self.assertEqual(response.status_code, 304)
+
+    def test_streaming_response_uses_view_validator(self):
+        response = self.request('/versioned/')
+        self.assertEqual(response['ETag'], '"v1"')
+        self.assertEqual(b''.join(response), b'big body')
+        response = self.request('/versioned/', HTTP_IF_NONE_MATCH='"v1"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(self.calls), 1)
+
+
+class GZipMiddlewareTestCase(MiddlewareTestCase):
+    middleware = ['minidjango.middleware.gzip.GZipMiddleware']
+
+    def test_gzip(self):
+        response = self.request('/big/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(zlib.decompress(response.content, 31),
+                         BIG_PAGE.encode())
+
+    def test_deflate(self):
+        response = self.request('/big/', HTTP_ACCEPT_ENCODING='deflate')
+        self.assertEqual(response['Content-Encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(response.content), BIG_PAGE.encode())
+
+    def test_not_accepted(self):
+        response = self.request('/big/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertIsNone(response.get('content-encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_small_body_is_not_compressed(self):
+        response = self.request('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIsNone(response.get('content-encoding'))
+
+    def test_streaming_is_compressed_lazily(self):
+        consumed = []
+
+        def chunks():
+            for i in range(100):
+                consumed.append(i)
+                yield BIG_PAGE
+
+        with mock.patch.dict(settings.ROUTER,
+                             {'/': lambda r: HttpResponse(chunks())}):
+            self.app.load_router()
+            response = self.request('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(consumed, [])
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        decompressor = zlib.decompressobj(31)
+        body = b''.join(decompressor.decompress(c) for c in response)
+        self.assertEqual(body, BIG_PAGE.encode() * 100)
+
+
+class MiddlewarePhasesTestCase(MiddlewareTestCase):
+    # __name__ rather than 'tests.test_middleware': the loader must import
+    # the module the tests run in, or CALLS would be another module's list
+    middleware = [
+        '%s.FirstMiddleware' % __name__,
+        '%s.ViewMiddleware' % __name__,
+        '%s.LastMiddleware' % __name__,
+    ]
+
+    def setUp(self):
+        super(MiddlewarePhasesTestCase, self).setUp()
+        del CALLS[:]
+
+    def test_only_implemented_hooks_are_compiled(self):
+        self.request('/')
+        chain = self.app._middleware
+        self.assertEqual(len(chain.instances), 3)
+        self.assertEqual(len(chain.request), 2)
+        self.assertEqual(len(chain.view), 1)
+        self.assertEqual(len(chain.exception), 0)
+
+    def test_order(self):
+        self.request('/')
+        self.assertEqual(CALLS, [
+            ('request', 'first'), ('request', 'last'), ('view', 'view'),
+            ('response', 'last'), ('response', 'first'),
+        ])
+        self.assertEqual(self.calls, ['/'])
+
+    def test_process_view_short_circuits_the_view(self):
+        response = self.request('/cookie/')
+        self.assertEqual(response.content, b'from process_view')
+        self.assertEqual(self.calls, [])
@@ -0,0 +1,108 @@
+import unittest
+from io import BytesIO
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
+
+from minidjango.conf import settings
+from minidjango.http.multipartparser import MultiPartParser
+from minidjango.http.request import HttpRequest, RequestParseError
+
+__author__ = 'pahaz'
+
+BOUNDARY = 'BoUnDaRy'
+
+
+def multipart_body(*parts):
+    lines = []
+    for headers, content in parts:
+        lines.append(b'--' + BOUNDARY.encode())
+        lines.extend(h.encode() for h in headers)
+        lines.append(b'')
+        lines.append(content)
+    lines.append(b'--' + BOUNDARY.encode() + b'--')
+    return b'\r\n'.join(lines) + b'\r\n'
+
+
+def field(name, value):
+    return (['Content-Disposition: form-data; name="%s"' % name], value)
+
+
+def upload(name, filename, content):
+    return ([
+        'Content-Disposition: form-data; name="%s"; filename="%s"'
+        % (name, filename),
+        'Content-Type: application/octet-stream',
+    ], content)
+
+
+class ChunkCountingStream(BytesIO):
+    max_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.max_read = max(self.max_read, len(data))
+        return data
+
+
+class MultiPartParserTestCase(unittest.TestCase):
+    def request(self, body):
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'CONTENT_TYPE': 'multipart/form-data; boundary=' + BOUNDARY,
+            'CONTENT_LENGTH': len(body),
+            'wsgi.input': BytesIO(body),
+        }
+        setup_testing_defaults(environ)
+        return HttpRequest(environ)
+
+    def test_fields_and_files(self):
+        request = self.request(multipart_body(
+            field('name', b'pahaz'),
+            field('tag', b'a'),
+            field('tag', b'b'),
+            upload('file', 'C:\\docs\\a.txt', b'line1\r\nline2'),
+        ))
+        self.assertEqual(request.POST['name'], 'pahaz')
+        self.assertEqual(request.POST.getlist('tag'), ['a', 'b'])
+        f = request.FILES['file']
+        self.assertEqual(f.name, 'a.txt')
+        self.assertEqual(f.read(), b'line1\r\nline2')
+        request.close()
+
+    def test_boundary_split_between_chunks(self):
+        content = bytes(range(256)) * 40 + b'\r\n--BoUnDaR'
+        body = multipart_body(upload('file', 'x.bin', content),
+                              field('after', b'ok'))
+        stream = ChunkCountingStream(body)
+        parser = MultiPartParser(
+            {'CONTENT_TYPE': 'multipart/form-data; boundary=' + BOUNDARY},
+            stream)
+        parser.chunk_size = 7
+        post, files = parser.parse()
+        self.assertEqual(files['file'].read(), content)
+        self.assertEqual(post['after'], 'ok')
+        self.assertEqual(stream.max_read, 7)
+
+    def test_large_file_spills_to_disk(self):
+        content = b'x' * 1000
+        with mock.patch.dict(settings, {'FILE_UPLOAD_MAX_MEMORY_SIZE': 100}):
+            request = self.request(multipart_body(
+                upload('file', 'big.txt', content)))
+            f = request.FILES['file']
+        self.assertFalse(f.in_memory)
+        self.assertEqual(f.size, 1000)
+        self.assertEqual(b''.join(f.chunks(64)), content)
+        request.close()
+
+    def test_field_memory_limit(self):
+        with mock.patch.dict(settings, {'DATA_UPLOAD_MAX_MEMORY_SIZE': 10}):
+            request = self.request(multipart_body(
+                field('name', b'x' * 11)))
+            with self.assertRaises(RequestParseError):
+                request.POST
+
+    def test_truncated_body(self):
+        body = multipart_body(field('name', b'pahaz'))[:-20]
+        request = self.request(body)
+        with self.assertRaises(RequestParseError):
+            request.POST
@@ -0,0 +1,76 @@
+import http.client
+import os
+import signal
+import socket
+import unittest
+from wsgiref.simple_server import WSGIRequestHandler
+
+from minidjango.core.servers.prefork import PreforkServer
+
+__author__ = 'pahaz'
+
+
+def application(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [str(os.getpid()).encode()]
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class PreforkServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.addCleanup(self.listener.close)
+        self.server = PreforkServer(
+            application, workers=1, graceful_timeout=5,
+            handler_class=QuietHandler)
+        self.server.create_listener = lambda: self.listener
+
+    def get(self):
+        connection = http.client.HTTPConnection(
+            *self.listener.getsockname(), timeout=5)
+        try:
+            connection.request('GET', '/')
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def fork(self, target):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                target()
+            finally:
+                os._exit(0)
+        self.addCleanup(self.kill, pid)
+        return pid
+
+    def kill(self, pid):
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+
+    def test_worker_serves_and_stops_on_term(self):
+        self.server.listener = self.listener
+        pid = self.server.spawn_worker()
+        self.addCleanup(self.kill, pid)
+        self.assertEqual(self.get(), (200, str(pid).encode()))
+        os.kill(pid, signal.SIGTERM)
+        self.assertEqual(os.waitpid(pid, 0), (pid, 0))
+
+    def test_master_stops_its_workers_on_term(self):
+        master = self.fork(self.server.run)
+        status, worker = self.get()
+        self.assertEqual(status, 200)
+        self.assertNotEqual(int(worker), master)
+        os.kill(master, signal.SIGTERM)
+        self.assertEqual(os.waitpid(master, 0), (master, 0))
+        # the worker was reaped by the master
+        with self.assertRaises(ProcessLookupError):
+            os.kill(int(worker), 0)
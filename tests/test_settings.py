@@ -1,4 +1,6 @@
+import os
 import unittest
+from unittest import mock
 
 __author__ = 'pahaz'
 
@@ -12,3 +14,72 @@ class SettingsTestCase(unittest.TestCase):
         from minidjango.conf import settings
         with self.assertRaises(AttributeError):
             self.assertTrue(settings.FOOOBAAAR)
+
+    def test_settings_are_frozen(self):
+        from minidjango.conf import settings
+        with self.assertRaises(AttributeError):
+            settings.DEBUG = True
+
+    def test_override(self):
+        from minidjango.conf import settings
+        with settings.override(DEBUG=True, NEW_SETTING=1):
+            self.assertTrue(settings.DEBUG)
+            self.assertEqual(settings.NEW_SETTING, 1)
+        self.assertFalse(settings.DEBUG)
+        self.assertNotIn('NEW_SETTING', settings)
+        with self.assertRaises(AttributeError):
+            settings.NEW_SETTING
+
+    def test_subscribe(self):
+        from minidjango.conf import settings
+        changes = []
+
+        def callback(settings, changed):
+            changes.append(changed)
+
+        settings.subscribe(callback)
+        self.addCleanup(settings.unsubscribe, callback)
+        with mock.patch.dict(settings, {'DEBUG': True}):
+            pass
+        # setting the same value is not a change
+        settings['TEMPLATE_CACHE_SIZE'] = settings.TEMPLATE_CACHE_SIZE
+        del settings['TEMPLATE_CACHE_SIZE']
+        self.assertEqual(changes, [{'DEBUG'}, {'DEBUG'}])
+
+    def test_in_place_changes_are_noticed(self):
+        from minidjango.conf import settings
+        changes = []
+
+        def callback(settings, changed):
+            changes.append(changed)
+
+        settings.subscribe(callback)
+        self.addCleanup(settings.unsubscribe, callback)
+        settings.refresh()
+        with mock.patch.dict(settings.ROUTER, {'/in-place/': None}):
+            settings.refresh()
+        settings.refresh()
+        self.assertEqual(changes, [{'ROUTER'}, {'ROUTER'}])
+
+    def test_reload_from_environment(self):
+        from minidjango.conf import settings
+        with mock.patch.dict(os.environ, {'MINIDJANGO_DEBUG': 'true',
+                                          'MINIDJANGO_TEMPLATE_DIRS': '["t"]'}):
+            settings.reload()
+            self.assertTrue(settings.DEBUG)
+            self.assertEqual(settings.TEMPLATE_DIRS, ['t'])
+        settings.reload()
+        self.assertFalse(settings.DEBUG)
+
+    def test_handler_rebuilds_router(self):
+        from minidjango.conf import settings
+        from minidjango.core.wsgi import get_wsgi_application
+        from minidjango.http import HttpResponse
+
+        app = get_wsgi_application()
+        app.load_router()
+        app.load_middleware()
+        view = lambda request: HttpResponse('new')  # noqa
+        with mock.patch.dict(settings, {'ROUTER': {'/new/': view}}):
+            self.assertIs(app.resolve('/new/')[0], view)
+        self.assertIsNot(app.resolve('/new/')[0], view)
@@ -1,7 +1,8 @@
 import unittest
 
-from template import render
-from utils import get_random_string
+from template import render, render_iter, compile_template
+from minidjango.template import TemplateSyntaxError, mark_safe
+from minidjango.utils.rand import get_random_string
 
 __author__ = 'pahaz'
 
@@ -16,7 +17,8 @@ class TemplateTestCase(unittest.TestCase):
     def test_render_for_block(self):
         template = 'Users: {% for name in names %}{{name}}, {% endfor %}'
         result = render(template, {'names': ['pahaz', 'admin', 'user']})
-        self.assertEqual(result, 'Users: pahaz, admin, user')
+        # the loop body, separator included, is output once per item
+        self.assertEqual(result, 'Users: pahaz, admin, user, ')
 
     def test_render_empty_for_block(self):
         template = 'Users: {% for name in names %}{{name}}, {% endfor %}'
@@ -25,18 +27,53 @@ class TemplateTestCase(unittest.TestCase):
 
     def test_render_if_block_with_condition_true(self):
         secret = get_random_string()
-        template = 'My secret {% if is_admin %}' + secret+ '{% endfor %}'
+        template = 'My secret {% if is_admin %}' + secret + '{% endif %}'
         result = render(template, {'is_admin': True})
         self.assertEqual(result, 'My secret ' + secret)
 
     def test_render_if_block_with_condition_false(self):
         secret = get_random_string()
-        template = 'My secret {% if is_admin %}' + secret + '{% endfor %}'
+        template = 'My secret {% if is_admin %}' + secret + '{% endif %}'
         result = render(template, {'is_admin': False})
         self.assertEqual(result, 'My secret ')
 
     def test_render_if_else_block_with_condition_true(self):
-        pass
+        template = '{% if is_admin %}admin{% else %}user{% endif %}'
+        result = render(template, {'is_admin': True})
+        self.assertEqual(result, 'admin')
 
     def test_render_if_else_block_with_condition_false(self):
-        pass
+        template = '{% if is_admin %}admin{% else %}user{% endif %}'
+        result = render(template, {'is_admin': False})
+        self.assertEqual(result, 'user')
+
+    def test_variables_are_escaped(self):
+        template = '<input value="{{ name }}">'
+        result = render(template, {'name': '"><script>alert(1)</script>'})
+        self.assertEqual(result, '<input value="&quot;&gt;&lt;script&gt;'
+                                 'alert(1)&lt;/script&gt;">')
+
+    def test_safe_opt_out(self):
+        template = '{{ html|safe }}{{ marked }}'
+        result = render(template, {'html': '<b>', 'marked': mark_safe('<i>')})
+        self.assertEqual(result, '<b><i>')
+        with self.assertRaises(TemplateSyntaxError):
+            render('{{ html|upper }}', {})
+
+    def test_render_dotted_variable(self):
+        template = '{% for m in messages %}{{ m.name }}: {{ m.message }};' \
+                   '{% endfor %}'
+        result = render(template, {'messages': [
+            {'name': 'pahaz', 'message': 'hi'},
+        ]})
+        self.assertEqual(result, 'pahaz: hi;')
+
+    def test_compiled_template_is_cached(self):
+        template = 'Cached {{ ' + get_random_string() + ' }}'
+        self.assertIs(compile_template(template), compile_template(template))
+
+    def test_render_iter_yields_chunk_per_iteration(self):
+        template = 'Users: {% for name in names %}{{name}}, {% endfor %}'
+        chunks = render_iter(template, {'names': ['pahaz', 'admin']})
+        self.assertEqual(next(chunks), 'Users: ')
+        self.assertEqual(list(chunks), ['pahaz, ', 'admin, '])
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from minidjango.template import Loader, TemplateDoesNotExist
+
+__author__ = 'pahaz'
+
+
+class LoaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def write(self, name, source, mtime=None):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(source)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def test_compiles_once(self):
+        self.write('a.html', 'A {{ x }}')
+        loader = Loader([self.dir])
+        template = loader.get_template('a.html')
+        self.assertEqual(template.render({'x': 1}), 'A 1')
+        self.assertIs(loader.get_template('a.html'), template)
+
+    def test_reloads_changed_file(self):
+        self.write('a.html', 'old', mtime=1000)
+        loader = Loader([self.dir], check_interval=0)
+        self.assertEqual(loader.get_template('a.html').render(), 'old')
+        self.write('a.html', 'new', mtime=2000)
+        self.assertEqual(loader.get_template('a.html').render(), 'new')
+
+    def test_stat_is_rate_limited(self):
+        self.write('a.html', 'old', mtime=1000)
+        loader = Loader([self.dir], check_interval=3600)
+        loader.get_template('a.html')
+        self.write('a.html', 'new', mtime=2000)
+        self.assertEqual(loader.get_template('a.html').render(), 'old')
+
+    def test_lru_bound(self):
+        for name in ('a.html', 'b.html', 'c.html'):
+            self.write(name, name)
+        loader = Loader([self.dir], max_size=2)
+        a = loader.get_template('a.html')
+        loader.get_template('b.html')
+        loader.get_template('c.html')
+        self.assertEqual(len(loader._cache), 2)
+        self.assertIsNot(loader.get_template('a.html'), a)
+
+    def test_does_not_exist(self):
+        loader = Loader([self.dir])
+        with self.assertRaises(TemplateDoesNotExist):
+            loader.get_template('missing.html')
+        with self.assertRaises(TemplateDoesNotExist):
+            loader.get_template('../' + os.path.basename(self.dir) + '/x')
+
+    def test_index_page_escapes_user_input(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        template = Loader([root]).get_template('index.html')
+        html = template.render({
+            'messages': [{'name': '<i>', 'message': '<script>x</script>'}],
+            'name': '"><script>x</script>',
+        })
+        self.assertNotIn('<script>', html)
+        self.assertIn('&lt;i&gt;: &lt;script&gt;x&lt;/script&gt;', html)
+        self.assertIn('value="&quot;&gt;&lt;script&gt;', html)
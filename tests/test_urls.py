@@ -0,0 +1,63 @@
+import unittest
+from io import BytesIO
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
+
+from minidjango.conf import settings
+from minidjango.core.exceptions import ImproperlyConfigured
+from minidjango.core.wsgi import get_wsgi_application
+from minidjango.http import HttpResponse
+from minidjango.urls import Resolver404, Router
+
+__author__ = 'pahaz'
+
+
+class RouterTestCase(unittest.TestCase):
+    def test_static_route(self):
+        router = Router({'/': 'index', '/about/': 'about'})
+        self.assertEqual(router.resolve('/'), ('index', (), {}))
+        self.assertEqual(router.resolve('/about/'), ('about', (), {}))
+        with self.assertRaises(Resolver404):
+            router.resolve('/about')
+
+    def test_typed_parameters(self):
+        router = Router({
+            '/users/<int:id>/': 'user',
+            '/users/<slug:name>/posts/<int:post>/': 'post',
+        })
+        self.assertEqual(router.resolve('/users/7/'), ('user', (), {'id': 7}))
+        self.assertEqual(router.resolve('/users/pa-haz/posts/3/'),
+                         ('post', (), {'name': 'pa-haz', 'post': 3}))
+        with self.assertRaises(Resolver404):
+            router.resolve('/users/pa haz/')
+
+    def test_static_segment_wins_and_backtracks(self):
+        router = Router({
+            '/users/me/': 'me',
+            '/users/<str:name>/edit/': 'edit',
+        })
+        self.assertEqual(router.resolve('/users/me/'), ('me', (), {}))
+        self.assertEqual(router.resolve('/users/me/edit/'),
+                         ('edit', (), {'name': 'me'}))
+
+    def test_invalid_routes(self):
+        with self.assertRaises(ImproperlyConfigured):
+            Router({'/<float:x>/': 'view'})
+        with self.assertRaises(ImproperlyConfigured):
+            Router({'x/': 'view'})
+        router = Router({'/<int:x>/': 'a'})
+        with self.assertRaises(ImproperlyConfigured):
+            router.add('/<int:x>/', 'b')
+
+
+class HandlerRoutingTestCase(unittest.TestCase):
+    def test_view_gets_kwargs(self):
+        def view(request, id):
+            return HttpResponse('message %d' % id)
+
+        with mock.patch.dict(settings.ROUTER, {'/messages/<int:id>/': view}):
+            app = get_wsgi_application()
+            environ = {'PATH_INFO': '/messages/12/', 'wsgi.input': BytesIO()}
+            setup_testing_defaults(environ)
+            response = app(environ, lambda *args: None)
+        self.assertEqual(response.content, b'message 12')
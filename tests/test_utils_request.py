@@ -79,6 +79,61 @@ class RequestTestCase(unittest.TestCase):
         with self.assertRaises(RequestParseError):
             request.body
 
+    def test_get_without_body_does_not_touch_input(self):
+        class Input(object):
+            def read(self, *args):
+                raise AssertionError('wsgi.input was read')
+
+        request = self.request({'QUERY_STRING': 'a=1', 'wsgi.input': Input()})
+        self.assertEqual(request.GET['a'], '1')
+        self.assertEqual(request.body, b'')
+
+    def test_query_dict(self):
+        request = self.request({'QUERY_STRING': 'a=1&a=2&b='})
+        self.assertEqual(request.GET.getlist('a'), ['1', '2'])
+        self.assertNotIn('b', request.GET)
+        with self.assertRaises(AttributeError):
+            request.GET['a'] = ['3']
+
+    def test_empty_query_dicts_are_shared(self):
+        first, second = self.request({}), self.request({})
+        self.assertIs(first.GET, second.GET)
+        self.assertIs(first.POST, second.FILES)
+        self.assertEqual(len(first.GET), 0)
+
+    def test_cookies(self):
+        cookie = 'sessionid=abc; bad"name=1; theme=dark'
+        request = self.request({'HTTP_COOKIE': cookie})
+        self.assertEqual(request.COOKIES['sessionid'], 'abc')
+        self.assertEqual(request.COOKIES['theme'], 'dark')
+        with self.assertRaises(TypeError):
+            request.COOKIES['theme'] = 'light'
+        # the same header is parsed once
+        other = self.request({'HTTP_COOKIE': cookie})
+        self.assertIs(request.COOKIES, other.COOKIES)
+
+    def test_headers(self):
+        request = self.request({'HTTP_ACCEPT_LANGUAGE': 'ru',
+                                'CONTENT_TYPE': 'text/plain'})
+        self.assertEqual(request.headers['accept-language'], 'ru')
+        self.assertEqual(request.headers['Content-Type'], 'text/plain')
+        self.assertIn('Accept-Language', list(request.headers))
+        self.assertNotIn('Path-Info', list(request.headers))
+
+    def test_encoding(self):
+        request = self.request({
+            'CONTENT_TYPE': 'text/plain; charset="latin1"',
+            'QUERY_STRING': b'name=\xc3\xa9'})
+        self.assertEqual(request.encoding, 'latin1')
+        self.assertEqual(request.GET['name'], '\xc3\xa9')
+        request.encoding = 'utf-8'
+        self.assertEqual(request.GET['name'], '\xe9')
+
+    def test_middleware_can_set_attributes(self):
+        request = self.request({})
+        request.user = 'pahaz'
+        self.assertEqual(request.user, 'pahaz')
+
     def request(self, environ):
         setup_testing_defaults(environ)
         return HttpRequest(environ)
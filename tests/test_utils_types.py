@@ -0,0 +1,93 @@
+import unittest
+from io import BytesIO
+
+from minidjango.utils.types import FrozenDict, LimitedStream, MultiValueDict
+
+__author__ = 'pahaz'
+
+
+class RecordingStream(BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+class LimitedStreamTestCase(unittest.TestCase):
+    def test_readline_bounded_read_ahead(self):
+        stream = RecordingStream(b'a' * 100 + b'\nrest\n')
+        lbio = LimitedStream(stream, 106, buf_size=16)
+        self.assertEqual(lbio.readline(), b'a' * 100 + b'\n')
+        self.assertTrue(all(size <= 16 for size in stream.reads))
+        self.assertEqual(lbio.readline(), b'rest\n')
+        self.assertEqual(lbio.readline(), b'')
+
+    def test_readline_size(self):
+        lbio = LimitedStream(BytesIO(b'abcdef\ngh'), 9, buf_size=4)
+        self.assertEqual(lbio.readline(3), b'abc')
+        self.assertEqual(lbio.readline(), b'def\n')
+        self.assertEqual(lbio.read(), b'gh')
+
+    def test_readline_negative_size(self):
+        lbio = LimitedStream(BytesIO(b'abcdef\ngh'), 9, buf_size=4)
+        self.assertEqual(lbio.readline(-1), b'abcdef\n')
+        self.assertEqual(lbio.readline(-1), b'gh')
+
+    def test_read_after_readline_uses_buffer(self):
+        lbio = LimitedStream(BytesIO(b'one\ntwo\nthree'), 13, buf_size=6)
+        self.assertEqual(lbio.readline(), b'one\n')
+        self.assertEqual(lbio.read(2), b'tw')
+        self.assertEqual(lbio.read(), b'o\nthree')
+
+    def test_readinto_respects_limit(self):
+        lbio = LimitedStream(BytesIO(b'0123456789'), 6)
+        buf = bytearray(10)
+        self.assertEqual(lbio.readinto(buf), 6)
+        self.assertEqual(bytes(buf[:6]), b'012345')
+        self.assertEqual(lbio.readinto(buf), 0)
+
+    def test_chunks(self):
+        lbio = LimitedStream(BytesIO(b'x' * 10), 10)
+        self.assertEqual([len(c) for c in lbio.chunks(4)], [4, 4, 2])
+
+
+class MultiValueDictTestCase(unittest.TestCase):
+    def test_mapping(self):
+        d = MultiValueDict({'a': ['1', '2'], 'b': ['3']})
+        self.assertEqual(list(d), ['a', 'b'])
+        self.assertEqual(len(d), 2)
+        self.assertIn('a', d)
+        self.assertEqual(d.get('a'), '1')
+        self.assertIsNone(d.get('c'))
+        self.assertEqual(list(d.values()), ['1', '3'])
+        self.assertEqual(dict(d.lists()), {'a': ['1', '2'], 'b': ['3']})
+        del d['b']
+        self.assertEqual(d, MultiValueDict({'a': ['1', '2']}))
+
+    def test_set_validates(self):
+        d = MultiValueDict()
+        with self.assertRaises(TypeError):
+            d['a'] = '1'
+        with self.assertRaises(ValueError):
+            d['a'] = []
+
+    def test_copy_is_deep(self):
+        d = MultiValueDict({'a': ['1']})
+        c = d.copy()
+        c.appendlist('a', '2')
+        self.assertEqual(d.getlist('a'), ['1'])
+
+
+class FrozenDictTestCase(unittest.TestCase):
+    def test_immutable(self):
+        d = FrozenDict({'foo': 'bar'})
+        for change in (lambda: d.__setitem__('foo', 'baz'),
+                       lambda: d.__delitem__('foo'), d.clear, d.popitem,
+                       lambda: d.update(foo='baz'),
+                       lambda: d.setdefault('x', 1)):
+            with self.assertRaises(TypeError):
+                change()
+        self.assertEqual(d, {'foo': 'bar'})